@@ -3,16 +3,53 @@
 Regenerate en_ewt-ud-{train,dev,test}.conllu from source files in the
 not-to-release/sources directory.
 
+Source files may be gzip- or zstd-compressed (.conllu.gz, .conllu.zst).
+With --compress gz|zst, the splits are written compressed
+(en_ewt-ud-train.conllu.gz etc.) instead.
+
+With --validate, the splits are also validated with neaten.py in the same
+pass: each source file is read once, written to its split and handed to the
+validator, whose report (as from `neaten.py` on the new splits) goes to
+stdout. The splits are the same as without --validate. --progress text|json
+shows the validator's progress on stderr (see progress.py), and -j N runs it
+in N processes.
+
 Requires python3.6+
 """
+import argparse, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compressed import open_text, read_text, resolve
+
 FLIST_BASE_PATH = 'not-to-release/file-lists/files'
-for split in ('train', 'dev', 'test'):
-    flist = FLIST_BASE_PATH + '.' + split
-    with open(flist, encoding='utf-8') as inF:
-        fpaths = inF.readlines()
-    with open(f'en_ewt-ud-{split}.conllu', 'w', encoding='utf-8', newline='\n') as outF:
-        for fpath in fpaths:
-            fpath = fpath.strip()
-            with open('not-to-release/sources/' + fpath, encoding='utf-8') as inF:
-                data = inF.read()
-            outF.write(data)
+
+def build(suffix):
+    """Write the splits; yield (split file, text) for each source file once it has been written."""
+    for split in ('train', 'dev', 'test'):
+        flist = FLIST_BASE_PATH + '.' + split
+        with open(flist, encoding='utf-8') as inF:
+            fpaths = inF.readlines()
+        outFP = f'en_ewt-ud-{split}.conllu{suffix}'
+        with open_text(outFP, 'w') as outF:
+            for fpath in fpaths:
+                fpath = fpath.strip()
+                data = read_text(resolve('not-to-release/sources/' + fpath))
+                outF.write(data)
+                yield outFP, data
+
+if __name__ == '__main__':     # (neaten.py -j re-imports this module in its worker processes)
+    ap = argparse.ArgumentParser(description='Regenerate the split files from the sources.')
+    ap.add_argument('--compress', choices=('gz', 'zst'), help='write compressed splits')
+    ap.add_argument('--validate', action='store_true', help='validate the splits with neaten.py while writing them')
+    ap.add_argument('--progress', choices=('text', 'json'), help='with --validate: show progress on stderr')
+    ap.add_argument('-j', '--jobs', type=int, default=1, metavar='N', help='with --validate: validate in N processes (0: one per CPU)')
+    args = ap.parse_args()
+    suffix = '.' + args.compress if args.compress else ''
+
+    if args.validate:
+        import neaten
+        from progress import Progress
+        neaten.validate_texts(build(suffix), Progress(args.progress) if args.progress else None, args.jobs or os.cpu_count() or 1)
+    else:
+        for _ in build(suffix):
+            pass
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Transparent reading and writing of plain, gzip (.gz) and zstd (.zst)
+compressed CoNLL-U files, shared by build.py, unbuild.py and neaten.py.
+
+When reading a compressed file, decompression runs in a background thread
+that keeps a few chunks ahead of the consumer, so it overlaps with parsing.
+
+    from compressed import open_text, resolve
+    with open_text(resolve('en_ewt-ud-dev.conllu')) as inF:   # also finds en_ewt-ud-dev.conllu.gz/.zst
+        for ln in inF: ...
+    with open_text('en_ewt-ud-dev.conllu.zst', 'w') as outF:
+        outF.write(data)
+
+zstd support requires the optional `zstandard` package (pip install zstandard).
+
+Requires python3.6+
+"""
+import gzip
+import io
+import os
+import queue
+import shutil
+import tempfile
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUFFIXES = ('.gz', '.zst')
+CHUNK_SIZE = 1 << 20    # bytes of decompressed data per chunk handed over by the reader thread
+PREFETCH_DEPTH = 4      # chunks decompressed ahead of the consumer
+
+
+def compression(path):
+    """'gz', 'zst', or None for an uncompressed file, judging by the file name."""
+    for suffix in SUFFIXES:
+        if str(path).endswith(suffix):
+            return suffix[1:]
+    return None
+
+
+def resolve(path):
+    """
+    Return `path` if it exists, else the first existing compressed variant
+    (path.gz, path.zst); `path` itself if there is none, so that opening it
+    raises the usual FileNotFoundError.
+    """
+    if os.path.exists(path) or compression(path):
+        return path
+    for suffix in SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+def strip_suffix(path):
+    """File name without the compression suffix, e.g. for deriving document ids."""
+    kind = compression(path)
+    return path[:-len(kind)-1] if kind else path
+
+
+def _open_binary(path, mode):
+    kind = compression(path)
+    if kind == 'gz':
+        return gzip.open(path, mode + 'b')
+    if kind == 'zst':
+        if zstandard is None:
+            raise RuntimeError(f"{path}: reading and writing .zst files requires the zstandard package")
+        return zstandard.open(path, mode + 'b')
+    return open(path, mode + 'b')
+
+
+class PrefetchReader(io.RawIOBase):
+    """Raw byte stream fed by a thread that reads (decompresses) `fileobj` ahead in chunks."""
+
+    def __init__(self, fileobj, chunk_size=CHUNK_SIZE, depth=PREFETCH_DEPTH):
+        super().__init__()
+        self._queue = queue.Queue(depth)
+        self._stop = threading.Event()
+        self._buf = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, args=(fileobj, chunk_size), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _fill(self, fileobj, chunk_size):
+        try:
+            with fileobj:
+                while True:
+                    chunk = fileobj.read(chunk_size)
+                    if not self._put(chunk) or not chunk:   # b'' marks the end of the stream
+                        return
+        except Exception as ex:
+            self._put(ex)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buf and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+            self._buf = memoryview(item)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+
+def open_text(path, mode='r'):
+    """
+    Open a (possibly compressed) file in text mode ('r' or 'w'), as UTF-8 with
+    '\\n' line endings. Compressed input is decompressed in a background thread.
+    """
+    if mode not in ('r', 'w'):
+        raise ValueError(f"unsupported mode: {mode!r}")
+    if mode == 'w':
+        if not compression(path):
+            return open(path, 'w', encoding='utf-8', newline='\n')
+        return io.TextIOWrapper(_open_binary(path, 'w'), encoding='utf-8', newline='\n')
+    if not compression(path):
+        return open(path, encoding='utf-8')
+    return io.TextIOWrapper(io.BufferedReader(PrefetchReader(_open_binary(path, 'r'))), encoding='utf-8')
+
+
+def read_text(path):
+    """The whole (decompressed) content of a file as a str."""
+    with open_text(path) as inF:
+        return inF.read()
+
+
+def write_text(path, text):
+    """
+    Replace the content of a (possibly compressed) file atomically: the text is written to a
+    temporary file in the same directory, which is then renamed over `path`.
+    """
+    kind = compression(path)
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.' + kind if kind else '',
+                               dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        with open_text(tmp, 'w') as outF:
+            outF.write(text)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
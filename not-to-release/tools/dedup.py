@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Report exact and near-duplicate sentences across the train/dev/test splits,
+which leak between training and evaluation data (quoted e-mails, repeated
+answers and reviews etc.).
+
+Each sentence's lowercased word forms are shingled into word n-grams and
+summarized by a MinHash signature; signatures are bucketed with LSH (banding),
+so only sentences sharing a band are compared and the run time stays near
+linear in the corpus size. Exact duplicates (identical word sequences) are
+grouped first and compared only once. Pairs whose estimated Jaccard
+similarity reaches the threshold are printed as TSV:
+
+    similarity  kind  split:sent_id  document  split:sent_id  document  text  text
+
+Run from the repository root. By default the splits are the source documents
+listed in not-to-release/file-lists/files.{train,dev,test}; --split NAME=FILE
+(repeatable) takes .conllu(.gz|.zst) files instead, e.g. for extended corpora.
+Signatures are computed with numpy if it is installed (much faster on large
+corpora), else in pure Python; both give the same results.
+
+$ python not-to-release/tools/dedup.py > dups.tsv
+$ python not-to-release/tools/dedup.py --split train=big-train.conllu.zst --split test=en_ewt-ud-test.conllu
+
+Requires python3.6+
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+from array import array
+from collections import defaultdict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compressed import open_text, resolve
+
+FLIST_BASE_PATH = 'not-to-release/file-lists/files'
+SOURCES_PATH = 'not-to-release/sources'
+SPLITS = ('train', 'dev', 'test')
+
+MASK64 = (1 << 64) - 1      # permutations are multiply-shift hashes ((a*x + b) mod 2^64) >> 32
+
+
+def read_sentences(path):
+    """Yield (sent_id, document, text, lowercased word forms) for each sentence of a CoNLL-U file."""
+    sent_id = doc = text = None
+    words = []
+    with open_text(path) as inF:
+        for ln in inF:
+            if ln.startswith('#'):
+                if ln.startswith('# newdoc id = '):
+                    doc = ln[len('# newdoc id = '):].strip()
+                elif ln.startswith('# sent_id = '):
+                    sent_id = ln[len('# sent_id = '):].strip()
+                elif ln.startswith('# text = '):
+                    text = ln[len('# text = '):].strip()
+            elif ln.strip():
+                wid, form = ln.split('\t', 2)[:2]
+                if '-' not in wid and '.' not in wid:   # not a multiword token or empty node
+                    words.append(form.lower())
+            elif words:
+                yield sent_id, doc, text, words
+                sent_id = text = None
+                words = []
+    if words:
+        yield sent_id, doc, text, words
+
+
+def split_files(args):
+    """{split name: [files]} from --split options or the file lists."""
+    if args.split:
+        files = defaultdict(list)
+        for spec in args.split:
+            name, _, path = spec.partition('=')
+            if not path:
+                sys.exit(f'--split expects NAME=FILE, got {spec!r}')
+            files[name].append(path)
+        return files
+    files = {}
+    for split in SPLITS:
+        with open(FLIST_BASE_PATH + '.' + split, encoding='utf-8') as inF:
+            files[split] = [resolve(SOURCES_PATH + '/' + fpath.strip()) for fpath in inF if fpath.strip()]
+    return files
+
+
+class MinHasher:
+    """MinHash signatures over word n-gram shingles, with a fixed family of random permutations."""
+
+    def __init__(self, num_perm, shingle_size, seed=1):
+        rng = random.Random(seed)
+        self.perms = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(num_perm)]
+        self.shingle_size = shingle_size
+        if numpy is not None:
+            self.a = numpy.array([a for a, b in self.perms], dtype=numpy.uint64).reshape(-1, 1)
+            self.b = numpy.array([b for a, b in self.perms], dtype=numpy.uint64).reshape(-1, 1)
+
+    def shingles(self, words):
+        k = min(self.shingle_size, len(words))
+        return {int.from_bytes(hashlib.blake2b('\x1f'.join(words[i:i+k]).encode('utf-8'), digest_size=8).digest(), 'little')
+                for i in range(len(words) - k + 1)}
+
+    def signature(self, words):
+        """32-bit minimum per permutation, as an array('I')."""
+        xs = self.shingles(words)
+        if numpy is not None:
+            hashes = (self.a * numpy.fromiter(xs, dtype=numpy.uint64, count=len(xs)) + self.b) >> numpy.uint64(32)
+            return array('I', hashes.min(axis=1).astype(numpy.uint32).tobytes())
+        return array('I', (min(((a*x + b) & MASK64) >> 32 for x in xs) for a, b in self.perms))
+
+
+def similarity(sig1, sig2):
+    """Estimated Jaccard similarity: the fraction of agreeing MinHash values."""
+    return sum(1 for u, v in zip(sig1, sig2) if u == v) / len(sig1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Find exact and near-duplicate sentences across splits (MinHash/LSH).')
+    ap.add_argument('--split', action='append', metavar='NAME=FILE',
+                    help='CoNLL-U file of a split (repeatable; default: the file lists)')
+    ap.add_argument('--threshold', type=float, default=0.8, help='minimum estimated Jaccard similarity (default: %(default)s)')
+    ap.add_argument('--num-perm', type=int, default=64, help='MinHash permutations (default: %(default)s)')
+    ap.add_argument('--bands', type=int, default=16, help='LSH bands; must divide --num-perm (default: %(default)s)')
+    ap.add_argument('--shingle', type=int, default=3, help='words per shingle (default: %(default)s)')
+    ap.add_argument('--min-words', type=int, default=4, help='ignore shorter sentences (default: %(default)s)')
+    ap.add_argument('--max-bucket', type=int, default=1000,
+                    help='skip LSH buckets with more sentences than this, to bound the comparisons (default: %(default)s)')
+    ap.add_argument('--within', action='store_true', help='also report duplicates within the same split')
+    args = ap.parse_args()
+    if args.num_perm % args.bands:
+        ap.error('--bands must divide --num-perm')
+    rows = args.num_perm // args.bands
+
+    hasher = MinHasher(args.num_perm, args.shingle)
+    # Exact duplicates are collapsed into groups before LSH: one signature per distinct word sequence.
+    groups = {}         # digest of the word sequence -> group number
+    members = []        # group number -> [(split, sent_id, document, text)]
+    signatures = []     # group number -> MinHash signature
+    n_sents = 0
+    for split, paths in split_files(args).items():
+        for path in paths:
+            for sent_id, doc, text, words in read_sentences(path):
+                if len(words) < args.min_words:
+                    continue
+                n_sents += 1
+                digest = hashlib.blake2b('\x1f'.join(words).encode('utf-8'), digest_size=16).digest()
+                g = groups.get(digest)
+                if g is None:
+                    g = groups[digest] = len(members)
+                    members.append([])
+                    signatures.append(hasher.signature(words))
+                members[g].append((split, sent_id, doc or os.path.basename(path), text))
+    del groups
+
+    def report(sim, kind, a, b):
+        print(f'{sim:.3f}\t{kind}\t{a[0]}:{a[1]}\t{a[2]}\t{b[0]}:{b[1]}\t{b[2]}\t{a[3]}\t{b[3]}')
+
+    pairs = 0
+    for group in members:
+        for i, a in enumerate(group):
+            for b in group[i+1:]:
+                if args.within or a[0] != b[0]:
+                    report(1.0, 'exact', a, b)
+                    pairs += 1
+
+    seen = set()
+    skipped = 0
+    for band in range(args.bands):
+        buckets = defaultdict(list)
+        lo, hi = band * rows, (band + 1) * rows
+        for g, sig in enumerate(signatures):
+            buckets[sig[lo:hi].tobytes()].append(g)
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            if len(bucket) > args.max_bucket:
+                skipped += 1
+                continue
+            for i, g1 in enumerate(bucket):
+                for g2 in bucket[i+1:]:
+                    if (g1, g2) in seen:
+                        continue
+                    seen.add((g1, g2))
+                    sim = similarity(signatures[g1], signatures[g2])
+                    if sim < args.threshold:
+                        continue
+                    for a in members[g1]:
+                        for b in members[g2]:
+                            if args.within or a[0] != b[0]:
+                                report(sim, 'near', a, b)
+                                pairs += 1
+
+    sys.stderr.write(f'! {pairs} duplicate pairs among {n_sents} sentences ({len(members)} distinct)'
+                     + (f'; {skipped} oversized LSH buckets skipped' if skipped else '') + '\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
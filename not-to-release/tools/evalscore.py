@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Predict the UD evaluation score (as reported in eval.log) locally, so the effect
+of an annotation batch on the score can be seen before pushing.
+
+All corpus statistics are collected in one streaming pass over the splits and
+shared between the metrics. Run from the repository root:
+
+$ python not-to-release/tools/evalscore.py
+
+The Udapi bug count and the validity verdict require external tools
+(udapy, tools/validate.py) which are not run here. They are STUBS: by default
+their values are carried over from the last upstream run recorded in eval.log;
+pass --udapi-bugs / --validity to supply fresh values.
+
+The weights and the size formula are read off eval.log; the split and
+source-of-annotation factors follow the upstream evaluation script as far as
+eval.log documents them, so the prediction is an approximation.
+
+Requires python3.6+
+"""
+import argparse
+import math
+import os
+import re
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compressed import open_text, resolve
+
+SPLITS = ('train', 'dev', 'test')
+
+UPOS_TAGS = {"ADJ", "ADP", "ADV", "AUX", "CCONJ", "DET", "INTJ", "NOUN", "NUM", "PART", "PRON", "PROPN",
+             "PUNCT", "SCONJ", "SYM", "VERB", "X"}
+
+UNIVERSAL_DEPRELS = {"acl", "advcl", "advmod", "amod", "appos", "aux", "case", "cc", "ccomp", "clf", "compound",
+                     "conj", "cop", "csubj", "dep", "det", "discourse", "dislocated", "expl", "fixed", "flat",
+                     "goeswith", "iobj", "list", "mark", "nmod", "nsubj", "nummod", "obj", "obl", "orphan",
+                     "parataxis", "punct", "reparandum", "root", "vocative", "xcomp"}
+
+KNOWN_GENRES = {"academic", "bible", "blog", "email", "fiction", "government", "grammar-examples",
+                "learner-essays", "legal", "medical", "news", "nonfiction", "poetry", "reviews", "social",
+                "spoken", "web", "wiki"}
+
+# "source of annotation" values in the README summary -> score factor
+SOURCE_FACTORS = {"manual native": 1.0, "converted with corrections": 0.9, "converted from manual": 0.9,
+                  "automatic with corrections": 0.5, "automatic": 0.1, "not available": 0.0}
+
+# weights of the score components (in 39ths, as in eval.log)
+WEIGHTS = {"features": 3, "genres": 3, "lemmas": 3, "size": 10, "split": 2, "tags": 3, "udapi": 12, "udeprels": 3}
+
+MAX_SIZE = math.log((1000000/1000)**2)  # 13.815511, reached at 1M words
+
+
+class Counts:
+    """Corpus statistics gathered in a single pass and shared by all metrics."""
+    def __init__(self):
+        self.words = Counter()  # split -> number of (syntactic) words
+        self.with_feats = 0
+        self.with_lemma = 0
+        self.upos = set()
+        self.udeprels = set()
+
+    def add_file(self, split, inF):
+        for ln in inF:
+            if not ln[:1].isdigit():
+                continue
+            cols = ln.split('\t', 8)
+            if '-' in cols[0] or '.' in cols[0]:    # multiword token or empty node
+                continue
+            self.words[split] += 1
+            if cols[5] != '_':
+                self.with_feats += 1
+            if cols[2] != '_':
+                self.with_lemma += 1
+            self.upos.add(cols[3])
+            self.udeprels.add(cols[7].split(':')[0])
+
+
+def read_readme(path):
+    """Return the machine-readable summary lines of the README (e.g. "Lemmas: ...") as a dict."""
+    summary = {}
+    with open(path, encoding='utf-8') as inF:
+        for ln in inF:
+            m = re.match(r'^([A-Z][A-Za-z ]+): (.+)$', ln.rstrip())
+            if m:
+                summary[m.group(1)] = m.group(2).strip()
+    return summary
+
+
+def read_eval_log(path):
+    """Values of the externally computed components from a previous upstream run."""
+    stubs = {}
+    try:
+        with open(path, encoding='utf-8') as inF:
+            for ln in inF:
+                if m := re.match(r'^Udapi: found (\d+) bugs\.', ln):
+                    stubs['udapi_bugs'] = int(m.group(1))
+                elif m := re.match(r'^Validity: ([\d.]+)', ln):
+                    stubs['validity'] = float(m.group(1))
+    except FileNotFoundError:
+        pass
+    return stubs
+
+
+def scores(counts, summary, udapi_bugs):
+    n = sum(counts.words.values())
+    s = {}
+    s['size'] = max(0.0, min(math.log((n/1000)**2), MAX_SIZE)) / MAX_SIZE if n else 0.0
+    if all(counts.words[split] >= 10000 for split in SPLITS):
+        s['split'] = 1.0
+    elif counts.words['test'] >= 10000:
+        s['split'] = 0.5
+    else:
+        s['split'] = 0.01
+    factor = lambda key: SOURCE_FACTORS.get(summary.get(key, "not available"), 0.0)
+    s['lemmas'] = factor("Lemmas") if counts.with_lemma else 0.0
+    s['tags'] = len(counts.upos & UPOS_TAGS) / len(UPOS_TAGS) * factor("UPOS")
+    s['features'] = factor("Features") if counts.with_feats else 0.0
+    s['udeprels'] = len(counts.udeprels & UNIVERSAL_DEPRELS) / len(UNIVERSAL_DEPRELS)
+    genres = set(summary.get("Genre", "").split())
+    s['genres'] = len(genres & KNOWN_GENRES) / len(KNOWN_GENRES)
+    s['udapi'] = max(0.0, 1 - udapi_bugs / (n/10)) if n else 0.0
+    return s
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    ap.add_argument('--prefix', default='en_ewt-ud', help='split files are PREFIX-{train,dev,test}.conllu(.gz|.zst)')
+    ap.add_argument('--readme', default='README.md')
+    ap.add_argument('--eval-log', default='eval.log', help='source of the stubbed udapi/validity values')
+    ap.add_argument('--udapi-bugs', type=int, help='number of bugs reported by udapy ud.MarkBugs (stub)')
+    ap.add_argument('--validity', type=float, help='1 if tools/validate.py passes on all splits, else 0 (stub)')
+    args = ap.parse_args()
+
+    counts = Counts()
+    for split in SPLITS:
+        with open_text(resolve(f'{args.prefix}-{split}.conllu')) as inF:
+            counts.add_file(split, inF)
+
+    summary = read_readme(args.readme)
+    stubs = read_eval_log(args.eval_log)
+    udapi_bugs = args.udapi_bugs if args.udapi_bugs is not None else stubs.get('udapi_bugs', 0)
+    validity = args.validity if args.validity is not None else stubs.get('validity', 1.0)
+    availability = 0.0 if summary.get("Data available since", "").lower() == "not available" else 1.0
+
+    n = sum(counts.words.values())
+    print(f"Size: counted {n} words (nodes): " + ", ".join(f"{split} {counts.words[split]}" for split in SPLITS))
+    print(f"Features: {counts.with_feats} out of {n} total words have one or more features.")
+    print(f"Universal POS tags: {len(counts.upos & UPOS_TAGS)} out of {len(UPOS_TAGS)} found in the corpus.")
+    print(f"Universal relations: {len(counts.udeprels & UNIVERSAL_DEPRELS)} out of {len(UNIVERSAL_DEPRELS)} found in the corpus.")
+    print(f"Udapi: {udapi_bugs} bugs" + (" (STUB: from --udapi-bugs)" if args.udapi_bugs is not None else f" (STUB: from {args.eval_log})"))
+    print(f"Validity: {validity:g}" + (" (STUB: from --validity)" if args.validity is not None else f" (STUB: from {args.eval_log})"))
+
+    total_weight = sum(WEIGHTS.values())
+    total = 0.0
+    for name, score in sorted(scores(counts, summary, udapi_bugs).items()):
+        w = WEIGHTS[name] / total_weight
+        total += w * score
+        print(f"(weight={w:.15g}) * (score{{{name}}}={score:.15g}) = {w*score:.15g}")
+    final = total * availability * validity
+    print(f"(TOTAL score={total:.15g}) * (availability={availability:g}) * (validity={validity:g}) = {final:.15g}")
+    stars = round(final * 10) / 2
+    print(f"STARS = {stars:g}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
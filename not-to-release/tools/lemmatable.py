@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Compact (form, XPOS) -> lemma table for lemmatizers, built from the gold
+corpus by `neaten.py --export-lemmas FILE` (majority lemma of each corrected,
+goeswith-merged form, as counted for the lemma consistency check).
+
+The file is a minimal perfect hash table that is used via mmap without
+loading it: a lookup hashes the key, reads one pilot value for the key's
+bucket and one slot, and compares the stored key, so it takes about a
+microsecond in CPython (little more than a dict lookup with the key built from
+the two strings) and touches only those pages.
+
+    from lemmatable import LemmaTable
+    with LemmaTable('en_ewt-lemmas.bin') as table:
+        table.get('running', 'VBG')     # 'run'; None for unseen (form, XPOS)
+
+Layout (little-endian): header (magic, number of keys n, number of buckets,
+hash seed), one uint32 pilot per bucket, n+1 uint32 record offsets, and the
+records `form TAB xpos NUL lemma` in slot order. A key's bucket is
+crc32(key) mod buckets, and its slot is (adler32(key) XOR pilot * PILOT_MIX)
+mod n, both seeded; the pilots are chosen by the builder so that every key
+gets its own slot (as in PTHash).
+
+$ python lemmatable.py --info en_ewt-lemmas.bin
+$ python lemmatable.py en_ewt-lemmas.bin running/VBG "'s/VBZ"
+
+Requires python3.6+
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from zlib import adler32, crc32
+
+MAGIC = b'LEMTAB1\n'
+HEADER = struct.Struct('<8sIII')    # magic, keys, buckets, seed
+BUCKET_SIZE = 4         # average number of keys per bucket
+PILOT_MIX = 0x9E3779B1
+MAX_PILOT = 1 << 20     # give up on a seed if a bucket needs more tries
+
+
+def record_key(form, xpos):
+    return (form + '\t' + xpos).encode('utf-8')
+
+
+def slot_of(h, pilot, n):
+    return ((h ^ (pilot * PILOT_MIX)) & 0xFFFFFFFF) % n
+
+
+def build(keys, seed):
+    """Pilots (one per bucket) and slots (key index per slot) for the encoded keys, or None if the seed fails."""
+    n = len(keys)
+    nbuckets = max(1, (n + BUCKET_SIZE - 1) // BUCKET_SIZE)
+    buckets = [[] for _ in range(nbuckets)]
+    for k, key in enumerate(keys):
+        buckets[crc32(key, seed) % nbuckets].append((adler32(key, seed), k))
+    pilots = array('I', bytes(4 * nbuckets))
+    slots = [None] * n
+    for b in sorted(range(nbuckets), key=lambda b: -len(buckets[b])):   # largest buckets first
+        entries = buckets[b]
+        if not entries:
+            break
+        if len({h for h, _ in entries}) < len(entries):
+            return None     # two keys of the bucket have the same hash: no pilot separates them
+        for pilot in range(MAX_PILOT):
+            positions = [slot_of(h, pilot, n) for h, _ in entries]
+            if len(set(positions)) == len(positions) and all(slots[p] is None for p in positions):
+                break
+        else:
+            return None
+        pilots[b] = pilot
+        for p, (_, k) in zip(positions, entries):
+            slots[p] = k
+    return pilots, slots
+
+
+def write_table(path, table):
+    """Write a {(form, xpos): lemma} mapping as a table file, replacing `path` atomically."""
+    items = sorted(table.items())
+    keys = [record_key(form, xpos) for (form, xpos), _ in items]
+    for seed in range(1, 1000):
+        result = build(keys, seed)
+        if result is not None:
+            break
+    else:
+        raise ValueError('could not build a perfect hash for the lemma table')
+    pilots, slots = result
+    offsets = array('I', [0])
+    heap = bytearray()
+    for k in slots:
+        heap += keys[k] + b'\0' + items[k][1].encode('utf-8')
+        offsets.append(len(heap))
+    if sys.byteorder != 'little':
+        pilots.byteswap()
+        offsets.byteswap()
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as outF:
+            outF.write(HEADER.pack(MAGIC, len(keys), len(pilots), seed))
+            outF.write(pilots.tobytes())
+            outF.write(offsets.tobytes())
+            outF.write(heap)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o666 & ~umask)   # (mkstemp creates the file private)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class LemmaTable:
+    """Read-only view of a table file (see write_table). Safe to share between threads."""
+    def __init__(self, path):
+        with open(path, 'rb') as inF:
+            self.mm = mmap.mmap(inF.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, self.nbuckets, self.seed = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError(f'{path}: not a lemma table')
+        start = HEADER.size
+        self.pilots = self._uint32s(start, self.nbuckets)
+        start += 4 * self.nbuckets
+        self.offsets = self._uint32s(start, self.n + 1)
+        self.heap = start + 4 * (self.n + 1)
+
+    def _uint32s(self, start, count):
+        view = memoryview(self.mm)[start:start + 4 * count]
+        if sys.byteorder == 'little':
+            return view.cast('I')
+        values = array('I', view)   # (a copy, byte-swapped)
+        values.byteswap()
+        return values
+
+    def get(self, form, xpos, default=None):
+        if not self.n:
+            return default
+        key = (form + '\t' + xpos).encode('utf-8')
+        slot = ((adler32(key, self.seed) ^ (self.pilots[crc32(key, self.seed) % self.nbuckets] * PILOT_MIX)) & 0xFFFFFFFF) % self.n
+        heap = self.heap
+        stored, _, lemma = self.mm[heap + self.offsets[slot]:heap + self.offsets[slot + 1]].partition(b'\0')
+        if stored != key:
+            return default
+        return lemma.decode('utf-8')
+
+    def __contains__(self, key):
+        return self.get(*key) is not None
+
+    def __len__(self):
+        return self.n
+
+    def items(self):
+        """((form, xpos), lemma) in slot order."""
+        for slot in range(self.n):
+            record = self.mm[self.heap + self.offsets[slot]:self.heap + self.offsets[slot + 1]].decode('utf-8')
+            key, _, lemma = record.partition('\0')
+            form, _, xpos = key.partition('\t')
+            yield (form, xpos), lemma
+
+    def close(self):
+        self.pilots = self.offsets = None    # release the exported buffers before the mmap
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Look up (form, XPOS) pairs in a lemma table written by neaten.py --export-lemmas.')
+    ap.add_argument('table', help='table file')
+    ap.add_argument('words', nargs='*', metavar='FORM/XPOS', help='words to look up')
+    ap.add_argument('--info', action='store_true', help='print the number of entries and the file size')
+    args = ap.parse_args()
+    with LemmaTable(args.table) as table:
+        if args.info:
+            print(f'{args.table}: {len(table)} entries, {table.nbuckets} buckets, {os.path.getsize(args.table)} bytes')
+        status = 0
+        for word in args.words:
+            form, _, xpos = word.rpartition('/')
+            lemma = table.get(form, xpos)
+            if lemma is None:
+                status = 1
+            print(word + '\t' + (lemma if lemma is not None else '_'))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
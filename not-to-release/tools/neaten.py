@@ -12,103 +12,812 @@ To get an overview of the distribution of error types:
 
 $ python neaten.py | sort | cut -c1-30 | uniq -c
 
+To use several CPUs (large files such as train are split at document boundaries):
+
+$ python neaten.py -j 8
+
+For a quick check of a stratified sample of the source documents (always
+including changed files), with estimated warning rates per rule:
+
+$ python neaten.py --sample 0.1
+
+To validate in-process (e.g. from a service), use the Validator class.
+
 @author: Nathan Schneider
 @since: 2022-09-10
 """
 
-from typing import Dict, List, Tuple, Literal
-from collections import defaultdict, Counter
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, Literal
+from collections import defaultdict, Counter, OrderedDict, deque
+from types import MappingProxyType
+from fnmatch import fnmatchcase
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import argparse
+import contextvars
 import glob
+import hashlib
+import io
+import multiprocessing
+import os
 import re
 import sys
+import threading
+import time
 import traceback
 import conllu
+from compressed import compression, read_text, strip_suffix, write_text
+from lemmatable import write_table
+from parsecache import ParseCache
+from progress import Progress
+from sampling import Sample, changed_files, population
+from shard import documents
 
 NNS_warnings = Counter()
 
+PREFETCH_DEPTH = 8  # max. number of input files read ahead of the parser
+SIGNATURE_CACHE_SIZE = 4096 # max. number of token signatures whose warnings are memoized (see SignatureCache)
+
+report = print  # destination of validator messages (see WarningBaseline)
+
+fix = None  # receives deterministic repairs from propose_fix if --fix is given (see Fixes)
+
+parse_cache = ParseCache()  # parsed input files (None: always parse)
+
+def parse_text(data):
+    """The sentences of a CoNLL-U file's content, via the parse cache."""
+    if parse_cache is None:
+        return conllu.parse_incr(io.StringIO(data))
+    return parse_cache.parse_incr(data)
+
+class Sinks(NamedTuple):
+    """Destinations of the output of a validation run (see Validator)."""
+    report: Callable[[str],None]
+    fix: Optional[Callable]
+    nns_lemmas: Counter
+
+# Sinks of the run in the current thread/context; None: the module globals above (script use)
+SINKS: contextvars.ContextVar = contextvars.ContextVar('neaten_sinks', default=None)
+
+def current_sinks():
+    sinks = SINKS.get()
+    return Sinks(report, fix, NNS_warnings) if sinks is None else sinks
+
+def warn(msg):
+    """Report one validator message (a warning, possibly spanning several lines)."""
+    current_sinks().report(msg)
+
+def propose_fix(rule, docname, id, feature, value):
+    """
+    Offer the one correct repair for a warning: FEATS `feature` of word `id` in sentence `docname`
+    should be `value` (None: absent). Only checks whose warning admits no other repair call this.
+    """
+    sink = current_sinks().fix
+    if sink is not None:
+        sink(rule, docname, id, feature, value)
+
+def nodeStr(node):
+    """Format a conllu token id (int or tuple) as in the ID column, e.g. 8.1"""
+    return ''.join(map(str, node)) if isinstance(node, tuple) else str(node)
+
 def isRegularNode(line):
     idS = str(line['id'])
     return not ('-' in idS or '.' in idS)
 
-def validate_src(infiles):
-    tok_count = 0
-    lemma_dict = defaultdict(lambda : defaultdict(int))  # collects tok+pos -> lemmas -> count  for consistency checks
-    lemma_docs = defaultdict(set)
+EMPTY = MappingProxyType({})
 
-    for inFP in infiles:
-        with open(inFP) as inF:
-            doc = None
-            for tree in conllu.parse_incr(inF):
-                if 'newdoc id' in tree.metadata:
-                    doc = tree.metadata['newdoc id']
-                tree.metadata['docname'] = doc
-                tree.metadata['filename'] = ('/'+inFP).rsplit('/',1)[1] # prefix slash so it runs on GUM
-
-                sentid = tree.metadata['sent_id']
-                prev_line = prev_key = None
-                for line in tree:
-                    """ `dict(line)` e.g.:
-                    {'id': 1, 'form': 'What', 'lemma': 'what', 'upos': 'PRON',
-                    'xpos': 'WP', 'feats': {'PronType': 'Int'}, 'head': 0,
-                    'deprel': 'root', 'deps': [('root', 0)], 'misc': None}
-                    `line` is of type dict_items
-                    """
-                    if not isRegularNode(line):    # avoid e.g. ellipsis node
-                        continue
-                    tok_count += 1
-                    form, xpos, lemma = line['form'], line['xpos'], line['lemma']
-                    # for lemma error-checking purposes, uses the corrected form of the token if there is one
-                    tok = (line.get('misc') or {}).get('CorrectForm') or form   # in GUM, some explicit CorrectForm=_ which parses as None
-
-                    # goeswith
-                    if line['deprel']=='goeswith' and prev_line:
-                        # copy substantive UPOS, feats from the preceding token
-                        line['upos'] = prev_line['upos']
-                        line['feats'] = dict(prev_line['feats'])
-                        if 'Typo' in line['feats']:
-                            del line['feats']['Typo']
-
-                    if line['deprel']=='goeswith' and prev_line and prev_line['deprel']!="goeswith":
-                        # undo previous count as it has a partial form string
-                        lemma_dict[prev_key][prev_line["lemma"]] -= 1
-
-                        prev_line['merged'] = True # Typo fixed via goeswith deprel.
-                        prev_line['form'] += line['form']
-                        ptok = (prev_line.get('misc') or {}).get('CorrectForm') or prev_line['form']    # in GUM, some explicit CorrectForm=_ which parses as None
-                        lemma_dict[ptok,prev_line['xpos']][prev_line["lemma"]] += 1
-                        lemma_docs[ptok,prev_line['xpos'],prev_line["lemma"]].add(sentid)
-                    else:
-                        assert prev_line or line['deprel']!='goeswith'
-                        lemma_dict[(tok,xpos)][lemma] += 1
-                        lemma_docs[(tok,xpos,lemma)].add(sentid)
+class FeatureBits:
+    """
+    Registry that interns FEATS attribute=value pairs as bits of an int, so that a token's
+    features are one integer (see Feats) and feature checks are bitwise operations. Every
+    feature also gets a presence bit, set along with any of its values, so tests for the
+    presence or absence of a feature do not depend on which values have been seen so far.
+    The bitset of a feature set determines its pairs, so it also interns the Feats views:
+    all tokens with the same FEATS share one (see view).
+    """
+    def __init__(self):
+        self.bits: Dict[Tuple[str,str],int] = {}    # (feature, value) -> value bit | presence bit
+        self.presence: Dict[str,int] = {}
+        self.views: Dict[int,'Feats'] = {}          # bits -> shared view
+        self.lock = threading.RLock()   # for registering new bits
+
+    def _next(self):
+        return 1 << (len(self.bits) + len(self.presence))
+
+    def feature(self, name):
+        bit = self.presence.get(name)
+        if bit is None:
+            with self.lock:
+                bit = self.presence.get(name) or self.presence.setdefault(name, self._next())
+        return bit
+
+    def features(self, *names):
+        """Presence bits of the named features."""
+        mask = 0
+        for name in names:
+            mask |= self.feature(name)
+        return mask
+
+    def value(self, name, value):
+        """Bit of feature=value, together with the feature's presence bit."""
+        bits = self.bits.get((name, value))
+        if bits is None:
+            with self.lock:
+                presence = self.feature(name)
+                bits = self.bits.get((name, value)) or self.bits.setdefault((name, value), self._next() | presence)
+        return bits
+
+    def encode(self, feats):
+        bits = 0
+        for item in feats.items():
+            b = self.bits.get(item)
+            bits |= b if b is not None else self.value(*item)
+        return bits
+
+    def view(self, feats):
+        """The shared Feats for a FEATS dict (one per distinct feature set, so nothing is stored per token)."""
+        bits = self.encode(feats)
+        shared = self.views.get(bits)
+        if shared is None:
+            with self.lock:
+                shared = self.views.setdefault(bits, Feats(dict(feats), bits))
+        return shared
+
+FEATURE_BITS = FeatureBits()
+
+class Feats(Mapping):
+    """
+    Read-only FEATS with their encoding in `bits` (see FeatureBits). Obtained via
+    FEATURE_BITS.view, which returns the same instance for equal feature sets.
+    """
+    __slots__ = ('feats', 'bits')
+
+    def __init__(self, feats, bits):
+        self.feats = feats
+        self.bits = bits
+
+    def __getitem__(self, key):
+        return self.feats[key]
+
+    def __contains__(self, key):
+        return key in self.feats
 
-                    prev_line = line
-                    prev_key = (tok,xpos)
+    def get(self, key, default=None):
+        return self.feats.get(key, default)
 
-                line2 = None
-                for line1 in tree[::-1]: # go backwards to propagate from last token of goeswith expression
-                    if not isRegularNode(line1):    # avoid e.g. ellipsis node
-                        continue
-                    if line2 and line2['deprel']=='goeswith' and line1['xpos'] in ["AFX", "GW"]:
-                            # copy substantive XPOS to the preceding token
-                            line1['xpos'] = line2['xpos']
-                    line2 = line1
+    def __iter__(self):
+        return iter(self.feats)
 
-                validate_annos(tree)
+    def __len__(self):
+        return len(self.feats)
+
+NO_FEATS = FEATURE_BITS.view({})
+
+class MaskedFeats(Mapping):
+    """Read-only view of a FEATS dict (or Feats) that hides some keys, without copying the dict."""
+    __slots__ = ('base', 'masked', 'bits')
+
+    def __init__(self, base, masked):
+        self.base = base
+        self.masked = masked
+        self.bits = getattr(base, 'bits', None)
+        if self.bits is None:
+            self.bits = FEATURE_BITS.encode(base)
+        for key in masked:
+            if key in base:
+                self.bits &= ~FEATURE_BITS.value(key, base[key])
+
+    def __getitem__(self, key):
+        if key in self.masked:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __contains__(self, key):
+        return key not in self.masked and key in self.base
+
+    def get(self, key, default=None):
+        return default if key in self.masked else self.base.get(key, default)
+
+    def __iter__(self):
+        return (key for key in self.base if key not in self.masked)
+
+    def __len__(self):
+        return sum(1 for key in self.base if key not in self.masked)
+
+class Token(NamedTuple):
+    """
+    Normalized, read-only view of one line of a parsed sentence (see normalize_tree).
+    The parsed line itself, e.g.
+        {'id': 1, 'form': 'What', 'lemma': 'what', 'upos': 'PRON',
+        'xpos': 'WP', 'feats': {'PronType': 'Int'}, 'head': 0,
+        'deprel': 'root', 'deps': [('root', 0)], 'misc': None}
+    remains available as `line` and is never modified.
+    """
+    line: dict
+    regular: bool   # False for multiword token ranges and empty nodes
+    id: object
+    form: str       # for the first part of a word split by goeswith: the merged form
+    tok: str        # effective form: CorrectForm if present, else `form`
+    lemma: str
+    upos: str       # goeswith continuations: UPOS of the first part
+    xpos: str       # AFX/GW parts followed by goeswith: XPOS of the last part
+    feats: Mapping  # Feats or MaskedFeats; goeswith continuations: FEATS of the first part minus Typo
+    head: object
+    deprel: str
+    deps: list
+    misc: Mapping   # never None
+    merged: bool    # whether `form` was merged with goeswith continuations (Typo fixed via goeswith)
+
+def normalize_tree(tree) -> List[Token]:
+    """
+    Resolve once per sentence the effective form, the form merged across goeswith,
+    and the UPOS/XPOS/FEATS propagated across goeswith, for all lines of the tree.
+    """
+    regular = [isRegularNode(line) for line in tree]
+    forms = [line['form'] for line in tree]
+    upos = [line['upos'] for line in tree]
+    xpos = [line['xpos'] for line in tree]
+    feats = [FEATURE_BITS.view(line['feats']) if line['feats'] else NO_FEATS for line in tree]
+    merged = [False] * len(tree)
+
+    prev = None
+    for i, line in enumerate(tree):
+        if not regular[i]:  # avoid e.g. ellipsis node
+            continue
+        if line['deprel'] == 'goeswith' and prev is not None:
+            # copy substantive UPOS, feats from the preceding token
+            upos[i] = upos[prev]
+            base = feats[prev].base if isinstance(feats[prev], MaskedFeats) else feats[prev]
+            feats[i] = MaskedFeats(base, ('Typo',))
+            if tree[prev]['deprel'] != 'goeswith':
+                forms[prev] += forms[i]
+                merged[prev] = True
+        prev = i
+
+    nxt = None
+    for i in reversed(range(len(tree))):    # go backwards to propagate from last token of goeswith expression
+        if not regular[i]:
+            continue
+        if nxt is not None and tree[nxt]['deprel'] == 'goeswith' and xpos[i] in ("AFX", "GW"):
+            # copy substantive XPOS to the preceding token
+            xpos[i] = xpos[nxt]
+        nxt = i
+
+    tokens = []
+    for i, line in enumerate(tree):
+        misc = MappingProxyType(line['misc']) if line['misc'] else EMPTY
+        tokens.append(Token(line, regular[i], line['id'], forms[i],
+                            misc.get('CorrectForm') or forms[i],  # in GUM, some explicit CorrectForm=_ which parses as None
+                            line['lemma'], upos[i], xpos[i], feats[i], line['head'], line['deprel'], line['deps'],
+                            misc, merged[i]))
+    return tokens
+
+class NgramMatcher:
+    """
+    Trie of token n-gram patterns, run once per sentence. Each pattern position tests one
+    (field, word, XPOS) symbol, where field is 'form' (the lowercased effective form) or
+    'lemma', and word and XPOS may be '*'. Stepping through a token costs a few dict lookups
+    per partial match in progress, independent of the number of patterns.
+    """
+    WILDCARD = '*'
+
+    def __init__(self, patterns):
+        self.root = {}   # (field, word, xpos) -> child node; node[None] = names of patterns ending there
+        for name, symbols in patterns:
+            node = self.root
+            for symbol in symbols:
+                node = node.setdefault(tuple(symbol), {})
+            node.setdefault(None, []).append(name)
+        self.fields = {}    # id(node) -> fields tested on the edges out of node
+        def index(node):
+            self.fields[id(node)] = {key[0] for key in node if key is not None}
+            for key, child in node.items():
+                if key is not None:
+                    index(child)
+        index(self.root)
+
+    def run(self, tokens) -> Dict[int,List[str]]:
+        """Map the (0-based) position of each regular token to the names of the patterns ending there."""
+        events = {}
+        active = []
+        W = self.WILDCARD
+        for k, t in enumerate(tokens):
+            symbol = {'form': t.tok.lower(), 'lemma': t.lemma}
+            xpos = t.xpos
+            advanced = []
+            for node in active + [self.root]:
+                for field in self.fields[id(node)]:
+                    word = symbol[field]
+                    for key in ((field, word, xpos), (field, word, W), (field, W, xpos), (field, W, W)):
+                        child = node.get(key)
+                        if child is not None:
+                            advanced.append(child)
+                            if None in child:
+                                events.setdefault(k, []).extend(child[None])
+            active = advanced
+        return events
+
+class EnhancedGraph:
+    """
+    Index of a sentence's enhanced dependency graph (DEPS column), built once per sentence.
+
+    Nodes are token ids as parsed by conllu (ints, or tuples like (8, '.', 1) for
+    empty nodes); 0 is the root. Edges are indexed in both directions, and every
+    edge is also indexed under each colon-prefix of its relation, so that e.g.
+    `has(5, 3, "obl")` is true for an edge 3 -obl:in-> 5.
+    """
+    def __init__(self, tree):
+        self.nodes = []
+        self.heads: Dict[object,List[Tuple[str,object]]] = defaultdict(list)        # node -> [(rel, head)]
+        self.dependents: Dict[object,List[Tuple[str,object]]] = defaultdict(list)   # head -> [(rel, node)]
+        self.edges = set()  # (node, head, rel prefix)
+        for line in tree:
+            node = line['id']
+            if isinstance(node, tuple) and node[1] == '-':  # multiword token
+                continue
+            self.nodes.append(node)
+            for rel, head in line['deps'] or ():
+                self.heads[node].append((rel, head))
+                self.dependents[head].append((rel, node))
+                prefix = ''
+                for part in rel.split(':'):
+                    prefix += part
+                    self.edges.add((node, head, prefix))
+                    prefix += ':'
+
+    def has(self, node, head, rel):
+        """Is there an edge head -> node whose relation is `rel` or a subtype of `rel`?"""
+        return (node, head, rel) in self.edges
+
+    def is_ref(self, node):
+        """Is the node's first enhanced relation `ref`?"""
+        heads = self.heads.get(node)
+        return bool(heads) and heads[0][0] == "ref"
+
+    def missing(self, basic_edges):
+        """Basic edges (node, head, deprel) that have no counterpart in the enhanced graph."""
+        return basic_edges - self.edges
+
+    def unreachable(self):
+        """
+        Nodes that cannot be reached from the root by following enhanced edges. Nodes without
+        any enhanced head (e.g. DEPS `_`) are left to the basic-vs-enhanced check (missing).
+        """
+        seen = {0}
+        queue = [0]
+        for head in queue:
+            for _, node in self.dependents.get(head, ()):
+                if node not in seen:
+                    seen.add(node)
+                    queue.append(node)
+        return [node for node in self.nodes if node not in seen and self.heads.get(node)]
+
+    def unpaired_refs(self):
+        """`ref` edges (node, antecedent) whose antecedent heads no :relcl clause in the enhanced graph."""
+        relcl_heads = {head for head, deps in self.dependents.items()
+                       if any(rel.startswith(("acl:relcl", "advcl:relcl")) for rel, _ in deps)}
+        return [(node, head) for head, deps in self.dependents.items() if head not in relcl_heads
+                for rel, node in deps if rel == "ref"]
+
+def read_ahead(infiles, depth=PREFETCH_DEPTH):
+    """
+    Yield (path, text) for each input file in order. A small thread pool reads,
+    decompresses (.gz, .zst) and decodes up to `depth` upcoming files while the caller
+    parses and validates the current one, which hides file system latency (e.g. on
+    network mounts) and decompression time.
+    """
+    infiles = iter(infiles)
+    with ThreadPoolExecutor(max_workers=min(depth, 4)) as pool:
+        pending = deque((inFP, pool.submit(read_text, inFP)) for _, inFP in zip(range(depth), infiles))
+        while pending:
+            inFP, future = pending.popleft()
+            data = future.result()
+            nextFP = next(infiles, None)    # refill the queue before handing over the current file
+            if nextFP is not None:
+                pending.append((nextFP, pool.submit(read_text, nextFP)))
+            yield inFP, data
+
+def lemma_keys(tokens):
+    """
+    Yield (line index, form, XPOS, lemma) for each word of a normalized sentence that counts
+    towards the corpus-wide lemma consistency check (see validate_lemmas). The form is the
+    corrected form if there is one, and the merged form for words split by goeswith.
+    """
+    prev = None
+    for i, t in enumerate(tokens):
+        if not t.regular:   # avoid e.g. ellipsis node
+            continue
+        if t.deprel=='goeswith':
+            assert prev is not None
+            if prev.deprel!='goeswith':
+                prev = t
+                continue    # counted as part of the merged form of the preceding token
+        # (the XPOS as annotated, not as propagated across goeswith)
+        yield i, t.tok, t.line['xpos'], t.lemma
+        prev = t
+
+def validate_src(infiles, progress=None, jobs=1):
+    if progress is not None:
+        infiles = list(infiles)
+        progress.total = sum(os.path.getsize(inFP) for inFP in infiles)
+    return validate_texts(read_ahead(infiles), progress, jobs)
+
+def validate_texts(texts, progress=None, jobs=1):
+    """
+    Validate CoNLL-U documents given as (path, text) pairs, e.g. from read_ahead, or from
+    build.py --validate, which streams the source files into the splits and validates them
+    in the same pass. The path is only used to name the file in messages.
+    `progress`: a progress.Progress meter (with the total size of the files for an ETA).
+    `jobs` > 1: validate in that many worker processes (see validate_in_workers).
+    Returns the lemma counts of all files, {(form, xpos): {lemma: count}} (see majority_lemmas).
+    """
+    lemma_dict = defaultdict(lambda : defaultdict(int))  # collects tok+pos -> lemmas -> count  for consistency checks
+    lemma_docs = defaultdict(set)
 
-    validate_lemmas(lemma_dict,lemma_docs)
+    if jobs > 1:
+        validated = validate_in_workers(texts, jobs, lemma_dict, lemma_docs, progress)
+    else:
+        validated = validate_in_process(texts, lemma_dict, lemma_docs, progress)
+    for inFP, data in validated:
+        if fix is not None:
+            fix.apply(inFP, data)
+        if progress is not None:
+            progress.end_file()
+
+    if progress is not None:
+        progress.close()
+    suspicious_types = validate_lemmas(lemma_dict,lemma_docs)
+    if suspicious_types > 0:
+        sys.stderr.write("! "+str(suspicious_types) + " suspicious lemma types detected\n")
     if NNS_warnings:
         sys.stderr.write("!suspicious NNS lemmas: "+' '.join(k for k,v in NNS_warnings.most_common()) + '\n')
-    sys.stdout.write("\r" + " "*70)
+    return lemma_dict
+
+def validate_in_process(texts, lemma_dict, lemma_docs, progress=None):
+    """Validate the files one after the other; yields each (path, text) once it has been validated."""
+    for inFP, data in texts:
+        if progress is not None:
+            progress.start_file(inFP, os.path.getsize(inFP) if progress.total else 0, data.count('\n\n'))
+        validate_text(inFP, data, lemma_dict, lemma_docs, progress)
+        yield inFP, data
+
+def validate_text(inFP, data, lemma_dict, lemma_docs, progress=None):
+    """
+    Validate the sentences of one file, or of a part of it that starts at a document boundary.
+    Returns the number of sentences, tokens and documents.
+    """
+    filename = ('/'+strip_suffix(inFP)).rsplit('/',1)[1] # prefix slash so it runs on GUM
+    doc = None
+    sequence = DocumentSequence()
+    sentences = tokens = docs = 0
+    for tree in parse_text(data):
+        newdoc = 'newdoc id' in tree.metadata
+        if newdoc:
+            doc = tree.metadata['newdoc id']
+        tree.metadata['docname'] = doc
+        tree.metadata['filename'] = filename
+
+        sequence.check(tree)
+        validate_tree(tree, lemma_dict, lemma_docs)
+        sentences += 1
+        tokens += len(tree)
+        docs += newdoc
+        if progress is not None:
+            progress.sentence(len(tree), newdoc)
+    return sentences, tokens, docs
+
+CHUNK_BYTES = 1 << 19   # target size of the parts of a file validated by one worker (see split_documents)
+
+def split_documents(data, size=CHUNK_BYTES):
+    """
+    Cut a CoNLL-U text into consecutive parts of at least `size` characters (except the last),
+    each starting at a `# newdoc id` comment, so that no document (and no goeswith span or
+    other document context) is divided. The cuts do not depend on the number of workers.
+    """
+    parts, part, length = [], [], 0
+    for doc in documents(data):
+        if length >= size:
+            parts.append(''.join(part))
+            part, length = [], 0
+        part.append(doc)
+        length += len(doc)
+    if part:
+        parts.append(''.join(part))
+    return parts
+
+class ChunkResult(NamedTuple):
+    """The output of validate_chunk for one part of a file, to be merged in order."""
+    messages: List[str]
+    fixes: List[tuple]          # arguments of propose_fix
+    nns_lemmas: Counter
+    lemma_dict: Dict[tuple,Dict[str,int]]
+    lemma_docs: Dict[tuple,set]
+    sentences: int
+    tokens: int
+    docs: int
+
+def init_worker(signature_cache_size, use_parse_cache):
+    """Configure a worker process like the parent (which may have been started with other options)."""
+    global parse_cache
+    for cache in (cached_feats_warnings, cached_pronoun_warnings, cached_reciprocal_warnings):
+        cache.maxsize = signature_cache_size
+    if not use_parse_cache:
+        parse_cache = None
+
+def validate_chunk(inFP, data, collect_fixes):
+    """Validate one part of a file in a worker process, collecting the output instead of reporting it."""
+    messages, fixes = [], []
+    sinks = Sinks(messages.append, (lambda *proposal: fixes.append(proposal)) if collect_fixes else None, Counter())
+    lemma_dict = defaultdict(lambda : defaultdict(int))
+    lemma_docs = defaultdict(set)
+    token = SINKS.set(sinks)
+    try:
+        counts = validate_text(inFP, data, lemma_dict, lemma_docs)
+    finally:
+        SINKS.reset(token)
+    return ChunkResult(messages, fixes, sinks.nns_lemmas, {k: dict(v) for k, v in lemma_dict.items()}, dict(lemma_docs), *counts)
+
+def validate_in_workers(texts, jobs, lemma_dict, lemma_docs, progress=None):
+    """
+    Validate the files in `jobs` processes, each file split into document-aligned parts
+    (split_documents) so that a single large file (train) is spread over all of them.
+    The results are merged strictly in input order: messages are reported, fixes proposed
+    and lemmas counted exactly as by a sequential run, so the output is the same.
+    Yields each (path, text) once all of its parts have been merged.
+    """
+    sinks = current_sinks()
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker,
+                             initargs=(cached_feats_warnings.maxsize, parse_cache is not None)) as pool:
+        texts = iter(texts)
+        pending = deque()   # (path, text, futures of its parts), in input order
+        queued = 0          # parts submitted and not yet merged
+        while True:
+            while queued < 2 * jobs:    # keep all workers busy while the oldest part is merged
+                inFP, data = next(texts, (None, None))
+                if inFP is None:
+                    break
+                futures = [pool.submit(validate_chunk, inFP, part, sinks.fix is not None) for part in split_documents(data)]
+                pending.append((inFP, data, futures))
+                queued += len(futures)
+            if not pending:
+                break
+            inFP, data, futures = pending.popleft()
+            if progress is not None:
+                progress.start_file(inFP, os.path.getsize(inFP) if progress.total else 0, data.count('\n\n'))
+            for future in futures:
+                result = future.result()
+                for msg in result.messages:
+                    sinks.report(msg)
+                if sinks.fix is not None:
+                    for proposal in result.fixes:
+                        sinks.fix(*proposal)
+                sinks.nns_lemmas.update(result.nns_lemmas)
+                for key, lemmas in result.lemma_dict.items():
+                    counts = lemma_dict[key]
+                    for lemma, n in lemmas.items():
+                        counts[lemma] += n
+                for key, docs in result.lemma_docs.items():
+                    lemma_docs[key] |= docs
+                if progress is not None:
+                    progress.advance(result.sentences, result.tokens, result.docs)
+                queued -= 1
+            yield inFP, data
+
+def validate_tree(tree, lemma_dict, lemma_docs):
+    """Validate one sentence (with 'filename' in its metadata), adding its lemmas to the corpus-wide counts."""
+    sentid = tree.metadata['sent_id']
+    sound = validate_structure(tree)
+    validate_surface(tree)
+    tokens = normalize_tree(tree)
+    for _, tok, xpos, lemma in lemma_keys(tokens):
+        lemma_dict[(tok,xpos)][lemma] += 1
+        lemma_docs[(tok,xpos,lemma)].add(sentid)
+
+    if sound:
+        validate_annos(tree, tokens)
+
+def validate_structure(tree):
+    """
+    Structural checks on the parsed tree, in the spirit of the general UD validator:
+    word ids, multiword token ranges, empty nodes, head range, single root, acyclicity,
+    and gaps in `fixed` expressions. Each check is a linear pass over the sentence.
+
+    Returns False if the basic tree is malformed (so rule-based validation should be skipped).
+    """
+    docname = tree.metadata['sent_id']
+    words = [line for line in tree if isinstance(line['id'], int)]
+    n = len(words)
+    sound = True
+
+    for i, line in enumerate(words, start=1):
+        if line['id'] != i:
+            warn("WARN: word id " + str(line['id']) + " out of sequence (expected " + str(i) + ") in " + docname)
+            return False
+
+    mwt_end = 0
+    for line in tree:
+        node = line['id']
+        if not isinstance(node, tuple):
+            continue
+        if node[1] == '-':
+            start, _, end = node
+            if not (mwt_end < start < end <= n):
+                warn("WARN: invalid multiword token range " + nodeStr(node) + " in " + docname)
+            mwt_end = max(mwt_end, end)
+            if line['head'] is not None or line['deprel'] not in ('_', None) or line['deps'] is not None:
+                warn("WARN: multiword token " + nodeStr(node) + " should have HEAD, DEPREL and DEPS '_' in " + docname)
+        else:   # empty node
+            if not (0 <= node[0] <= n):
+                warn("WARN: empty node " + nodeStr(node) + " out of range in " + docname)
+            if line['head'] is not None or line['deprel'] not in ('_', None):
+                warn("WARN: empty node " + nodeStr(node) + " should have HEAD and DEPREL '_' in " + docname)
+            if not line['deps']:
+                warn("WARN: empty node " + nodeStr(node) + " lacks enhanced dependencies in " + docname)
+
+    heads = [None] * (n + 1)    # index 0 stands for the root
+    roots = []
+    for line in words:
+        head, deprel = line['head'], line['deprel']
+        if not isinstance(head, int) or not (0 <= head <= n) or head == line['id']:
+            warn("WARN: invalid head '" + str(head) + "' @ token " + str(line['id']) + " in " + docname)
+            sound = False
+            continue
+        heads[line['id']] = head
+        if head == 0:
+            roots.append(line['id'])
+        if (head == 0) != (deprel == "root"):
+            warn("WARN: HEAD " + str(head) + " inconsistent with DEPREL " + str(deprel) + " @ token " + str(line['id']) + " in " + docname)
+    if len(roots) != 1:
+        warn("WARN: sentence has " + str(len(roots)) + " root nodes in " + docname)
+        sound = False
+    if not sound:
+        return False
+
+    # acyclicity: follow head links from each word, marking words whose path to the root is known
+    state = [0] * (n + 1)   # 0 = unvisited, 1 = on current path, 2 = reaches the root
+    state[0] = 2
+    for i in range(1, n + 1):
+        path = []
+        j = i
+        while state[j] == 0:
+            state[j] = 1
+            path.append(j)
+            j = heads[j]
+        if state[j] == 1:
+            warn("WARN: cycle through token " + str(j) + " in " + docname)
+            return False
+        for j in path:
+            state[j] = 2
+
+    # fixed expressions should be contiguous (punctuation may intervene)
+    fixed_children = defaultdict(list)
+    for line in words:
+        if line['deprel'] == "fixed":
+            fixed_children[line['head']].append(line['id'])
+    for head, children in fixed_children.items():
+        fxlist = sorted([head] + children)
+        fxrange = range(fxlist[0], fxlist[-1] + 1)
+        members = set(fxlist)
+        if any(j not in members and words[j-1]['deprel'] != "punct" for j in fxrange):
+            fxexpr = ' '.join(words[j-1]['form'] if j in members else '*' for j in fxrange)
+            warn("WARN: Gaps in fixed expression " + str(fxlist) + " '" + fxexpr + "' in " + docname)
+
+    return True
+
+MISC_SPACE_ESCAPES = {'\\s': ' ', '\\t': '\t', '\\n': '\n', '\\r': '\r', '\\p': '|', '\\\\': '\\'}
+MISC_SPACE_ESCAPE_RE = re.compile(r"\\[stnrp\\]|\\u[0-9A-Fa-f]{4}")   # e.g. SpacesAfter=\u00A0 (no-break space)
+
+def space_after(line):
+    """The whitespace following a token in the sentence text, according to its MISC column."""
+    misc = line['misc'] or EMPTY
+    if 'SpacesAfter' in misc:
+        return MISC_SPACE_ESCAPE_RE.sub(lambda m: MISC_SPACE_ESCAPES.get(m.group()) or chr(int(m.group()[2:], 16)),
+                                         misc['SpacesAfter'] or '')
+    return '' if misc.get('SpaceAfter') == 'No' else ' '
+
+def validate_surface(tree):
+    """
+    Check in one pass over the lines that the token forms, joined as specified by SpaceAfter=No
+    (or SpacesAfter), reproduce the `# text` comment, and that the form of each multiword token
+    is the concatenation of the forms of its words (which should not carry SpaceAfter themselves).
+    """
+    docname = tree.metadata['sent_id']
+    parts = []
+    mwt = None  # (line, last word id, forms of its words so far)
+
+    def check_mwt():
+        line, _, forms = mwt
+        if ''.join(forms) != line['form']:
+            warn("WARN: multiword token " + nodeStr(line['id']) + " '" + line['form'] + "' does not match its words '"
+                 + ' '.join(forms) + "' in " + docname)
+
+    for line in tree:
+        node = line['id']
+        if isinstance(node, tuple):
+            if node[1] == '-':
+                if mwt is not None:
+                    check_mwt()
+                mwt = (line, node[2], [])
+                parts.append(line['form'])
+                parts.append(space_after(line))
+            continue    # (empty nodes have no surface form)
+        if mwt is not None and isinstance(node, int) and node <= mwt[1]:
+            mwt[2].append(line['form'])
+            misc = line['misc'] or EMPTY
+            if 'SpaceAfter' in misc or 'SpacesAfter' in misc:
+                warn("WARN: SpaceAfter on word " + str(node) + " of multiword token " + nodeStr(mwt[0]['id'])
+                     + " (belongs on the token line) in " + docname)
+            if node == mwt[1]:
+                check_mwt()
+                mwt = None
+            continue
+        if mwt is not None:
+            check_mwt()
+            mwt = None
+        parts.append(line['form'])
+        parts.append(space_after(line))
+    if mwt is not None:
+        check_mwt()
+
+    text = tree.metadata.get('text')
+    if text is None:
+        warn("WARN: no # text in " + docname)
+        return
+    tokens = ''.join(parts).rstrip()
+    if tokens != text:
+        k = len(os.path.commonprefix([text, tokens]))
+        found = f"U+{ord(text[k]):04X}" if k < len(text) else "end"
+        expected = f"U+{ord(tokens[k]):04X}" if k < len(tokens) else "end"
+        warn("WARN: # text differs from the token forms and SpaceAfter at character " + str(k+1) + " (" + found + " vs. " + expected
+             + "): '" + text[max(0, k-20):k+20] + "' vs. '" + tokens[max(0, k-20):k+20] + "' in " + docname)
+
+DOCUMENT_PART_RE = re.compile(r"-(p?)([0-9]+)")
 
-def validate_lemmas(lemma_dict, lemma_docs):
+class DocumentSequence:
+    """
+    Checks, sentence by sentence, that the sentence and paragraph ids within each document are
+    numbered consecutively from 1 after the document id, as in EWT and GUM:
+    `<newdoc id>-0001`, `<newdoc id>-0002`, ... and `<newdoc id>-p0001`, ...
+    Sentences before the first `# newdoc id` are not checked.
+    """
+    def __init__(self):
+        self.doc = None
+        self.last = {'': 0, 'p': 0}   # last sentence and paragraph number in the current document
+
+    def check(self, tree):
+        metadata = tree.metadata
+        docname = metadata['sent_id']
+        if 'newdoc id' in metadata:
+            self.doc = metadata['newdoc id']
+            self.last = {'': 0, 'p': 0}
+        if self.doc is None:
+            return
+        self.check_id(docname, '', docname)
+        if 'newpar id' in metadata:
+            self.check_id(metadata['newpar id'], 'p', docname)
+
+    def check_id(self, id, kind, docname):
+        what = "paragraph id " if kind else "sent_id "
+        m = DOCUMENT_PART_RE.fullmatch(id, len(self.doc)) if id.startswith(self.doc) else None
+        if m is None or m.group(1) != kind:
+            warn("WARN: " + what + "'" + id + "' does not continue document '" + self.doc + "' in " + docname)
+            return
+        n = int(m.group(2))
+        if n != self.last[kind] + 1:
+            warn("WARN: " + what + "'" + id + "' out of sequence (expected " + str(self.last[kind] + 1) + ") in " + docname)
+        self.last[kind] = n
+
+RARE_LEMMA = "! rare lemma "  # prefix of the messages of validate_lemmas
+
+def validate_lemmas(lemma_dict, lemma_docs, keys=None):
+    """Flag rare lemmas of (form, XPOS) types; only for the types in `keys`, if given. Returns the number of types flagged."""
     exceptions = [("Democratic","JJ","Democratic"),("Water","NNP","Waters"),("Sun","NNP","Sunday"),("a","IN","of"),
                   ("a","IN","as"),("car","NN","card"),("lay","VB","lay"),("that","IN","than"),
                   ("da","NNP","Danish"),("Jan","NNP","Jan"),("Jan","NNP","January"),
                   ("'s","VBZ","have"),("’s","VBZ","have"),("`s","VBZ","have"),("'d","VBD","do"),("'d","VBD","have")]
     suspicious_types = 0
     majority = None
-    for tok, xpos in sorted(lemma_dict):
+    for tok, xpos in sorted(lemma_dict if keys is None else (k for k in keys if k in lemma_dict)):
         if sum(lemma_dict[(tok,xpos)].values()) > 1:
             for i, lem in enumerate(filter(lambda y: y!='_', sorted(lemma_dict[(tok,xpos)],key=lambda x:lemma_dict[(tok,xpos)][x],reverse=True))):
                 docs = ", ".join(sorted(lemma_docs[(tok,xpos,lem)]))
@@ -117,14 +826,80 @@ def validate_lemmas(lemma_dict, lemma_docs):
                 else:
                     if lemma_dict[tok,xpos][lem]>0 and (tok,xpos,lem) not in exceptions:  # known exceptions
                         suspicious_types += 1
-                        print("! rare lemma " + lem + " for " + tok + "/" + xpos + " in " + docs +
+                        warn(RARE_LEMMA + lem + " for " + tok + "/" + xpos + " in " + docs +
                                      " (majority: " + majority + ")\n")
-    if suspicious_types > 0:
-        sys.stderr.write("! "+str(suspicious_types) + " suspicious lemma types detected\n")
-
+    return suspicious_types
+
+def majority_lemmas(lemma_dict):
+    """(form, xpos) -> most frequent lemma other than '_' (the first one seen on ties), as in validate_lemmas."""
+    table = {}
+    for key, lemmas in lemma_dict.items():
+        counted = [(n, lem) for lem, n in lemmas.items() if lem != '_']
+        if counted:
+            table[key] = max(counted, key=lambda x: x[0])[1]
+    return table
+
+
+# Token sequences checked in flag_dep_warnings (and validate_annos), matched by NGRAM_MATCHER
+NGRAM_PATTERNS = [
+    ("suspicious n-gram", [("form", "*", "DT"), ("lemma", "only", "RB")]),
+    ("suspicious n-gram", [("form", "no", "RB"), ("lemma", "matter", "RB")]),
+    ("no one", [("form", "no", "*"), ("lemma", "one", "*")]),
+    ("one another", [("form", "one", "*"), ("lemma", "another", "*")]),
+    ("each other", [("form", "each", "*"), ("lemma", "other", "*")]),
+    ("fixed bigram", [("form", "kind", "*"), ("lemma", "of", "*")]),
+    ("fixed bigram", [("form", "sort", "*"), ("lemma", "of", "*")]),
+    ("fixed bigram", [("form", "instead", "*"), ("lemma", "of", "*")]),
+    ("fixed bigram", [("form", "rather", "*"), ("lemma", "than", "*")]),
+    ("fixed bigram", [("form", "at", "*"), ("lemma", "least", "*")]),
+    ("a couple", [("form", "a", "*"), ("lemma", "couple", "*")]),
+    ("and/", [("form", "and", "*"), ("lemma", "/", "*")]),
+    ("/or", [("form", "/", "*"), ("lemma", "or", "*")]),
+]
+NGRAM_MATCHER = NgramMatcher(NGRAM_PATTERNS)
+
+EXTPOS_FUNCS: dict[str,str] = {
+    "ADP": "case",
+    "SCONJ": "mark",
+    "ADV": "advmod",
+    "CCONJ": "cc",
+    "PRON": "obj iobj obl nmod nmod:poss"
+}
 
-def validate_annos(tree):
+MWE_PAIRS: dict[tuple[str,str],str] = {("accord", "to"): 'ADP', ("all","but"): 'ADV',
+    ("as","for"): 'ADP SCONJ', ("as","if"): 'SCONJ',
+    ("as","well"): 'ADV CCONJ', ("as","as"): 'CCONJ', ("as","in"): 'ADP SCONJ',
+    ("all","of"): 'ADV', ("as","oppose"): 'ADP SCONJ', ("as","to"): 'ADP SCONJ',
+    ("at","least"): 'ADV', ("because","of"): 'ADP', ("due","to"): 'ADP SCONJ',
+    #("had","better"): 'AUX', ("'d","better"): 'AUX',
+    ("how","come"): 'ADV', ("in","between"): 'ADP ADV', ("per", "se"): 'ADV',
+    ("in","case"): 'ADP SCONJ ADV', ("in","of"): 'ADP', ("in","order"): 'SCONJ', ("in","that"): 'SCONJ',
+    ("instead","of"): 'ADP SCONJ', ("kind","of"): 'ADV', ("less","than"): 'ADV', ("let","alone"): 'CCONJ',
+    ("more","than"): 'ADV', ("not","to"): 'CCONJ', ("not","mention"): 'CCONJ',
+    ("of","course"): 'ADV', ("prior","to"): 'ADP SCONJ', ("rather","than"): 'CCONJ ADP SCONJ',
+    ("so","as"): 'SCONJ', ("so", "to"): 'SCONJ', ("sort", "of"): 'ADV', ("so", "that"): 'SCONJ',
+    ("such","as"): 'ADP SCONJ', ("that","be"): 'ADV', ("up","to"): 'ADV',
+    #("depend","on"): 'ADP SCONJ', 
+    #("out","of"): 'ADP', ("off","of"): 'ADP', 
+    #("long","than"), 
+    ("on","board"): 'ADP',
+    ("as","of"): 'ADP',
+    # ("depend","upon"),
+    #("just","about"),("vice","versa"),("as","such"),("next","to"),("close","to"),
+    ("one","another"): 'PRON',
+    #("de","facto"),
+    ("each","other"): 'PRON', ("as","many"): 'ADV'}    # TODO: only tested for EWT
+
+# Ad hoc listing of triple mwe parts - All in all, in order for, whether or not
+MWE_PAIRS.update({("all","in"): 'ADV', ("all","all"): 'ADV', ("in","for"): 'SCONJ',
+                    ("whether","or"): 'SCONJ', ("whether","not"): 'SCONJ'})
+
+CARDINAL_DIGITS_RE = re.compile(r"[0-9]{1,3}(?:,[0-9]{3})+|[0-9]+")
+
+def validate_annos(tree, tokens=None):
         docname = tree.metadata['sent_id']
+        if tokens is None:
+            tokens = normalize_tree(tree)
 
         tok_num = 0
         upostags = {}
@@ -133,11 +908,11 @@ def validate_annos(tree):
         sent_positions = defaultdict(lambda: "_")
 
         new_sent = True
-        for line in tree:
-            if not isRegularNode(line):
+        for t in tokens:
+            if not t.regular:
                 continue
             tok_num += 1
-            postags[tok_num], upostags[tok_num], lemmas[tok_num] = line['xpos'], line['upos'], line['lemma']
+            postags[tok_num], upostags[tok_num], lemmas[tok_num] = t.xpos, t.upos, t.lemma
             #sent_types[tok_num] = s_type
             if new_sent:
                 sent_positions[tok_num] = "first"
@@ -147,52 +922,58 @@ def validate_annos(tree):
         # Dictionaries to hold token annotations from conllu data
         funcs = {}
         feats: Dict[int,Dict[str,str]] = {}
-        all_edeps: Dict[int,Dict[str,str]] = {}
         misc: Dict[int,Dict[str,str]] = {}
-        tokens = {}
+        forms = {}
         parent_ids: Dict[int,int] = {}
+        dependent_ids: Dict[int,List[int]] = defaultdict(list)   # inverse of parent_ids, so lookups of dependents stay linear
         parents: Dict[int,str] = {}
         children: Dict[int,List[str]] = defaultdict(list)
         child_funcs: Dict[int,List[str]] = defaultdict(list)
         child_pos: Dict[int,List[str]] = defaultdict(list)
+        basic_edges = set()
         tok_num = 0
 
         line_num = 0
         sent_start = 0
-        for r, line in enumerate(tree):
+        for r, t in enumerate(tokens):
             line_num += 1
-            head = line['head']
+            head = t.head
             #if "." in line['id']:  # Ignore ellipsis tokens
-            if not isRegularNode(line):
+            if not t.regular:
                 continue
 
             tok_num += 1
-            tok = (line.get('misc') or {}).get('CorrectForm') or line['form']   # in GUM, some explicit CorrectForm=_ which parses as None
-            funcs[tok_num] = line['deprel']
+            tok = t.tok
+            funcs[tok_num] = t.deprel
             if head!=0:  # Root token
                 if head == "_" or head == '' or head is None:
-                    print("Invalid head '_' at line " + str(r) + " in " + docname)
-                    sys.exit()
+                    warn("Invalid head '_' at line " + str(r) + " in " + docname)
+                    return  # (validate_structure normally catches this first)
                 parent_ids[tok_num] = head
                 children[head].append(tok)
-                child_funcs[head].append(line['deprel'])
+                child_funcs[head].append(t.deprel)
                 child_pos[head].append(postags[tok_num])
             else:
                 parent_ids[tok_num] = 0
-            tokens[tok_num] = tok
-            feats[tok_num] = line['feats']
-            if line['deps'] is not None:
-                all_edeps[tok_num] = line['deps']
-            if line['misc'] is not None:
-                misc[tok_num] = line['misc']
+            dependent_ids[parent_ids[tok_num]].append(tok_num)
+            forms[tok_num] = tok
+            feats[tok_num] = t.feats
+            basic_edges.add((t.id, parent_ids[tok_num], t.deprel))
+            if t.line['misc'] is not None:
+                misc[tok_num] = t.misc
             del head
 
-        for i in range(1, len(tokens) + 1, 1):
+        for i in range(1, len(forms) + 1, 1):
             if parent_ids[i] == 0:
                 parents[i] = "ROOT"
             else:
-                parents[i] = tokens[parent_ids[i]]
+                parents[i] = forms[parent_ids[i]]
 
+        copular_heads = {parent_ids[x] for x in funcs if funcs[x]=="cop"}
+        ngram_events = NGRAM_MATCHER.run([t for t in tokens if t.regular])    # tok_num-1 -> names of n-grams ending there
+
+        egraph = EnhancedGraph(tree)
+        missing_edeps = {node for node, head, rel in egraph.missing(basic_edges)}  # basic deps not in the enhanced graph
 
         tok_num = 0
 
@@ -234,54 +1015,54 @@ def validate_annos(tree):
         prev_upos = ""
         prev_func = ""
         prev_parent_lemma = ""
-        prev_feats = {}
+        prev_feats = NO_FEATS
         prev_misc = {}
-        for i, line in enumerate(tree):
-            if not isRegularNode(line):
+        for i, t in enumerate(tokens):
+            if not t.regular:
                 continue
 
             tok_num += 1
-            tok = (line.get('misc') or {}).get('CorrectForm') or line['form']   # in GUM, some explicit CorrectForm=_ which parses as None
+            line = t.line
+            tok = t.tok
             assert tok is not None,(docname, tree.metadata['filename'], tok_num, line)
-            xpos, lemma = line['xpos'], line['lemma']
+            xpos, lemma = t.xpos, t.lemma
             pos = xpos
-            upos = line['upos']
-            func = line['deprel']
-            featlist = line['feats'] or {}
-            misclist = line['misc'] or {}
-            edeps: List[Tuple[str,int]] = line['deps']
-            merged = 'merged' in line and line['merged']
-            form = check_and_fix_form_typos(tok_num, line['form'], featlist, misclist, merged, docname)
+            upos = t.upos
+            func = t.deprel
+            featlist = t.feats
+            misclist = t.misc
+            edeps: List[Tuple[str,int]] = t.deps
+            form = check_and_fix_form_typos(tok_num, t.form, featlist, misclist, t.merged, docname)
 
             if featlist and featlist.get("Voice")=="Pass":
                 passive_verbs.add(tok_num)
 
             if upos not in tagset_combos.keys():
-                print("WARN: invalid UPOS tag " + upos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                warn("WARN: invalid UPOS tag " + upos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
             if pos not in tagset:
-                print("WARN: invalid POS tag " + pos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                warn("WARN: invalid POS tag " + pos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
             if upos in tagset_combos and pos not in tagset_combos[upos]:
                 if pos=="CD" and upos=="PRON":
                     if featlist.get("PronType")!="Rcp":
-                        print("WARN: CD/PRON combination requires PronType=Rcp ('one another') in " + docname)
+                        warn("WARN: CD/PRON combination requires PronType=Rcp ('one another') in " + docname)
                 elif pos=="FW" and upos=="NOUN" and lemma=="etc.":
                     pass    # this is an exception to the usual mapping of FW
                 else:
-                    print("WARN: invalid POS tag " + pos + " for UPOS " + upos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                    warn("WARN: invalid POS tag " + pos + " for UPOS " + upos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             if upos=="DET" and lemma.lower()=="them":
                 # vernacular substitute for 'those'
                 assert pos=="DT"
                 assert featlist["Style"]=="Vrnc"
             elif lemma.lower() in non_lemmas:
-                print("WARN: invalid lemma " + lemma + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                warn("WARN: invalid lemma " + lemma + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
             elif lemma in non_cap_lemmas:
-                print("WARN: invalid lemma " + lemma + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                warn("WARN: invalid lemma " + lemma + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
             elif (pos,lemma.lower()) in non_lemma_combos:
-                print("WARN: invalid lemma " + lemma + " for POS "+pos+" in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                warn("WARN: invalid lemma " + lemma + " for POS "+pos+" in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
             elif lemma in lemma_pos_combos:
                 if pos != lemma_pos_combos[lemma]:
-                    print("WARN: invalid pos " + pos + " for lemma "+lemma+" in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                    warn("WARN: invalid pos " + pos + " for lemma "+lemma+" in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             parent_string = parents[tok_num]
             parent_id = parent_ids[tok_num]
@@ -290,7 +1071,6 @@ def validate_annos(tree):
             parent_pos = postags[parent_ids[tok_num]] if parent_ids[tok_num] != 0 else ""
             parent_upos = upostags[parent_ids[tok_num]] if parent_ids[tok_num] != 0 else ""
             parent_feats = feats[parent_ids[tok_num]] if parent_ids[tok_num] != 0 else {}
-            parent_edeps = all_edeps[parent_ids[tok_num]] if parent_ids[tok_num] != 0 else []
             is_parent_promoted = parent_ids[tok_num] != 0 and misc.get(parent_ids[tok_num],{}).get("Promoted")=="Yes"
             parent_child_funcs = child_funcs[parent_ids[tok_num]] if parent_ids[tok_num] != 0 else []
             edge_direction = ""
@@ -300,134 +1080,101 @@ def validate_annos(tree):
             assert parent_pos is not None,(tok_num,parent_ids[tok_num],postags,filename)
             S_TYPE_PLACEHOLDER = None
             assert parent_string is not None,(tok_num,docname,filename)
-            is_parent_copular = any(funcs[x]=="cop" for x in parent_ids if parent_ids[x]==parent_id)    # if tok or any siblings attach as cop
+            is_parent_copular = parent_id in copular_heads    # if tok or any siblings attach as cop
             extpos = featlist.get("ExtPos")
+            ngrams = ngram_events.get(tok_num-1, ())
             flag_dep_warnings(tok_num, tok, pos, upos, extpos, lemma, func, edeps,
                               parent_string, parent_lemma, parent_id, is_parent_copular, is_parent_promoted,
                               children[tok_num], child_funcs[tok_num], child_pos[tok_num], S_TYPE_PLACEHOLDER, docname,
                               prev_tok, prev_pos, prev_upos, prev_func, prev_parent_lemma, sent_positions[tok_num],
                               parent_func, parent_pos, parent_upos, parent_child_funcs,
-                              edge_direction, filename)
-            flag_feats_warnings(tok_num, tok, pos, upos, lemma, featlist, misclist, docname)
+                              edge_direction, filename, ngrams)
+            cached_feats_warnings(tok_num, tok, pos, upos, lemma, featlist, misclist, docname)
 
             if func!='goeswith':
-                if (prev_tok.lower(),lemma) in {("one","another"),("each","other")}:    # note that "each" is DET, not PRON
+                if "one another" in ngrams or "each other" in ngrams:    # note that "each" is DET, not PRON
                     # check for PronType=Rcp
-                    flag_pronoun_warnings(tok_num, form, prev_pos, upos, lemma, prev_feats, prev_misc, prev_tok, docname)
+                    cached_reciprocal_warnings(tok_num, form, prev_pos, upos, lemma, prev_feats, prev_misc, prev_tok, docname)
                 elif upos == "PRON" or (upos == "DET" and featlist.get("ExtPos")!="PRON") or upos == "ADV" and lemma in ADV_ENTRIES:  # ExtPos exception for "each other"
                     if lemma == "however" and "advcl:relcl" not in child_funcs[tok_num] and not (
                             func == "advmod" and parent_upos in ("ADJ", "ADV") and not is_parent_copular
                         ):  # don't assign PronType to discourse connective use of "however"
                         if pos == "WRB":
-                            print(f"WARN: should however/{pos} be tagged RB? in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                            warn(f"WARN: should however/{pos} be tagged RB? in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
                     elif lemma == "however" and pos == "RB":
-                        print(f"WARN: should however/{pos} be tagged WRB? in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn(f"WARN: should however/{pos} be tagged WRB? in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
                     else:
                         # Pass FORM to detect abbreviations, etc.
-                        _featlist = dict(featlist)
+                        _featlist = featlist
                         if lemma in ("all","that") and _featlist.get("ExtPos")=="ADV":  # "all of" (quantity), "that is"
-                            del _featlist["ExtPos"] # prevent complaint about ExtPos=ADV
-                        flag_pronoun_warnings(tok_num, form, pos, upos, lemma, _featlist, misclist, prev_tok, docname)
+                            _featlist = MaskedFeats(featlist, ('ExtPos',)) # prevent complaint about ExtPos=ADV
+                        cached_pronoun_warnings(tok_num, form, pos, upos, lemma, _featlist, misclist, prev_tok, docname)
                 elif lemma in PRON_LEMMAS:
                     if not ((lemma=="one" and upos in ("NOUN","NUM"))
                             or (lemma=="I" and upos=="NUM") # Roman numeral
                             or (lemma=="he" and upos=="INTJ") # laughter
                             or upos=="DET"):
-                        print("WARN: invalid pronoun UPOS tag " + upos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn("WARN: invalid pronoun UPOS tag " + upos + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
                         # This warns about a few that are arguably correct, e.g. "oh my/INTJ", "I/PROPN - 24"
                 elif upos == "NUM":
                     if "NumForm" not in featlist or "NumType" not in featlist:
-                        print("WARN: NUM should have NumForm and NumType in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
-
-            extpos_funcs: dict[str,str] = {
-                "ADP": "case",
-                "SCONJ": "mark",
-                "ADV": "advmod",
-                "CCONJ": "cc",
-                "PRON": "obj iobj obl nmod nmod:poss"
-            }
-
-            mwe_pairs: dict[tuple[str,str],str] = {("accord", "to"): 'ADP', ("all","but"): 'ADV',
-                ("as","for"): 'ADP SCONJ', ("as","if"): 'SCONJ',
-                ("as","well"): 'ADV CCONJ', ("as","as"): 'CCONJ', ("as","in"): 'ADP SCONJ',
-                ("all","of"): 'ADV', ("as","oppose"): 'ADP SCONJ', ("as","to"): 'ADP SCONJ',
-                ("at","least"): 'ADV', ("because","of"): 'ADP', ("due","to"): 'ADP SCONJ',
-                #("had","better"): 'AUX', ("'d","better"): 'AUX',
-                ("how","come"): 'ADV', ("in","between"): 'ADP ADV', ("per", "se"): 'ADV',
-                ("in","case"): 'ADP SCONJ ADV', ("in","of"): 'ADP', ("in","order"): 'SCONJ', ("in","that"): 'SCONJ',
-                ("instead","of"): 'ADP SCONJ', ("kind","of"): 'ADV', ("less","than"): 'ADV', ("let","alone"): 'CCONJ',
-                ("more","than"): 'ADV', ("not","to"): 'CCONJ', ("not","mention"): 'CCONJ',
-                ("of","course"): 'ADV', ("prior","to"): 'ADP SCONJ', ("rather","than"): 'CCONJ ADP SCONJ',
-                ("so","as"): 'SCONJ', ("so", "to"): 'SCONJ', ("sort", "of"): 'ADV', ("so", "that"): 'SCONJ',
-                ("such","as"): 'ADP SCONJ', ("that","be"): 'ADV', ("up","to"): 'ADV',
-                #("depend","on"): 'ADP SCONJ', 
-                #("out","of"): 'ADP', ("off","of"): 'ADP', 
-                #("long","than"), 
-                ("on","board"): 'ADP',
-                ("as","of"): 'ADP',
-                # ("depend","upon"),
-                #("just","about"),("vice","versa"),("as","such"),("next","to"),("close","to"),
-                ("one","another"): 'PRON',
-                #("de","facto"),
-                ("each","other"): 'PRON', ("as","many"): 'ADV'}    # TODO: only tested for EWT
-
-            # Ad hoc listing of triple mwe parts - All in all, in order for, whether or not
-            mwe_pairs.update({("all","in"): 'ADV', ("all","all"): 'ADV', ("in","for"): 'SCONJ',
-                                ("whether","or"): 'SCONJ', ("whether","not"): 'SCONJ'})
+                        warn("WARN: NUM should have NumForm and NumType in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        if pos == "CD" and CARDINAL_DIGITS_RE.fullmatch(tok):   # decimals may be NumType=Frac, letters are list items
+                            for feature, value in (("NumForm", "Digit"), ("NumType", "Card")):
+                                if feature not in featlist:
+                                    propose_fix("NumForm/NumType on cardinal NUM", docname, tok_num, feature, value)
 
             if func == "fixed":
-                if (parent_lemma.lower(), lemma.lower()) not in mwe_pairs:
-                    print("WARN: unlisted fixed expression" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                if (parent_lemma.lower(), lemma.lower()) not in MWE_PAIRS:
+                    warn("WARN: unlisted fixed expression" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
             elif "fixed" in child_funcs[tok_num]:
                 fixedChild = children[tok_num][child_funcs[tok_num].index("fixed")]
                 fixedChild = {"a": "of", "is": "be", "opposed": "oppose", "t": "to"}.get(fixedChild, fixedChild)
-                expectedExtPos = mwe_pairs.get((lemma.lower(), fixedChild.lower()))
+                expectedExtPos = MWE_PAIRS.get((lemma.lower(), fixedChild.lower()))
                 if not expectedExtPos:
-                    print(f"WARN: fixed expression missing entry: {(lemma.lower(), fixedChild.lower())}" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                    warn(f"WARN: fixed expression missing entry: {(lemma.lower(), fixedChild.lower())}" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
                 elif "ExtPos" not in featlist:
-                    print("WARN: fixed head missing ExtPos" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                    warn("WARN: fixed head missing ExtPos" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
                 elif (extpos := featlist["ExtPos"]) not in expectedExtPos:
-                    print(f"WARN: fixed head ExtPos={extpos} but one of {expectedExtPos} expected" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
-                elif func!='conj' and func not in extpos_funcs[extpos]:
+                    warn(f"WARN: fixed head ExtPos={extpos} but one of {expectedExtPos} expected" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                elif func!='conj' and func not in EXTPOS_FUNCS[extpos]:
                     if extpos=="SCONJ" and func=='ccomp' and misclist["Promoted"]=="Yes":
                         pass
                     else:
-                        print(f"WARN: fixed head ExtPos={extpos} in unexpected function {func}" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn(f"WARN: fixed head ExtPos={extpos} in unexpected function {func}" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             if func.endswith(':relcl'):
                 # Check PronType=Rel for free relative headed by the WDT/WP/WRB
                 # (won't catch cases where the relativizer is a dependent in a larger relative phrase)
                 if upos=="PRON" or (upos=="ADV" and (xpos=="WRB" or (xpos=="GW" and "PronType" in featlist))):
                     if featlist["PronType"]=="Int":
-                        print("WARN: Looks like a WH word as internal root of relative clause, should be PronType=Rel?" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn("WARN: Looks like a WH word as internal root of relative clause, should be PronType=Rel?" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
                 if parent_upos=="PRON" or (parent_upos=="ADV" and (parent_pos=="WRB" or (parent_pos=="GW" and "PronType" in parent_feats))):
                     if parent_feats["PronType"]=="Int":
-                        print("WARN: Looks like a WH word-headed free relative, should be PronType=Rel" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn("WARN: Looks like a WH word-headed free relative, should be PronType=Rel" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             if func!='goeswith' and featlist.get("PronType")=="Rel" and edeps is not None:
-                if len(edeps)!=1 or edeps[0][0]!="ref":
+                if len(edeps)!=1 or not egraph.is_ref(t.id):
                     if "acl:relcl" not in child_funcs[tok_num] and "advcl:relcl" not in child_funcs[tok_num]: # not free relative
                         if tok_num>1 and docname!="weblog-blogspot.com_tacitusproject_20040712123425_ENG_20040712_123425-0032":   # sentence fragment may begin with "Which"
-                            print("WARN: PronType=Rel should have `ref` as its sole enhanced dependency" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
-                elif not {"acl:relcl","advcl:relcl"} & set(child_funcs[edeps[0][1]]):
-                    # the ref antecedent doesn't head the RC
-                    print("WARN: `ref` antecedent lacks :relcl dependent" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                            warn("WARN: PronType=Rel should have `ref` as its sole enhanced dependency" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                # (whether the `ref` antecedent heads the RC is checked on the enhanced graph below: unpaired_refs)
 
             # Ensure that most basic deps are duplicated in edeps
-            if edeps[0][0]!="ref" and not (parent_edeps and parent_edeps[0][0]=="ref"):
-                if func!="orphan" and (func,parent_id) not in edeps and not any(e[0].startswith(func+":") and e[1]==parent_id for e in edeps):
+            if not egraph.is_ref(t.id) and not egraph.is_ref(parent_id):
+                if func!="orphan" and t.id in missing_edeps:
                     if misclist.get("Promoted")=="Yes" or is_parent_promoted:
                         pass    # e.g. elliptical stranding
                     elif func in ("obl","case") and any(e[0]=="case" for e in edeps):
                         pass    # preposition stranding: without relativizer -> promotion to obl; with relativizer -> different head in edeps
                     else:
-                        print(f"WARN: dependency `{parent_id}:{func}` appears in basic tree but not enhanced graph" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn(f"WARN: dependency `{parent_id}:{func}` appears in basic tree but not enhanced graph" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             if upos!="PROPN" and "flat" in child_funcs[tok_num] and "Foreign" not in featlist:
                 # non-PROPN-headed flat structure
                 if "FlatType" not in misclist:
                     if not (upos=="SYM" and lemma=="#" or upos=="NOUN" and lemma in ("number","no.") or upos=="ADJ" and lemma=="Sri"):    # e.g. "# 1" "Sri/ADJ Lankan/ADJ"
-                        print("WARN: non-PROPN non-Foreign flat expression lacks FlatType" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                        warn("WARN: non-PROPN non-Foreign flat expression lacks FlatType" + " in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             # check for spurious VB/VerbForm=Inf
             # https://github.com/UniversalDependencies/UD_English-EWT/issues/284
@@ -435,7 +1182,7 @@ def validate_annos(tree):
                 # looks like it should be a finite verb (of course there are exceptions)
                 # TODO: "better X" cxn e.g. "you better believe". Valid VerbForm=Inf?
                 if (nsubj := children[tok_num][child_funcs[tok_num].index("nsubj")]).lower() not in ("anyone", "anybody"):
-                    print("WARN: verb "+tok+"/VB has an nsubj ('" + nsubj + "'); should it be finite? in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                    warn("WARN: verb "+tok+"/VB has an nsubj ('" + nsubj + "'); should it be finite? in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
             """
             Extraposition Construction
@@ -446,10 +1193,10 @@ def validate_annos(tree):
             """
             if not (func in ('root','parataxis') and upos in ('ADJ','VERB')):
                 if 'csubj' in child_funcs[tok_num] and 'expl' not in child_funcs[tok_num]:
-                    for j in parent_ids:
-                        if parent_ids[j]==tok_num and j>tok_num and funcs[j]=='csubj':
+                    for j in dependent_ids[tok_num]:
+                        if j>tok_num and funcs[j]=='csubj':
                             if not (func=='root' and tok in ('pleasure','joy','move')):
-                                print("WARN: suspicious post-head `csubj` in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
+                                warn("WARN: suspicious post-head `csubj` in " + docname + " @ line " + str(i) + " (token: " + tok + ")")
 
 
             if ':pass' in func:
@@ -482,39 +1229,42 @@ def validate_annos(tree):
         """
         for v in passive_verbs:
             if feats[v].get("Voice") != "Pass":
-                print("WARN: Passive verb with lemma '" + lemmas[v] + "' should have Voice=Pass in " + docname)
+                warn("WARN: Passive verb with lemma '" + lemmas[v] + "' should have Voice=Pass in " + docname)
+                propose_fix("Voice=Pass on passive verb", docname, v, "Voice", "Pass")
             if postags[v] not in ["VBN", "MD"]:
-                print("WARN: Passive verb with lemma '" + lemmas[v] + "' should be VBN in " + docname)
-            dependents = {j: funcs[j] for j,i in parent_ids.items() if i==v}
+                warn("WARN: Passive verb with lemma '" + lemmas[v] + "' should be VBN in " + docname)
+            dependents = {j: funcs[j] for j in dependent_ids[v]}
             aux_dependents = sorted([(j,f) for j,f in dependents.items() if f.startswith('aux')])
             if aux_dependents and (not all(f=='aux' for j,f in aux_dependents[:-1]) or aux_dependents[-1][1]!='aux:pass'):
                 if docname!="answers-20111106035951AADq0Qg_ans-0012":    # sentence has missing 'be' aux:pass
-                    print("WARN: Passive verb with lemma '" + lemmas[v] + "' has suspicious aux(:pass) dependents (only the last should be aux:pass) in " + docname)
+                    warn("WARN: Passive verb with lemma '" + lemmas[v] + "' has suspicious aux(:pass) dependents (only the last should be aux:pass) in " + docname)
             subj_dependents = {f for f in dependents.values() if 'subj' in f}
             if not subj_dependents < {'nsubj:pass','csubj:pass','nsubj:outer','csubj:outer'}:
-                print("WARN: Passive verb with lemma '" + lemmas[v] + "' has subject dependents " + repr(sorted(subj_dependents)).replace('[','{').replace(']','}') + " in " + docname)
+                warn("WARN: Passive verb with lemma '" + lemmas[v] + "' has subject dependents " + repr(sorted(subj_dependents)).replace('[','{').replace(']','}') + " in " + docname)
             if 'cop' in dependents.values():
                 if 'aux:pass' in dependents.values() and any(':outer' in d for d in dependents.values()):
                     pass
                 else:
-                    print("WARN: Passive verb with lemma '" + lemmas[v] + "' has cop dependent in " + docname)
+                    warn("WARN: Passive verb with lemma '" + lemmas[v] + "' has cop dependent in " + docname)
         for i,f in funcs.items():
             if f=='obl:agent':
                 if (feats[parent_ids[i]] or {}).get("Voice") != "Pass":
-                    print("WARN: Voice=Pass missing from verb that heads obl:agent (lemmas: " + lemmas[i] + " <- " + lemmas[parent_ids[i]] + ") in " + docname)
-                if not any(k==i and lemmas[j]=='by' and funcs[j]=='case' for j,k in parent_ids.items()):
-                    print("WARN: obl:agent without 'by' (lemmas: " + lemmas[i] + " <- " + lemmas[parent_ids[i]] + ") in " + docname)
+                    warn("WARN: Voice=Pass missing from verb that heads obl:agent (lemmas: " + lemmas[i] + " <- " + lemmas[parent_ids[i]] + ") in " + docname)
+                    if parent_ids[i] != 0:
+                        propose_fix("Voice=Pass on head of obl:agent", docname, parent_ids[i], "Voice", "Pass")
+                if not any(lemmas[j]=='by' and funcs[j]=='case' for j in dependent_ids[i]):
+                    warn("WARN: obl:agent without 'by' (lemmas: " + lemmas[i] + " <- " + lemmas[parent_ids[i]] + ") in " + docname)
         # If a VBN has no *:pass, obl:agent, or aux dependents, it should be Voice=Pass
         for v,p in postags.items():
             if p=='VBN':
                 isVoicePass = (feats[v] or {}).get("Voice") == "Pass"
                 if funcs[v] in ['aux', 'aux:pass', 'cop']:
                     if isVoicePass:
-                        print("WARN: Voice=Pass prohibited on verbs functioning as auxiliaries in " + docname)
+                        warn("WARN: Voice=Pass prohibited on verbs functioning as auxiliaries in " + docname)
                 elif lemmas[v]=='suppose' and not isVoicePass:  # (be) supposed (to)
-                    print("WARN: 'supposed (to)' missing Voice=Pass? " + docname)
+                    warn("WARN: 'supposed (to)' missing Voice=Pass? " + docname)
                 else:
-                    dependents = {j: funcs[j] for j,i in parent_ids.items() if i==v}
+                    dependents = {j: funcs[j] for j in dependent_ids[v]}
                     pass_marking_dependents = {f for f in dependents.values() if ':pass' in f or f=='obl:agent'}
                     other_dependents = {f for f in dependents.values() if f=='aux'}
                     
@@ -526,9 +1276,16 @@ def validate_annos(tree):
                         elif docname in ["reviews-122564-0003", "answers-20111108104724AAuBUR7_ans-0001"]:
                             pass    # hardcode two exceptions interpreted as perfect
                         else:
-                            print("WARN: Voice=Pass missing from VBN verb with no aux dependent in " + docname)
+                            warn("WARN: Voice=Pass missing from VBN verb with no aux dependent in " + docname)
+                            propose_fix("Voice=Pass on VBN verb without aux", docname, v, "Voice", "Pass")
                     elif isVoicePass and not pass_marking_dependents and other_dependents:
-                        print("WARN: VBN with aux but no aux:pass dependent incompatible with Voice=Pass in " + docname)
+                        warn("WARN: VBN with aux but no aux:pass dependent incompatible with Voice=Pass in " + docname)
+
+        # Enhanced graph: every node should be reachable from the root, and every `ref` antecedent should head a relative clause
+        for node in egraph.unreachable():
+            warn("WARN: node " + nodeStr(node) + " is not reachable from the root in the enhanced graph in " + docname)
+        for node, head in egraph.unpaired_refs():
+            warn("WARN: `ref` antecedent " + nodeStr(head) + " of node " + nodeStr(node) + " lacks :relcl dependent in the enhanced graph in " + docname)
 
 NNS_PTAN_LEMMAS = ["aesthetics", "arrears", "auspices", "barracks", "billiards", "clothes", "confines", "contents",
                    "dynamics", "earnings", "eatables", "economics", "electronics", "energetics", "environs", "ergonomics",
@@ -549,86 +1306,221 @@ NNPS_PTAN_LEMMAS = ["Netherlands", "Analytics", "Olympics", "Commons", "Paralymp
 
 SING_AND_PLUR_S_LEMMAS = ["series", "species"]
 
+class DepRule(NamedTuple):
+    fn: Callable        # fn(t: DepToken)
+    deprel: Tuple[str,...]  # guards: fnmatch patterns (e.g. "acl*"; "!x" excludes x), () means any value
+    xpos: Tuple[str,...]
+    upos: Tuple[str,...]
+    lemma: Optional[frozenset]
+    child: int          # bits (CHILD_GUARD_BITS) of the child deprels of which the token needs one; 0: any
+    ngram: bool         # whether the token must end an n-gram (NGRAM_PATTERNS)
+
+    def admits(self, func, pos, upos, children, ngram):
+        return (all(guard_admits(patterns, value) for patterns, value in ((self.deprel, func), (self.xpos, pos), (self.upos, upos)))
+                and (not self.child or self.child & children) and (ngram or not self.ngram))
+
+def guard_admits(patterns, value):
+    include = [p for p in patterns if not p.startswith("!")]
+    return ((not include or any(fnmatchcase(value, p) for p in include))
+            and not any(fnmatchcase(value, p[1:]) for p in patterns if p.startswith("!")))
+
+DEP_RULES: List[DepRule] = []   # in order of definition, which is the order of their warnings for a token
+CHILD_GUARD_BITS: Dict[str,int] = {}    # child deprel named in a guard -> bit
+# (deprel, XPOS, UPOS, child guard bits present, ends an n-gram) -> (rules without a lemma guard, {lemma: all rules for the lemma})
+DEP_RULE_INDEX: Dict[tuple,Tuple[tuple,Dict[str,tuple]]] = {}
+
+class DepToken(NamedTuple):
+    """The arguments of flag_dep_warnings, as seen by each rule, plus the location suffix of its messages."""
+    id: int
+    tok: str
+    pos: str
+    upos: str
+    extpos: Optional[str]
+    lemma: str
+    func: str
+    edeps: Optional[list]
+    parent: str
+    parent_lemma: str
+    parent_id: int
+    is_parent_copular: bool
+    is_parent_promoted: bool
+    children: List[str]
+    child_funcs: List[str]
+    child_pos: List[str]
+    s_type: Optional[str]
+    docname: str
+    prev_tok: str
+    prev_pos: str
+    prev_upos: str
+    prev_func: str
+    prev_parent_lemma: str
+    sent_position: str
+    parent_func: str
+    parent_pos: str
+    parent_upos: str
+    parent_child_funcs: List[str]
+    edge_direction: str
+    filename: str
+    ngrams: List[str]
+    inname: str
+
+def dep_rule(deprel=(), xpos=(), upos=(), lemma=None, child=(), ngram=False):
+    """
+    Register a rule of flag_dep_warnings, a function of the token (DepToken). The guards (a value
+    or a tuple of values; deprel, xpos and upos may be fnmatch patterns, and "!pattern" excludes)
+    declare what the token must have for the rule to be able to warn at all: `child`, one of these
+    deprels among its children; `ngram`, some n-gram ending at it. They only select the rules to
+    run, so each must follow from the rule's own conditions.
+    """
+    def register(fn):
+        children = 0
+        for rel in (child,) if isinstance(child, str) else child:
+            children |= CHILD_GUARD_BITS.setdefault(rel, 1 << len(CHILD_GUARD_BITS))
+        DEP_RULES.append(DepRule(fn, *((g,) if isinstance(g, str) else tuple(g) for g in (deprel, xpos, upos)),
+                                 None if lemma is None else frozenset((lemma,) if isinstance(lemma, str) else lemma),
+                                 children, ngram))
+        DEP_RULE_INDEX.clear()
+        return fn
+    return register
+
+def dep_rules_for(key):
+    """
+    The rules (functions) whose guards admit the key of DEP_RULE_INDEX, in order (memoized):
+    those without a lemma guard, and for each lemma named by a guard, all rules for that lemma.
+    """
+    rules = DEP_RULE_INDEX.get(key)
+    if rules is None:
+        admitted = [rule for rule in DEP_RULES if rule.admits(*key)]
+        lemmas = set().union(*(rule.lemma for rule in admitted if rule.lemma is not None))
+        rules = DEP_RULE_INDEX[key] = (tuple(rule.fn for rule in admitted if rule.lemma is None),
+                                       {lemma: tuple(rule.fn for rule in admitted if rule.lemma is None or lemma in rule.lemma)
+                                        for lemma in lemmas})
+    return rules
+
 def flag_dep_warnings(id, tok, pos, upos, extpos, lemma, func, edeps, parent, parent_lemma, parent_id, is_parent_copular, is_parent_promoted,
                       children: List[str], child_funcs: List[str], child_pos: List[str], s_type,
                       docname, prev_tok, prev_pos, prev_upos, prev_func, prev_parent_lemma, sent_position,
                       parent_func, parent_pos, parent_upos, parent_child_funcs: List[str],
-                      edge_direction: Literal["","L","R"], filename):
+                      edge_direction: Literal["","L","R"], filename, ngrams: List[str] = ()):
+    """
+    Run the rules below (see dep_rule) on one token. Only the rules whose guards admit its deprel,
+    XPOS, UPOS, lemma, child deprels and n-grams are run (under 4 of the 96 on average in EWT);
+    the warnings are the same as from running all rules in order.
+    """
     # Shorthand for printing errors
     inname = " in " + docname + " @ token " + str(id) + " (" + parent + " -> " + tok + ") " + filename
-
-    if func == "amod" and pos in ["VBD"]:
-        print("WARN: finite past verb labeled amod " + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func in ["amod", "det"] and parent_lemma == "one" and parent_pos == "CD":
-        print("WARN: 'one' with " + func + " dependent should be NN/NOUN not CD/NUM in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func in ["det", "det:predet"] and lemma in ["this", "that"] and not (pos == "DT" and upos == "DET"):
-        print("WARN: '" + tok + "' attaching as " + func + " should be DT/DET not " + pos + "/" + upos + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-    elif func not in ["det", "det:predet"] and lemma in ["that", "which"] and pos == "WDT" and upos != "PRON":
-        print("WARN: '" + tok + "' attaching as " + func + " should be WDT/PRON not " + pos + "/" + upos + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-    elif func not in ["det", "det:predet"] and lemma in ["this", "that"] and pos not in ["IN", "RB", "WDT"] and not (pos == "DT" and upos == "PRON"):
-        print("WARN: '" + tok + "' attaching as " + func + " should be DT/PRON not " + pos + "/" + upos + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func == "amod" and parent_upos not in ["NOUN", "PRON", "PROPN", "NUM", "SYM", "ADJ"] and parent_pos != "ADD":    # see issue #438
-        if parent_upos == "ADV" and parent_lemma in ["somewhere","anywhere","someplace","somehow","sometime"]:
+    t = tuple.__new__(DepToken, (id, tok, pos, upos, extpos, lemma, func, edeps, parent, parent_lemma, parent_id, is_parent_copular,
+                                 is_parent_promoted, children, child_funcs, child_pos, s_type, docname, prev_tok, prev_pos, prev_upos,
+                                 prev_func, prev_parent_lemma, sent_position, parent_func, parent_pos, parent_upos, parent_child_funcs,
+                                 edge_direction, filename, ngrams, inname))   # (bypasses the slower generated __new__)
+    child_bits = 0
+    for rel in child_funcs:
+        child_bits |= CHILD_GUARD_BITS.get(rel, 0)
+    key = (func, pos, upos, child_bits, bool(ngrams))
+    common, by_lemma = DEP_RULE_INDEX.get(key) or dep_rules_for(key)
+    for fn in by_lemma.get(lemma, common):
+        fn(t)
+
+@dep_rule(deprel="amod", xpos="VBD")
+def amod_finite_past(t):
+    if t.func == "amod" and t.pos in ["VBD"]:
+        warn("WARN: finite past verb labeled amod " + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel=("amod", "det"))
+def one_with_det(t):
+    if t.func in ["amod", "det"] and t.parent_lemma == "one" and t.parent_pos == "CD":
+        warn("WARN: 'one' with " + t.func + " dependent should be NN/NOUN not CD/NUM in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(lemma=("this", "that", "which"))
+def this_that_which(t):
+    if t.func in ["det", "det:predet"] and t.lemma in ["this", "that"] and not (t.pos == "DT" and t.upos == "DET"):
+        warn("WARN: '" + t.tok + "' attaching as " + t.func + " should be DT/DET not " + t.pos + "/" + t.upos + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+    elif t.func not in ["det", "det:predet"] and t.lemma in ["that", "which"] and t.pos == "WDT" and t.upos != "PRON":
+        warn("WARN: '" + t.tok + "' attaching as " + t.func + " should be WDT/PRON not " + t.pos + "/" + t.upos + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+    elif t.func not in ["det", "det:predet"] and t.lemma in ["this", "that"] and t.pos not in ["IN", "RB", "WDT"] and not (t.pos == "DT" and t.upos == "PRON"):
+        warn("WARN: '" + t.tok + "' attaching as " + t.func + " should be DT/PRON not " + t.pos + "/" + t.upos + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel="amod")
+def amod_head(t):
+    if t.func == "amod" and t.parent_upos not in ["NOUN", "PRON", "PROPN", "NUM", "SYM", "ADJ"] and t.parent_pos != "ADD":    # see issue #438
+        if t.parent_upos == "ADV" and t.parent_lemma in ["somewhere","anywhere","someplace","somehow","sometime"]:
             pass    # postpositive amod e.g. "somewhere rural"
-        elif parent_upos == "DET" and parent_lemma in ["all","both"]:
+        elif t.parent_upos == "DET" and t.parent_lemma in ["all","both"]:
             pass    # postpositive amod e.g. "all due tomorrow"
-        elif parent_upos == "VERB" and parent_pos in ["VBN","VBG"] and parent_lemma in ["bear","train","range","look"]:
+        elif t.parent_upos == "VERB" and t.parent_pos in ["VBN","VBG"] and t.parent_lemma in ["bear","train","range","look"]:
             pass    # compounds - for now special-case things like "French-born" and "wide-ranging"
         else:
-            print("WARN: " + parent_upos + " shouldn't have amod dependent in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
+            warn("WARN: " + t.parent_upos + " shouldn't have amod dependent in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
 
-    if func.split(':')[0] == "acl" and parent_upos not in ["NOUN", "PRON", "PROPN", "NUM", "SYM"]:  # see issue #439 for plain acl
-        if func == "acl" and parent_lemma in ["much", "more", "enough"]:
+@dep_rule(deprel="acl*")
+def acl_head(t):
+    if t.func.split(':')[0] == "acl" and t.parent_upos not in ["NOUN", "PRON", "PROPN", "NUM", "SYM"]:  # see issue #439 for plain acl
+        if t.func == "acl" and t.parent_lemma in ["much", "more", "enough"]:
             pass    # e.g. "much to do"
-        elif func == "acl:relcl" and parent_upos == "ADJ":
+        elif t.func == "acl:relcl" and t.parent_upos == "ADJ":
             pass    # coerced to nominal, e.g. "the least we can do"
-        elif func == "acl:relcl" and parent_upos == "DET" and (parent_lemma in ["all", "some", "any"]) or parent.lower()=="those":
+        elif t.func == "acl:relcl" and t.parent_upos == "DET" and (t.parent_lemma in ["all", "some", "any"]) or t.parent.lower()=="those":
             pass    # e.g. "those who like cheese"
-        elif docname == "newsgroup-groups.google.com_alt.animals_0084bdc731bfc8d8_ENG_20040905_212000-0001":
+        elif t.docname == "newsgroup-groups.google.com_alt.animals_0084bdc731bfc8d8_ENG_20040905_212000-0001":
             pass    # special case: "What We've Lost/VERB", published/acl by Little Brown
-        elif docname == "reviews-093655-0007":
+        elif t.docname == "reviews-093655-0007":
             pass    # special case: "the last/ADJ to get/acl my food"
         else:
-            print("WARN: " + parent_upos + " shouldn't have " + func + " dependent in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
+            warn("WARN: " + t.parent_upos + " shouldn't have " + t.func + " dependent in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
 
-    if func == "appos" and parent_upos not in ["NOUN", "PRON", "PROPN", "NUM", "SYM", "ADJ", "DET"] and parent_pos != "ADD":    # see issue #437 for VERB heads
-        if parent_func == "root":
+@dep_rule(deprel="appos")
+def appos_head(t):
+    if t.func == "appos" and t.parent_upos not in ["NOUN", "PRON", "PROPN", "NUM", "SYM", "ADJ", "DET"] and t.parent_pos != "ADD":    # see issue #437 for VERB heads
+        if t.parent_func == "root":
             pass    # Exception: key-value appos
-        elif parent_upos == "ADV" and parent_lemma == "here":
+        elif t.parent_upos == "ADV" and t.parent_lemma == "here":
             pass    # "here (California)"
         else:
-            print("WARN: " + parent_upos + " shouldn't have appos dependent in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func in ['fixed','goeswith','flat', 'conj'] and id < parent_id:
-        print("WARN: back-pointing func " + func + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func == "flat" and parent_upos == "PROPN" and upos == "NOUN":
-        print("WARN: PROPN-[flat]->NOUN - should be compound? " + func + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func in ['cc:preconj','cc','nmod:poss'] and id > parent_id:
-        if tok not in ["mia"]:
-            print("WARN: forward-pointing func " + func + " in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func == "aux:pass" and lemma != "be" and lemma != "get":
-        print("WARN: aux:pass must be 'be' or 'get'" + inname)
-
-    if lemma == "get" and upos == "AUX" and func != "aux:pass":
-        print("WARN: get/AUX should be aux:pass" + inname)
-
-    if lemma == "'s" and pos != "POS":
-        print("WARN: possessive 's must be tagged POS" + inname)
-
-    if func not in ["case","reparandum","goeswith"] and pos == "POS":
-        print("WARN: tag POS must have function case" + inname)
-
-    if pos in ["VBG","VBN","VBD"] and lemma.lower() == tok.lower():
-        t = tok.lower()
-        if pos == "VBN" and t in ["become","come","overcome","run","outrun","overrun"]:
+            warn("WARN: " + t.parent_upos + " shouldn't have appos dependent in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel=("fixed", "goeswith", "flat", "conj"))
+def back_pointing(t):
+    if t.func in ['fixed','goeswith','flat', 'conj'] and t.id < t.parent_id:
+        warn("WARN: back-pointing func " + t.func + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel="flat", upos="NOUN")
+def flat_noun(t):
+    if t.func == "flat" and t.parent_upos == "PROPN" and t.upos == "NOUN":
+        warn("WARN: PROPN-[flat]->NOUN - should be compound? " + t.func + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel=("cc:preconj", "cc", "nmod:poss"))
+def forward_pointing(t):
+    if t.func in ['cc:preconj','cc','nmod:poss'] and t.id > t.parent_id:
+        if t.tok not in ["mia"]:
+            warn("WARN: forward-pointing func " + t.func + " in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel="aux:pass")
+def aux_pass_lemma(t):
+    if t.func == "aux:pass" and t.lemma != "be" and t.lemma != "get":
+        warn("WARN: aux:pass must be 'be' or 'get'" + t.inname)
+
+@dep_rule(upos="AUX", lemma="get")
+def get_aux(t):
+    if t.lemma == "get" and t.upos == "AUX" and t.func != "aux:pass":
+        warn("WARN: get/AUX should be aux:pass" + t.inname)
+
+@dep_rule(lemma="'s")
+def possessive_s(t):
+    if t.lemma == "'s" and t.pos != "POS":
+        warn("WARN: possessive 's must be tagged POS" + t.inname)
+
+@dep_rule(xpos="POS")
+def pos_function(t):
+    if t.func not in ["case","reparandum","goeswith"] and t.pos == "POS":
+        warn("WARN: tag POS must have function case" + t.inname)
+
+@dep_rule(xpos=("VBG", "VBN", "VBD"))
+def past_participle_lemma(t):
+    if t.pos in ["VBG","VBN","VBD"] and t.lemma.lower() == t.tok.lower():
+        form = t.tok.lower()
+        if t.pos == "VBN" and form in ["become","come","overcome","run","outrun","overrun"]:
             pass
-        elif pos in ["VBN", "VBD"] and t in ["put","shut","cut","pre-cut","undercut",
+        elif t.pos in ["VBN", "VBD"] and form in ["put","shut","cut","pre-cut","undercut",
                                             "cost","cast","broadcast","forecast",
                                             "let","set","upset","shed","spread",
                                             "hurt","burst","bust",
@@ -638,338 +1530,497 @@ def flag_dep_warnings(id, tok, pos, upos, extpos, lemma, func, edeps, parent, pa
                                             #,"know","notice","reach","raise",]:
             pass
         else:
-            print("WARN: tag "+pos+" should have lemma distinct from word form" + inname)
+            warn("WARN: tag "+t.pos+" should have lemma distinct from word form" + t.inname)
 
-    if pos == "NNPS" and tok == lemma and tok.endswith("s") and func != "goeswith":
-        if tok not in ["Netherlands","Analytics","Olympics","Commons","Paralympics","Vans",
+@dep_rule(xpos="NNPS")
+def nnps_lemma(t):
+    if t.pos == "NNPS" and t.tok == t.lemma and t.tok.endswith("s") and t.func != "goeswith":
+        if t.tok not in ["Netherlands","Analytics","Olympics","Commons","Paralympics","Vans",
                        "Andes","Forties","Philippines"]:
-            print("WARN: tag "+pos+" should have lemma distinct from word form" + inname)
-
-    if pos == "NNS" and tok.lower() == lemma.lower() and lemma.endswith("s") and func != "goeswith":
-        if lemma not in NNS_PTAN_LEMMAS + NNPS_PTAN_LEMMAS + SING_AND_PLUR_S_LEMMAS:
-            if re.search(r"[0-9]+'?s$",lemma) is None:  # 1920s, 80s
-                print("WARN: tag "+pos+" should have lemma distinct from word form" + inname)
-                NNS_warnings[lemma] += 1
-
-    if pos in ("NN", "NNS") and parent_upos == "PROPN" and func == "compound":
+            warn("WARN: tag "+t.pos+" should have lemma distinct from word form" + t.inname)
+
+@dep_rule(xpos="NNS")
+def nns_lemma(t):
+    if t.pos == "NNS" and t.tok.lower() == t.lemma.lower() and t.lemma.endswith("s") and t.func != "goeswith":
+        if t.lemma not in NNS_PTAN_LEMMAS + NNPS_PTAN_LEMMAS + SING_AND_PLUR_S_LEMMAS:
+            if re.search(r"[0-9]+'?s$",t.lemma) is None:  # 1920s, 80s
+                warn("WARN: tag "+t.pos+" should have lemma distinct from word form" + t.inname)
+                current_sinks().nns_lemmas[t.lemma] += 1
+
+@dep_rule(deprel="compound", xpos=("NN", "NNS"))
+def compound_of_propn(t):
+    if t.pos in ("NN", "NNS") and t.parent_upos == "PROPN" and t.func == "compound":
         # test for exceptions (including several cases with determiners, though we don't check for the determiner directly)
-        if lemma in "rat|planet|person|house|extremist|degree|state|piece|day|downtown|age|level|era|foot|defence|force|re-run".split('|'):
+        if t.lemma in "rat|planet|person|house|extremist|degree|state|piece|day|downtown|age|level|era|foot|defence|force|re-run".split('|'):
             pass
-        elif lemma[0] in '0123456789':
+        elif t.lemma[0] in '0123456789':
             pass
-        elif (lemma,docname) in {('assistant','newsgroup-groups.google.com_alt.animals_0084bdc731bfc8d8_ENG_20040905_212000-0068'),
+        elif (t.lemma,t.docname) in {('assistant','newsgroup-groups.google.com_alt.animals_0084bdc731bfc8d8_ENG_20040905_212000-0068'),
                                  ('polyglot','weblog-juancole.com_juancole_20041018060600_ENG_20041018_060600-0012'),
                                  ('boy','answers-20111107200249AAIyCy5_ans-0005'),
                                  ('man','answers-20111107200249AAIyCy5_ans-0005'),
                                  ('majority','weblog-blogspot.com_dakbangla_20041028153019_ENG_20041028_153019-0017')}:
             pass
         else:
-            print("WARN: consider nmod:desc instead of compound" + inname)
-
-    if pos == "IN" and func=="compound:prt":
-        print("WARN: function " + func + " should have pos RP, not IN" + inname)
-
-    if pos == "CC" and func not in ["cc","cc:preconj","conj","reparandum","root","dep"] and not (parent_lemma=="whether" and func=="fixed"):
-        if not ("languages" in inname and tok == "and"):  # metalinguistic discussion in whow_languages
-            print("WARN: pos " + pos + " should normally have function cc or cc:preconj, not " + func + inname)
-
-    if func == "cc" and parent_func not in ["root","ccomp","conj","reparandum","parataxis"]:
-        if docname!="email-enronsent23_08-0006":   # exception for quoted acl
-            print("WARN: function " + func + " should not have parent function " + parent_func + inname)
-
-    if pos == "RP" and func not in ["compound:prt","conj"] or pos != "RP" and func=="compound:prt":
-        print("WARN: pos " + pos + " should not normally have function " + func + inname)
-
-    if pos != "CC" and func in ["cc","cc:preconj"]:
-        if func == "cc:preconj" or lemma not in ["/","rather","as","et","+","let","-"]:
-            print("WARN: function " + func + " should normally have pos CC, not " + pos + inname)
-
-    if func == "cc:preconj" and lemma not in ["both", "either", "neither"]:
-        print("WARN: cc:preconj should be restricted to both/either/neither, not " + pos + inname)
-
-    if pos == "VBG" and "very" in children:
-        print("WARN: pos " + pos + " should not normally have child 'very'" + inname)
-
-    if pos == "UH" and func=="advmod":
-        print("WARN: pos " + pos + " should not normally have function 'advmod'" + inname)
-
-    if func == "mark" and lemma in ["when", "how", "where", "why", "whenever", "wherever", "however"]:
-        print("WARN: WH adverbs should attach as advmod, not mark" + inname)
-
-    if pos =="IN" and func=="discourse":
-        print("WARN: pos " + pos + " should not normally have function 'discourse'" + inname)
-
-    if pos == "VBG" and "case" in child_funcs:
-        print("WARN: pos " + pos + " should not normally have child function 'case'" + inname)
-
-    if pos.startswith("V") and any([f.startswith("nmod") for f in child_funcs]):
-        print("WARN: pos " + pos + " should not normally have child function 'nmod.*'" + inname)
-
-    if pos in ["JJR","JJS","RBR","RBS"] and lemma == tok:
-        if lemma not in ["least","further","less","more"] and not lemma.endswith("most"):
-            print("WARN: comparative or superlative "+tok+" with tag "+pos+" should have positive lemma not " + lemma + inname)
-
-    if re.search(r"never|not|no|n't|n’t|’t|'t|nt|ne|pas|nit", tok, re.IGNORECASE) is None and func == "neg":
-        print(str(id) + docname)
-        print("WARN: mistagged negative" + inname)
-
-    if pos == "VBG" and func == "compound":
+            warn("WARN: consider nmod:desc instead of compound" + t.inname)
+
+@dep_rule(deprel="compound:prt", xpos="IN")
+def in_compound_prt(t):
+    if t.pos == "IN" and t.func=="compound:prt":
+        warn("WARN: function " + t.func + " should have pos RP, not IN" + t.inname)
+
+@dep_rule(xpos="CC")
+def cc_function(t):
+    if t.pos == "CC" and t.func not in ["cc","cc:preconj","conj","reparandum","root","dep"] and not (t.parent_lemma=="whether" and t.func=="fixed"):
+        if not ("languages" in t.inname and t.tok == "and"):  # metalinguistic discussion in whow_languages
+            warn("WARN: pos " + t.pos + " should normally have function cc or cc:preconj, not " + t.func + t.inname)
+
+@dep_rule(deprel="cc")
+def cc_parent(t):
+    if t.func == "cc" and t.parent_func not in ["root","ccomp","conj","reparandum","parataxis"]:
+        if t.docname!="email-enronsent23_08-0006":   # exception for quoted acl
+            warn("WARN: function " + t.func + " should not have parent function " + t.parent_func + t.inname)
+
+@dep_rule(xpos="RP")
+def rp_function(t):
+    if t.pos == "RP" and t.func not in ["compound:prt","conj"]:
+        warn("WARN: pos " + t.pos + " should not normally have function " + t.func + t.inname)
+
+@dep_rule(deprel="compound:prt")
+def compound_prt_pos(t):
+    if t.pos != "RP" and t.func=="compound:prt":
+        warn("WARN: pos " + t.pos + " should not normally have function " + t.func + t.inname)
+
+@dep_rule(deprel=("cc", "cc:preconj"))
+def cc_pos(t):
+    if t.pos != "CC" and t.func in ["cc","cc:preconj"]:
+        if t.func == "cc:preconj" or t.lemma not in ["/","rather","as","et","+","let","-"]:
+            warn("WARN: function " + t.func + " should normally have pos CC, not " + t.pos + t.inname)
+
+@dep_rule(deprel="cc:preconj")
+def preconj_lemma(t):
+    if t.func == "cc:preconj" and t.lemma not in ["both", "either", "neither"]:
+        warn("WARN: cc:preconj should be restricted to both/either/neither, not " + t.pos + t.inname)
+
+@dep_rule(xpos="VBG")
+def vbg_very(t):
+    if t.pos == "VBG" and "very" in t.children:
+        warn("WARN: pos " + t.pos + " should not normally have child 'very'" + t.inname)
+
+@dep_rule(deprel="advmod", xpos="UH")
+def uh_advmod(t):
+    if t.pos == "UH" and t.func=="advmod":
+        warn("WARN: pos " + t.pos + " should not normally have function 'advmod'" + t.inname)
+
+@dep_rule(deprel="mark", lemma=("when", "how", "where", "why", "whenever", "wherever", "however"))
+def wh_mark(t):
+    if t.func == "mark" and t.lemma in ["when", "how", "where", "why", "whenever", "wherever", "however"]:
+        warn("WARN: WH adverbs should attach as advmod, not mark" + t.inname)
+
+@dep_rule(deprel="discourse", xpos="IN")
+def in_discourse(t):
+    if t.pos =="IN" and t.func=="discourse":
+        warn("WARN: pos " + t.pos + " should not normally have function 'discourse'" + t.inname)
+
+@dep_rule(xpos="VBG")
+def vbg_case(t):
+    if t.pos == "VBG" and "case" in t.child_funcs:
+        warn("WARN: pos " + t.pos + " should not normally have child function 'case'" + t.inname)
+
+@dep_rule(xpos="V*")
+def verb_nmod(t):
+    if t.pos.startswith("V") and any([f.startswith("nmod") for f in t.child_funcs]):
+        warn("WARN: pos " + t.pos + " should not normally have child function 'nmod.*'" + t.inname)
+
+@dep_rule(xpos=("JJR", "JJS", "RBR", "RBS"))
+def degree_lemma(t):
+    if t.pos in ["JJR","JJS","RBR","RBS"] and t.lemma == t.tok:
+        if t.lemma not in ["least","further","less","more"] and not t.lemma.endswith("most"):
+            warn("WARN: comparative or superlative "+t.tok+" with tag "+t.pos+" should have positive lemma not " + t.lemma + t.inname)
+
+@dep_rule(deprel="neg")
+def negation(t):
+    if re.search(r"never|not|no|n't|n’t|’t|'t|nt|ne|pas|nit", t.tok, re.IGNORECASE) is None and t.func == "neg":
+        warn(str(t.id) + t.docname)
+        warn("WARN: mistagged negative" + t.inname)
+
+@dep_rule(deprel="compound", xpos="VBG")
+def vbg_compound(t):
+    if t.pos == "VBG" and t.func == "compound":
         # Check phrasal compound exceptions where gerund clause is a compound modifier:
         # "'we're *losing* $X - fix it' levels of pressure
-        if tok not in ["losing"]:
-            print("WARN: gerund compound modifier should be tagged as NN not VBG" + inname)
-
-    if pos == "VBZ" and lemma == "be" and func in ["aux", "aux:pass"] and parent_lemma == "get" and parent_pos == "VBN":
-        print("WARN: \"'s got\" clitic lemma should be \"have\" not \"be\"? " + inname)
-
-    if upos=="VERB" and func.split(':')[0] in ["obj","nsubj","iobj","nmod","obl","expl"]:
-        if not (pos == "VBG" and tok == "following") and not (pos == "VBN" and tok == "attached"):  # Exception: nominalized "the following/attached"
-            print("WARN: verb should not have nominal argument structure function " + func + inname)
-
-    if pos.startswith("NN") and not pos.startswith("NNP") and func=="amod":
-        print("WARN: tag "+ pos + " should not be " + func + inname)
-
+        if t.tok not in ["losing"]:
+            warn("WARN: gerund compound modifier should be tagged as NN not VBG" + t.inname)
+
+@dep_rule(deprel=("aux", "aux:pass"), xpos="VBZ", lemma="be")
+def s_got(t):
+    if t.pos == "VBZ" and t.lemma == "be" and t.func in ["aux", "aux:pass"] and t.parent_lemma == "get" and t.parent_pos == "VBN":
+        warn("WARN: \"'s got\" clitic lemma should be \"have\" not \"be\"? " + t.inname)
+
+@dep_rule(deprel=("obj*", "nsubj*", "iobj*", "nmod*", "obl*", "expl*"), upos="VERB")
+def verb_nominal_function(t):
+    if t.upos=="VERB" and t.func.split(':')[0] in ["obj","nsubj","iobj","nmod","obl","expl"]:
+        if not (t.pos == "VBG" and t.tok == "following") and not (t.pos == "VBN" and t.tok == "attached"):  # Exception: nominalized "the following/attached"
+            warn("WARN: verb should not have nominal argument structure function " + t.func + t.inname)
+
+@dep_rule(deprel="amod", xpos="NN*")
+def noun_amod(t):
+    if t.pos.startswith("NN") and not t.pos.startswith("NNP") and t.func=="amod":
+        warn("WARN: tag "+ t.pos + " should not be " + t.func + t.inname)
+
+@dep_rule(lemma="be")
+def be_function(t):
     be_funcs = ["root", "cop", "aux", "aux:pass", "csubj", "ccomp", "xcomp",    # TODO: if Promoted=Yes is implemented, some of these funcs should check for it
                 "acl", "acl:relcl", "advcl", "advcl:relcl", "conj", "parataxis", "reparandum"]
-    if lemma == "be" and func not in be_funcs:
-        if parent_lemma == "that" and func == "fixed":  # Exception for 'that is' as mwe
+    if t.lemma == "be" and t.func not in be_funcs:
+        if t.parent_lemma == "that" and t.func == "fixed":  # Exception for 'that is' as mwe
             pass
-        elif parent_lemma == "all" and func == "compound":  # Exception for 'be all, end all'
+        elif t.parent_lemma == "all" and t.func == "compound":  # Exception for 'be all, end all'
             pass
-        elif func == "appos" and parent_func == "root": # Exception for key-value pair appos
+        elif t.func == "appos" and t.parent_func == "root": # Exception for key-value pair appos
             pass
         else:
-            print("WARN: invalid dependency of lemma 'be' > " + func + inname)
-
-    if parent_lemma in ["tell","show","give","pay","charge","bill","teach","owe","text","write"] and \
-            tok in ["him","her","me","us","you"] and func=="obj":
-        print("WARN: person object of ditransitive expected to be iobj, not obj" + inname)
-    
-    # verbs checked for obj to be converted to iobj:
-    # cause|pardon|tell|ask|show|teach|email|cc|bcc|believe|trust|ask|allow|permit|pay|explain|convince|persuade|urge|advise|inform|notify|warn|command|instruct|remind|promise|assure|reassure|guarantee
-    if "obj" in child_funcs and {"ccomp", "xcomp"} & set(child_funcs) and lemma in ["tell", "ask", "show",
-        "allow", "permit", "cause", "pardon",
-        "pay",
-        "thank", # thank God that...
-        "believe", "trust",
-        "explain",  # explain me that... (not quite grammatical)
-        "convince", "persuade", "teach",
-        "urge", "advise", "inform", "notify", "warn", "command", "instruct", "remind", 
-        "email", "cc", "bcc",
-        "promise", "assure", "reassure", "guarantee"]:
+            warn("WARN: invalid dependency of lemma 'be' > " + t.func + t.inname)
+
+@dep_rule(deprel="obj")
+def ditransitive_person_obj(t):
+    if t.parent_lemma in ["tell","show","give","pay","charge","bill","teach","owe","text","write"] and\
+            t.tok in ["him","her","me","us","you"] and t.func=="obj":
+        warn("WARN: person object of ditransitive expected to be iobj, not obj" + t.inname)
+
+# verbs checked for obj to be converted to iobj:
+# cause|pardon|tell|ask|show|teach|email|cc|bcc|believe|trust|ask|allow|permit|pay|explain|convince|persuade|urge|advise|inform|notify|warn|command|instruct|remind|promise|assure|reassure|guarantee
+IOBJ_COMP_LEMMAS = ["tell", "ask", "show",
+    "allow", "permit", "cause", "pardon",
+    "pay",
+    "thank", # thank God that...
+    "believe", "trust",
+    "explain",  # explain me that... (not quite grammatical)
+    "convince", "persuade", "teach",
+    "urge", "advise", "inform", "notify", "warn", "command", "instruct", "remind",
+    "email", "cc", "bcc",
+    "promise", "assure", "reassure", "guarantee"]
+
+@dep_rule(lemma=IOBJ_COMP_LEMMAS)
+def obj_with_comp(t):
+    if "obj" in t.child_funcs and {"ccomp", "xcomp"} & set(t.child_funcs) and t.lemma in IOBJ_COMP_LEMMAS:
         # Note that the test for iobj is that the verb licenses iobj+obj or iobj+ccomp. 
         # So e.g. "encourage" is ruled out, while "allow" and "permit" are included because of "allow you an exception" etc.
         # Idiom exceptions: have+idea(obj) that..., give a damn(obj) that..., make up + mind(obj) that...
         # TODO: see them as they are?
-        if lemma in ["believe","show"]:
-            print("WARN: verb expects iobj, not obj, with ccomp/xcomp (" + lemma + " -- OK if raising-to-object)" + inname)
+        if t.lemma in ["believe","show"]:
+            warn("WARN: verb expects iobj, not obj, with ccomp/xcomp (" + t.lemma + " -- OK if raising-to-object)" + t.inname)
         else:
-            print("WARN: verb expects iobj, not obj, with ccomp/xcomp (" + lemma + ")" + inname)
-
-    if func == "aux" and lemma.lower() != "be" and lemma.lower() != "have" and lemma.lower() !="do" and pos!="MD" and pos!="TO":
-        print("WARN: aux must be modal, 'be,' 'have,' or 'do'" + inname)
-
-    if func == "xcomp" and pos in ["VBP","VBZ","VBD"]:
-        if parent_lemma not in ["=","seem"]:
-            print("WARN: xcomp verb should be non-finite, not tag " + pos + inname)
-
-    if parent_pos is None:
-        assert False,(id,docname)
-
-    if func == "xcomp" and pos in ["VB"] and parent_pos.startswith("N"):
-        print("WARN: infinitive child of a noun should be acl not xcomp" + inname)
-
-    if func =="xcomp" and parent_lemma == "be":
-        print("WARN: verb lemma 'be' should not have xcomp child" + inname)
-
+            warn("WARN: verb expects iobj, not obj, with ccomp/xcomp (" + t.lemma + ")" + t.inname)
+
+@dep_rule(deprel="aux")
+def aux_lemma(t):
+    if t.func == "aux" and t.lemma.lower() != "be" and t.lemma.lower() != "have" and t.lemma.lower() !="do" and t.pos!="MD" and t.pos!="TO":
+        warn("WARN: aux must be modal, 'be,' 'have,' or 'do'" + t.inname)
+
+@dep_rule(deprel="xcomp", xpos=("VBP", "VBZ", "VBD"))
+def finite_xcomp(t):
+    if t.func == "xcomp" and t.pos in ["VBP","VBZ","VBD"]:
+        if t.parent_lemma not in ["=","seem"]:
+            warn("WARN: xcomp verb should be non-finite, not tag " + t.pos + t.inname)
+
+@dep_rule(deprel="xcomp", xpos="VB")
+def xcomp_of_noun(t):
+    if t.func == "xcomp" and t.pos in ["VB"] and t.parent_pos.startswith("N"):
+        warn("WARN: infinitive child of a noun should be acl not xcomp" + t.inname)
+
+@dep_rule(deprel="xcomp")
+def xcomp_of_be(t):
+    if t.func =="xcomp" and t.parent_lemma == "be":
+        warn("WARN: verb lemma 'be' should not have xcomp child" + t.inname)
+
+@dep_rule(deprel=("!csubj", "!ccomp", "!xcomp", "!advcl", "!acl", "!acl:relcl", "!advcl:relcl", "!csubj:pass", "!root", "!list", "!parataxis", "!conj", "!appos", "!reparandum", "!dislocated", "!orphan", "!compound"),
+          child=("csubj", "nsubj", "nsubj:pass", "csubj:pass"))
+def subject_child(t):
     # Implements check from UniversalDependencies/docs#1066
-    if func not in ["csubj","ccomp","xcomp","advcl","acl","acl:relcl","advcl:relcl","csubj:pass","root","list","parataxis","conj","appos","reparandum","dislocated","orphan","compound"]:
-        if any([x in child_funcs for x in ["csubj","nsubj","nsubj:pass","csubj:pass"]]):
-            if extpos=="PROPN":   # exception for sentences used as names
+    if t.func not in ["csubj","ccomp","xcomp","advcl","acl","acl:relcl","advcl:relcl","csubj:pass","root","list","parataxis","conj","appos","reparandum","dislocated","orphan","compound"]:
+        if any([x in t.child_funcs for x in ["csubj","nsubj","nsubj:pass","csubj:pass"]]):
+            if t.extpos=="PROPN":   # exception for sentences used as names
                 pass
-            elif func=="discourse" and lemma in {"forbid", "guess", "know", "mean", "think"}:
+            elif t.func=="discourse" and t.lemma in {"forbid", "guess", "know", "mean", "think"}:
                 # some common discourse expressions: god forbid, you know, I mean
                 pass
             else:
-                print("WARN: "+func+" should not have subject child" + inname)
+                warn("WARN: "+t.func+" should not have subject child" + t.inname)
 
+@dep_rule(xpos="IN")
+def in_lemma(t):
     IN_not_like_lemma = ["vs", "vs.", "v", "ca", "that", "then", "a", "fro", "too", "til", "wether", "b/c"]  # incl. known typos
-    if pos == "IN" and tok.lower() not in IN_not_like_lemma and lemma != tok.lower() and func != "goeswith" and "goeswith" not in child_funcs:
-        print("WARN: pos IN should have lemma identical to lower cased token" + inname)
-    if pos == "DT" and lemma == "an":
-        print("WARN: lemma of 'an' should be 'a'" + inname)
-
-    if re.search(r"“|”|n’t|n`t|[’`](s|ve|d|ll|m|re|t)", lemma, re.IGNORECASE) is not None:
-        print(str(id) + docname)
-        print("WARN: non-ASCII character in lemma" + inname)
-
-    if pos == "POS" and lemma != "'s" and func != "goeswith":
-        print(str(id) + docname)
-        print("WARN: tag POS must have lemma " +'"'+ "'s" + '"' + inname)
-
-    if func == "goeswith" and lemma != "_":
-        print("WARN: deprel goeswith must have lemma '_'" + inname)
-
-    if func == "obj" and "case" in child_funcs and not (pos == "NNP" and any([x in children for x in ["'s","’s"]])):
-        print("WARN: obj should not have child case" + inname + str(children))
-
-    if func == "ccomp" and "mark" in child_funcs and not any([x in children for x in ["that","That","whether","if","Whether","If","wether","a"]]):
-        if "nsubj:outer" in child_funcs:
+    if t.pos == "IN" and t.tok.lower() not in IN_not_like_lemma and t.lemma != t.tok.lower() and t.func != "goeswith" and "goeswith" not in t.child_funcs:
+        warn("WARN: pos IN should have lemma identical to lower cased token" + t.inname)
+
+@dep_rule(xpos="DT", lemma="an")
+def an_lemma(t):
+    if t.pos == "DT" and t.lemma == "an":
+        warn("WARN: lemma of 'an' should be 'a'" + t.inname)
+
+# (no guard: tests the characters of any lemma)
+@dep_rule()
+def non_ascii_lemma(t):
+    if re.search(r"“|”|n’t|n`t|[’`](s|ve|d|ll|m|re|t)", t.lemma, re.IGNORECASE) is not None:
+        warn(str(t.id) + t.docname)
+        warn("WARN: non-ASCII character in lemma" + t.inname)
+
+@dep_rule(xpos="POS")
+def pos_lemma(t):
+    if t.pos == "POS" and t.lemma != "'s" and t.func != "goeswith":
+        warn(str(t.id) + t.docname)
+        warn("WARN: tag POS must have lemma " +'"'+ "'s" + '"' + t.inname)
+
+@dep_rule(deprel="goeswith")
+def goeswith_lemma(t):
+    if t.func == "goeswith" and t.lemma != "_":
+        warn("WARN: deprel goeswith must have lemma '_'" + t.inname)
+
+@dep_rule(deprel="obj")
+def obj_case(t):
+    if t.func == "obj" and "case" in t.child_funcs and not (t.pos == "NNP" and any([x in t.children for x in ["'s","’s"]])):
+        warn("WARN: obj should not have child case" + t.inname + str(t.children))
+
+@dep_rule(deprel="ccomp")
+def ccomp_mark(t):
+    if t.func == "ccomp" and "mark" in t.child_funcs and not any([x in t.children for x in ["that","That","whether","if","Whether","If","wether","a"]]):
+        if "nsubj:outer" in t.child_funcs:
             pass    # he said the reason was because...
         # to-infinitivals can be ccomp in certain circumstances
-        elif "advmod" in child_funcs and {"how","where"} & set(map(str.lower, children)) and "to" in children:
+        elif "advmod" in t.child_funcs and {"how","where"} & set(map(str.lower, t.children)) and "to" in t.children:
             pass    # "know how to..." or "tell s.o. how to..."
-        elif {"obj","obl"} & set(child_funcs) and {"what","who"} & set(map(str.lower, children)) and "to" in children:
+        elif {"obj","obl"} & set(t.child_funcs) and {"what","who"} & set(map(str.lower, t.children)) and "to" in t.children:
             pass    # what to do, who to talk to
-        elif parent_upos=="ADJ" and "to" in children:   # complement of adjective
+        elif t.parent_upos=="ADJ" and "to" in t.children:   # complement of adjective
             pass
-        elif parent_lemma in {"love","leave","make","feel","find","mean","need","say"} and "to" in children:
+        elif t.parent_lemma in {"love","leave","make","feel","find","mean","need","say"} and "to" in t.children:
             # some verbs license to-infinitival ccomps (sometimes due to it-extraposition)
             pass    # I would love to join; I leave it to you [to figure it out]; makes it impossible [to single out]; felt it necessary [to...]
         elif "newsgroup-groups.google.com_magicworld_04c89d43ff4fd6ea_ENG_20050104_152000-0021 @ token 8":
             pass    # it-extraposition: have it in you to...
-        elif "answers-20111108103354AAQzdFB_ans-0004 @ token 26" in inname:
+        elif "answers-20111108103354AAQzdFB_ans-0004 @ token 26" in t.inname:
             pass    # sentence is missing a word
         #elif not ((lemma == "lie" and "once" in children) or (lemma=="find" and ("see" in children or "associate" in children))):  # Exceptions
         else:
-            print("WARN: ccomp should not have child mark" + inname)
+            warn("WARN: ccomp should not have child mark" + t.inname)
+
+@dep_rule(deprel="acl:relcl", xpos="VB")
+def infinitive_relcl(t):
             # TODO: should all be fixed for EWT except "answers-20111108092321AAK0Eqp_ans-0025 @ token 6" (awaiting guideline on tough-constructions)
 
-    if func == "acl:relcl" and pos in ["VB"] and "to" in children and "cop" not in child_funcs and "aux" not in child_funcs:
-        print("WARN: infinitive with tag " + pos + " should be acl not acl:relcl" + inname)
+    if t.func == "acl:relcl" and t.pos in ["VB"] and "to" in t.children and "cop" not in t.child_funcs and "aux" not in t.child_funcs:
+        warn("WARN: infinitive with tag " + t.pos + " should be acl not acl:relcl" + t.inname)
 
-    if func == "acl:relcl" and parent_upos == "ADV":
-        print("WARN: dependent of adverb should be advcl:relcl not acl:relcl" + inname)
+@dep_rule(deprel="acl:relcl")
+def relcl_of_adverb(t):
+    if t.func == "acl:relcl" and t.parent_upos == "ADV":
+        warn("WARN: dependent of adverb should be advcl:relcl not acl:relcl" + t.inname)
 
+@dep_rule(upos="ADV")
+def adv_nominal_function(t):
     # ADV in nominal function of clause is probably a bug
-    if upos == "ADV" and func.startswith(('nsubj','obj','iobj')):
-        print("WARN: ADV with core nominal function "+ func + inname)
-    elif upos=="ADV" and func.startswith('obl') and not (set(child_funcs) & {'case','det'}):
-        print("WARN: ADV with function "+ func +" and no case or det dependent" + inname)
-
-    if upos == "ADV" and func.split(':')[0]=='amod':
-        print("WARN: ADV should not be amod" + inname)
-
-    if (upos == "ADV" or pos.startswith("RB")) and lemma == "at":
-        print("WARN: at/ADV/RB is forbidden" + inname)
-
-    if ("acl:relcl" in child_funcs or "advcl:relcl" in child_funcs) and edeps is not None:  # relativized element
+    if t.upos == "ADV" and t.func.startswith(('nsubj','obj','iobj')):
+        warn("WARN: ADV with core nominal function "+ t.func + t.inname)
+    elif t.upos=="ADV" and t.func.startswith('obl') and not (set(t.child_funcs) & {'case','det'}):
+        warn("WARN: ADV with function "+ t.func +" and no case or det dependent" + t.inname)
+
+@dep_rule(deprel="amod*", upos="ADV")
+def adv_amod(t):
+    if t.upos == "ADV" and t.func.split(':')[0]=='amod':
+        warn("WARN: ADV should not be amod" + t.inname)
+
+@dep_rule(lemma="at")
+def at_adverb(t):
+    if (t.upos == "ADV" or t.pos.startswith("RB")) and t.lemma == "at":
+        warn("WARN: at/ADV/RB is forbidden" + t.inname)
+
+@dep_rule(child=("acl:relcl", "advcl:relcl"))
+def relativized_edeps(t):
+    if ("acl:relcl" in t.child_funcs or "advcl:relcl" in t.child_funcs) and t.edeps is not None:  # relativized element
         # should (in most cases) have an enhanced dependency out of the relative clause
-        if len(edeps)<=1 or not any(rel.startswith(('nsubj','csubj','obj','obl','nmod','advmod','ccomp','xcomp')) and isinstance(h,int) and h>id for (rel,h) in edeps):
-            print("WARN: relativized word should have enhanced dependency within the relative clause" + inname)
+        if len(t.edeps)<=1 or not any(rel.startswith(('nsubj','csubj','obj','obl','nmod','advmod','ccomp','xcomp')) and isinstance(h,int) and h>t.id for (rel,h) in t.edeps):
+            warn("WARN: relativized word should have enhanced dependency within the relative clause" + t.inname)
 
-    if pos in ["VBG"] and "det" in child_funcs:
+@dep_rule(xpos="VBG")
+def vbg_det(t):
+    if t.pos in ["VBG"] and "det" in t.child_funcs:
         # Exceptions for phrasal compound in GUM_reddit_card and nominalization in GUM_academic_exposure
-        if tok != "prioritizing" and tok != "following":
-            print(str(id) + docname)
-            print("WARN: tag "+pos+" should not have a determinder 'det'" + inname)
-
-    if parent_lemma in ["let", "help"] and func=="ccomp":
-        print(f"WARN: verb '{parent_lemma}' should take xcomp clausal object, not ccomp" + inname)
-
-    if pos == "MD" and lemma not in ["can","must","will","shall","would","could","may","might","ought","should","need","dare"] and func != "goeswith":
-        print("WARN: lemma '"+lemma+"' is not a known modal verb for tag MD" + inname)
-
-    if lemma == "like" and pos == "UH" and func not in ["discourse","conj","reparandum"]:
-        print("WARN: lemma '"+lemma+"' with tag UH should have deprel discourse, not "+ func + inname)
-
-    if func in ["iobj","obj"] and parent_lemma in ["become","remain","stay"]:
-        print("WARN: verb '"+parent_lemma+"' should take xcomp not "+func+" argument" + inname)
-
-    if func in ["iobj","obj"] and "case" in child_funcs and "POS" not in child_pos:
-        print("WARN: function " + func +  " should not have non-possessive 'case' dependents" + inname)
-
-    if ":tmod" in func or ":npmod" in func:
+        if t.tok != "prioritizing" and t.tok != "following":
+            warn(str(t.id) + t.docname)
+            warn("WARN: tag "+t.pos+" should not have a determinder 'det'" + t.inname)
+
+@dep_rule(deprel="ccomp")
+def let_help_ccomp(t):
+    if t.parent_lemma in ["let", "help"] and t.func=="ccomp":
+        warn(f"WARN: verb '{t.parent_lemma}' should take xcomp clausal object, not ccomp" + t.inname)
+
+@dep_rule(xpos="MD")
+def modal_lemma(t):
+    if t.pos == "MD" and t.lemma not in ["can","must","will","shall","would","could","may","might","ought","should","need","dare"] and t.func != "goeswith":
+        warn("WARN: lemma '"+t.lemma+"' is not a known modal verb for tag MD" + t.inname)
+
+@dep_rule(xpos="UH", lemma="like")
+def like_uh(t):
+    if t.lemma == "like" and t.pos == "UH" and t.func not in ["discourse","conj","reparandum"]:
+        warn("WARN: lemma '"+t.lemma+"' with tag UH should have deprel discourse, not "+ t.func + t.inname)
+
+@dep_rule(deprel=("iobj", "obj"))
+def become_obj(t):
+    if t.func in ["iobj","obj"] and t.parent_lemma in ["become","remain","stay"]:
+        warn("WARN: verb '"+t.parent_lemma+"' should take xcomp not "+t.func+" argument" + t.inname)
+
+@dep_rule(deprel=("iobj", "obj"))
+def obj_non_possessive_case(t):
+    if t.func in ["iobj","obj"] and "case" in t.child_funcs and "POS" not in t.child_pos:
+        warn("WARN: function " + t.func +  " should not have non-possessive 'case' dependents" + t.inname)
+
+@dep_rule(deprel=("*:tmod*", "*:npmod*"))
+def deprecated_subtype(t):
+    if ":tmod" in t.func or ":npmod" in t.func:
         # https://github.com/UniversalDependencies/docs/issues/1028
-        print("WARN: function " + func +  " is deprecated, use :unmarked instead" + inname)
-
-    if func in ["nmod:unmarked","obl:unmarked"] and "case" in child_funcs:
-        print("WARN: function " + func +  " should not have 'case' dependents" + inname)
-    
-    if func.startswith("nmod") and parent_upos in ("DET","NUM") and parent_func.startswith("det"):
-        print("WARN: nominal dependent of " + parent_func + " dependent should be obl, not nmod" + inname)
-    elif func.startswith("obl") and parent_upos in ("DET","NUM") and parent_func.startswith(("nummod","compound")):
-        print("WARN: nominal dependent of " + parent_func + " dependent should be nmod, not obl" + inname)
-
-    if func in ["aux:pass","nsubj:pass"] and parent_pos not in ["VBN"]:
-        if not (("stardust" in docname and parent_lemma == "would") or parent_lemma == "Rated"):
-            print("WARN: function " + func + " should not be the child of pos " + parent_pos + inname)
-
+        warn("WARN: function " + t.func +  " is deprecated, use :unmarked instead" + t.inname)
+
+@dep_rule(deprel=("nmod:unmarked", "obl:unmarked"))
+def unmarked_case(t):
+    if t.func in ["nmod:unmarked","obl:unmarked"] and "case" in t.child_funcs:
+        warn("WARN: function " + t.func +  " should not have 'case' dependents" + t.inname)
+
+@dep_rule(deprel=("nmod*", "obl*"))
+def nmod_obl_of_det(t):
+    if t.func.startswith("nmod") and t.parent_upos in ("DET","NUM") and t.parent_func.startswith("det"):
+        warn("WARN: nominal dependent of " + t.parent_func + " dependent should be obl, not nmod" + t.inname)
+    elif t.func.startswith("obl") and t.parent_upos in ("DET","NUM") and t.parent_func.startswith(("nummod","compound")):
+        warn("WARN: nominal dependent of " + t.parent_func + " dependent should be nmod, not obl" + t.inname)
+
+@dep_rule(deprel=("aux:pass", "nsubj:pass"))
+def passive_parent(t):
+    if t.func in ["aux:pass","nsubj:pass"] and t.parent_pos not in ["VBN"]:
+        if not (("stardust" in t.docname and t.parent_lemma == "would") or t.parent_lemma == "Rated"):
+            warn("WARN: function " + t.func + " should not be the child of pos " + t.parent_pos + t.inname)
+
+@dep_rule(deprel="obl")
+def be_pp_head(t):
     # https://github.com/UniversalDependencies/UD_English-EWT/issues/572
-    if func == "obl" and parent_lemma == "be" and edge_direction == "R" and "expl" not in parent_child_funcs:
-        #print("WARN: 'be' should not be the head of 'be' + PP (it may be OK if the 'be' is promoted)" + inname)
-        if not is_parent_promoted:
-            print("WARN: 'be' should not be the head of 'be' + PP" + inname)
-
-    if func == "obl:agent" and (parent_pos not in ["VBN"] or "by" not in map(str.lower, children)):
-        print("WARN: function " + func +  " must be child of VBN with a 'by' dependent" + parent_pos + inname)
-
-    if child_funcs.count("obl:agent") > 1:
-        print("WARN: a token may have at most one obl:agent dependent" + inname)
-
-    if "obl:agent" in child_funcs and ("nsubj" in child_funcs or "csubj" in child_funcs) and not "nsubj:pass" in child_funcs:
-        print("WARN: a token cannot have both a *subj relation and obl:agent" + inname)
-
-    if pos in ["VBD","VBD","VBP"] and "aux" in child_funcs and "nsubj:outer" not in child_funcs:
-        print(str(id) + docname)
-        print("WARN: tag "+pos+" should not have auxiliaries 'aux'" + inname)
-
-    if lemma == "not" and func not in ["advmod","root","ccomp","amod","parataxis","reparandum","advcl","conj","orphan","fixed"]:
-        print("WARN: deprel "+func+" should not be used with lemma '"+lemma+"'" + inname)
-
-    if func == "xcomp" and parent_lemma in ["see","hear","notice"]:  # find
-        print("WARN: deprel "+func+" should not be used with perception verb lemma '"+parent_lemma+"' (should this be nsubj+ccomp?)" + inname)
-
-    if lemma == "have" and "ccomp" in child_funcs and ("obj" not in child_funcs or not set(children) & {"idea","clue"}) and "expl" not in child_funcs:
+    if t.func == "obl" and t.parent_lemma == "be" and t.edge_direction == "R" and "expl" not in t.parent_child_funcs:
+        #warn("WARN: 'be' should not be the head of 'be' + PP (it may be OK if the 'be' is promoted)" + inname)
+        if not t.is_parent_promoted:
+            warn("WARN: 'be' should not be the head of 'be' + PP" + t.inname)
+
+@dep_rule(deprel="obl:agent")
+def agent_parent(t):
+    if t.func == "obl:agent" and (t.parent_pos not in ["VBN"] or "by" not in map(str.lower, t.children)):
+        warn("WARN: function " + t.func +  " must be child of VBN with a 'by' dependent" + t.parent_pos + t.inname)
+
+@dep_rule(child="obl:agent")
+def multiple_agents(t):
+    if t.child_funcs.count("obl:agent") > 1:
+        warn("WARN: a token may have at most one obl:agent dependent" + t.inname)
+
+@dep_rule(child="obl:agent")
+def agent_with_subject(t):
+    if "obl:agent" in t.child_funcs and ("nsubj" in t.child_funcs or "csubj" in t.child_funcs) and not "nsubj:pass" in t.child_funcs:
+        warn("WARN: a token cannot have both a *subj relation and obl:agent" + t.inname)
+
+@dep_rule(xpos=("VBD", "VBP"))
+def finite_aux(t):
+    if t.pos in ["VBD","VBD","VBP"] and "aux" in t.child_funcs and "nsubj:outer" not in t.child_funcs:
+        warn(str(t.id) + t.docname)
+        warn("WARN: tag "+t.pos+" should not have auxiliaries 'aux'" + t.inname)
+
+@dep_rule(lemma="not")
+def not_function(t):
+    if t.lemma == "not" and t.func not in ["advmod","root","ccomp","amod","parataxis","reparandum","advcl","conj","orphan","fixed"]:
+        warn("WARN: deprel "+t.func+" should not be used with lemma '"+t.lemma+"'" + t.inname)
+
+@dep_rule(deprel="xcomp")
+def perception_xcomp(t):
+    if t.func == "xcomp" and t.parent_lemma in ["see","hear","notice"]:  # find
+        warn("WARN: deprel "+t.func+" should not be used with perception verb lemma '"+t.parent_lemma+"' (should this be nsubj+ccomp?)" + t.inname)
+
+@dep_rule(lemma="have")
+def have_ccomp(t):
+    if t.lemma == "have" and "ccomp" in t.child_funcs and ("obj" not in t.child_funcs or not set(t.children) & {"idea","clue"}) and "expl" not in t.child_funcs:
         # exceptional idioms: 'have no idea/clue', 'rumor has it'
-        print("WARN: 'have' token has suspicious ccomp dependent (should it be xcomp?)" + inname)
-
-    if "obj" in child_funcs and "ccomp" in child_funcs:
-        print("WARN: token has both obj and ccomp children" + inname)
-
-    if child_funcs.count("ccomp") + child_funcs.count("xcomp") > 1 and "expl" not in child_funcs:
-        print("WARN: token has multiple (c|x)comp dependents (usually an error if not extraposition)" + inname)
-
-    if func == "acl" and (pos.endswith("G") or pos.endswith("N")) and parent_id == id + 1:  # premodifier V.G/N should be amod not acl
-        print("WARN: back-pointing " + func + " for adjacent premodifier (should be amod?) in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func == "advcl" and upos=="VERB" and (pos.endswith("G") or pos.endswith("N")) and parent_upos in ["NUM","SYM","NOUN","PRON","PROPN","DET"] and not is_parent_copular and parent_func!="root":
-        print("WARN: non-predicate non-root nominal should not have advcl dependent (should be acl?) in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-
-    if func.endswith("unmarked") and pos.startswith("RB"):
-        print("WARN: adverbs should not be unmarked" + inname)
-
-    if func == "case" and lemma in ["back", "down", "over", "out", "up"] and parent_lemma in ["here","there"] and id+1==parent_id:
+        warn("WARN: 'have' token has suspicious ccomp dependent (should it be xcomp?)" + t.inname)
+
+@dep_rule(child="ccomp")
+def obj_and_ccomp(t):
+    if "obj" in t.child_funcs and "ccomp" in t.child_funcs:
+        warn("WARN: token has both obj and ccomp children" + t.inname)
+
+@dep_rule(child=("ccomp", "xcomp"))
+def multiple_comps(t):
+    if t.child_funcs.count("ccomp") + t.child_funcs.count("xcomp") > 1 and "expl" not in t.child_funcs:
+        warn("WARN: token has multiple (c|x)comp dependents (usually an error if not extraposition)" + t.inname)
+
+@dep_rule(deprel="acl", xpos=("*G", "*N"))
+def premodifier_acl(t):
+    if t.func == "acl" and (t.pos.endswith("G") or t.pos.endswith("N")) and t.parent_id == t.id + 1:  # premodifier V.G/N should be amod not acl
+        warn("WARN: back-pointing " + t.func + " for adjacent premodifier (should be amod?) in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel="advcl", xpos=("*G", "*N"), upos="VERB")
+def nominal_advcl(t):
+    if t.func == "advcl" and t.upos=="VERB" and (t.pos.endswith("G") or t.pos.endswith("N")) and t.parent_upos in ["NUM","SYM","NOUN","PRON","PROPN","DET"] and not t.is_parent_copular and t.parent_func!="root":
+        warn("WARN: non-predicate non-root nominal should not have advcl dependent (should be acl?) in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(deprel="*unmarked", xpos="RB*")
+def unmarked_adverb(t):
+    if t.func.endswith("unmarked") and t.pos.startswith("RB"):
+        warn("WARN: adverbs should not be unmarked" + t.inname)
+
+@dep_rule(deprel="case", lemma=("back", "down", "over", "out", "up"))
+def particle_case(t):
+    if t.func == "case" and t.lemma in ["back", "down", "over", "out", "up"] and t.parent_lemma in ["here","there"] and t.id+1==t.parent_id:
         # adjacency check because "out of there" is OK
-        print("WARN: '"+lemma+" "+parent_lemma+"' should probably be advmod not case" + inname)
+        warn("WARN: '"+t.lemma+" "+t.parent_lemma+"' should probably be advmod not case" + t.inname)
 
-    if func == "case" and upos == "SCONJ" and "fixed" not in child_funcs:
-        print("WARN: SCONJ/case combination is invalid in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-    
+@dep_rule(deprel="case", upos="SCONJ")
+def sconj_case(t):
+    if t.func == "case" and t.upos == "SCONJ" and "fixed" not in t.child_funcs:
+        warn("WARN: SCONJ/case combination is invalid in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+
+@dep_rule(lemma=("anytime", "anyplace", "anywhere", "sometime", "someplace", "somewhere", "nowhere"))
+def indefinite_proform(t):
     # indefinites of time and place
-    if lemma in ["anytime", "anyplace", "anywhere", "sometime", "someplace", "somewhere", "nowhere"]:
-        if (pos != "RB" or upos != "ADV"):
+    if t.lemma in ["anytime", "anyplace", "anywhere", "sometime", "someplace", "somewhere", "nowhere"]:
+        if (t.pos != "RB" or t.upos != "ADV"):
             # https://github.com/UniversalDependencies/UD_English-EWT/issues/132
-            print(f"WARN: indefinite time or place pro-form tagging {upos}/{pos} is invalid, should be ADV/RB in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
-        if func.startswith("obl:"):
-            print(f"WARN: indefinite time or place pro-form tagging {upos}/{pos} is invalid, should be ADV/RB in " + docname + " @ token " + str(id) + " (" + tok + " <- " + parent + ")")
+            warn(f"WARN: indefinite time or place pro-form tagging {t.upos}/{t.pos} is invalid, should be ADV/RB in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
+        if t.func.startswith("obl:"):
+            warn(f"WARN: indefinite time or place pro-form tagging {t.upos}/{t.pos} is invalid, should be ADV/RB in " + t.docname + " @ token " + str(t.id) + " (" + t.tok + " <- " + t.parent + ")")
 
+@dep_rule(deprel="!reparandum", xpos="EX")
+def existential(t):
     """
     Existential construction
 
     X.xpos=EX <=> X.deprel=expl & X.lemma=there
     X.xpos=EX => X.upos=PRON
     X.parent.lemma=be => X.parent.upos=VERB
+
+    (split into rules by what the token must have: EX; expl+there; subject there; EX again for the parent)
     """
-    if func!="reparandum":
-        _ex_tag = (pos=="EX")
-        _expl_there = (func=="expl" and lemma=="there")
-        if _ex_tag != _expl_there or (_ex_tag and upos!="PRON"):
-            print("WARN: 'there' with " + pos + " and " + upos + inname)
-        if lemma=="there" and not _ex_tag and 'nsubj' in func:
-            print("WARN: subject 'there' not tagged as EX/expl" + inname)
-        if _ex_tag and parent_lemma=="be" and parent_upos!="VERB":
-            print(f"WARN: existential BE should be VERB, is {parent_upos}" + inname)
+    if t.pos=="EX" and t.func!="reparandum" and (not (t.func=="expl" and t.lemma=="there") or t.upos!="PRON"):
+        warn("WARN: 'there' with " + t.pos + " and " + t.upos + t.inname)
+
+@dep_rule(deprel="expl", lemma="there")
+def expl_there_tag(t):
+    if t.func=="expl" and t.lemma=="there" and t.pos!="EX":
+        warn("WARN: 'there' with " + t.pos + " and " + t.upos + t.inname)
+
+@dep_rule(deprel=("*nsubj*", "!reparandum"), lemma="there")
+def subject_there(t):
+    if t.lemma=="there" and t.pos!="EX" and 'nsubj' in t.func and t.func!="reparandum":
+        warn("WARN: subject 'there' not tagged as EX/expl" + t.inname)
+
+@dep_rule(deprel="!reparandum", xpos="EX")
+def existential_be(t):
+    if t.pos=="EX" and t.func!="reparandum" and t.parent_lemma=="be" and t.parent_upos!="VERB":
+        warn(f"WARN: existential BE should be VERB, is {t.parent_upos}" + t.inname)
+
+@dep_rule(lemma="what")
+def what_det(t):
         # TODO: check "there seems to be/VERB" etc.
 
     """
@@ -977,9 +2028,11 @@ def flag_dep_warnings(id, tok, pos, upos, extpos, lemma, func, edeps, parent, pa
 
     X[lemma=what,xpos=WDT] <=> X[lemma=what,deprel=det|det:predet]
     """
-    if lemma=="what" and ((pos=="WDT") != (func in ["det", "det:predet"])):
-        print("WARN: what/WDT should correspond with det or det:predet" + inname)
+    if t.lemma=="what" and ((t.pos=="WDT") != (t.func in ["det", "det:predet"])):
+        warn("WARN: what/WDT should correspond with det or det:predet" + t.inname)
 
+@dep_rule(xpos="!NNS", upos=("!NUM", "!X"))
+def numeric_lemma(t):
     r"""
     Numerics
 
@@ -991,36 +2044,45 @@ def flag_dep_warnings(id, tok, pos, upos, extpos, lemma, func, edeps, parent, pa
     without { X.lemma=re"[0-9]+" }
     without { X.lemma=re"[^A-Za-z0-9]+" }
     """
-    if upos not in ["NUM","X"] and re.match(r'^[\d\W_]*\d[\d\W_]*$',lemma) and pos!="NNS" and lemma!="<3":  # and not re.match(r'^\d+$',lemma):
-        print("WARN: numeric lemma '" + lemma + "' is not NUM" + inname)
+    if t.upos not in ["NUM","X"] and re.match(r'^[\d\W_]*\d[\d\W_]*$',t.lemma) and t.pos!="NNS" and t.lemma!="<3":  # and not re.match(r'^\d+$',lemma):
+        warn("WARN: numeric lemma '" + t.lemma + "' is not NUM" + t.inname)
 
+@dep_rule(xpos=("''", "``"))
+def quotation_mark(t):
     #if func == "advmod" and lemma in ["where","when"] and parent_func == "acl:relcl":
-    #    print("WARN: lemma "+lemma+" should not be func '"+func+"' when it is the child of a '" + parent_func + "'" + inname)
+    #    warn("WARN: lemma "+lemma+" should not be func '"+func+"' when it is the child of a '" + parent_func + "'" + inname)
 
-    if (sent_position == "first" and pos == "''") or (sent_position == "last" and pos=="``"):
-        print("WARN: incorrect quotation mark tag " + pos + " at "+sent_position+" position in sentence" + inname)
+    if (t.sent_position == "first" and t.pos == "''") or (t.sent_position == "last" and t.pos=="``"):
+        warn("WARN: incorrect quotation mark tag " + t.pos + " at "+t.sent_position+" position in sentence" + t.inname)
 
+@dep_rule(child="fixed")
+def sort_kind(t):
     #if pos != "CD" and "quantmod" in child_funcs:
-    #    print("WARN: quantmod must be cardinal number" + inname)
+    #    warn("WARN: quantmod must be cardinal number" + inname)
 
-    if tok == "sort" or tok == "kind":
-        if "det" in child_funcs and "fixed" in child_funcs:
-            print("WARN: mistagged fixed expression" + inname)
+    if t.tok == "sort" or t.tok == "kind":
+        if "det" in t.child_funcs and "fixed" in t.child_funcs:
+            warn("WARN: mistagged fixed expression" + t.inname)
 
-    if tok == "rather" and "fixed" in child_funcs and func not in ["cc","mark"]:
-        print("WARN: 'rather than' fixed expression must be cc or mark" + inname)   # TODO: case might also be acceptable
+@dep_rule(deprel=("!cc", "!mark"), child="fixed")
+def rather_than(t):
+    if t.tok == "rather" and "fixed" in t.child_funcs and t.func not in ["cc","mark"]:
+        warn("WARN: 'rather than' fixed expression must be cc or mark" + t.inname)   # TODO: case might also be acceptable
 
-    if s_type == "imp" or s_type == "frag" or s_type == "ger" or s_type == "inf":
-        if func == "root" and "nsubj" in child_funcs:
+@dep_rule(deprel="root")
+def subjectless_root(t):
+    if t.s_type == "imp" or t.s_type == "frag" or t.s_type == "ger" or t.s_type == "inf":
+        if t.func == "root" and "nsubj" in t.child_funcs:
             # Exception for frag structures like "Whatever it is that ...", which is actually frag
             # and "don't you VERB", which is an imperative with a subject
-            if not ("acl:relcl" in child_funcs and "cop" in child_funcs and s_type=="frag") and \
-                    not (("do" in children or "Do" in children) and ("n't" in children or "not" in children)):
-                print("WARN: " + s_type + " root may not have nsubj" + inname)
+            if not ("acl:relcl" in t.child_funcs and "cop" in t.child_funcs and t.s_type=="frag") and\
+                    not (("do" in t.children or "Do" in t.children) and ("n't" in t.children or "not" in t.children)):
+                warn("WARN: " + t.s_type + " root may not have nsubj" + t.inname)
 
+@dep_rule(deprel="root")
+def q_root_wh(t):
     temp_wh = ["when", "how", "where", "why", "whenever", "while", "who", "whom", "which", "whoever", "whatever",
                "what", "whomever", "however"]
-
     #if s_type == "wh" and func == "root":
     #    tok_count = 0                            #This is meant to keep it from printing an error for every token.
     #    if tok.lower() not in temp_wh:
@@ -1028,94 +2090,100 @@ def flag_dep_warnings(id, tok, pos, upos, extpos, lemma, func, edeps, parent, pa
     #            if re.search(r"when|how|where|why|whenever|while|who.*|which|what.*", wh, re.IGNORECASE) is None:
     #                tok_count += 1
     #        if tok_count == len(children):
-    #            print("WARN: wh root must have wh child" + inname)
+    #            warn("WARN: wh root must have wh child" + inname)
 
-    if s_type == "q" and func == "root":
-        for wh in children:
+    if t.s_type == "q" and t.func == "root":
+        for wh in t.children:
             if wh in temp_wh:
-                if not any([c.lower()=="do" or c.lower()=="did" for c in children]):
-                    if not (tok == "Remember" and wh == "when") and not (tok=="know" and wh=="what") and \
-                            not (tok =="Know" and wh=="when"):  # Listed exceptions in GUM_reddit_bobby, GUM_conversation_christmas, GUM_vlog_covid
-                        print("WARN: q root may not have wh child " + wh + inname)
-
-    suspicious_pos_tok = [("*","DT","only","RB"),
-                          ("no","RB","matter","RB")]
-
-    for w1, pos1, w2, pos2 in suspicious_pos_tok:
-        if w1 == prev_tok.lower() or w1 == "*":
-            if pos1 == prev_pos or pos1 == "*":
-                if w2 == lemma or w2 == "*":
-                    if pos2 == pos or pos2 == "*":
-                        print("WARN: suspicious n-gram " + prev_tok + "/" + prev_pos+" " + tok + "/" + pos + inname)
-
-    def check_bigram_fixed(w1, w2, parent_lemma, w2func, pos1, upos1, pos2, upos2, inname, outerdeprel=None):
-        """Verify a 2-word fixed expression has the correct structure and tags"""
-
-        try:
-            assert w2func=="fixed"
-            assert w1==parent_lemma
-            match (w1,w2, pos1,upos1, pos2,upos2):
-                case ("one", "another", "CD","PRON", "DT","DET"): pass
-                case ("each", "other", "DT","DET", "JJ","ADJ"): pass
-                case ("kind"|"sort", "of", "NN","NOUN", "IN","ADP"): pass
-                case ("at", "least", "IN","ADP", "JJS","ADJ"): pass
-                case ("rather", "than", "RB","ADV", "IN","ADP"|"SCONJ"): pass
-                case ("instead", "of", "RB","ADV", "IN","ADP"|"SCONJ"): pass
-                case _:
-                    assert False,(w1,w2)
-        except AssertionError:
-            print(f"WARN: structure of '{w1} {w2}' should not be fixed({w1}/{pos1}/{upos2}, {w2}/{pos2}/{upos2})" + inname)
-
-        try:
-            if (w1,w2) in {("kind", "of"), ("sort", "of"), ("at", "least")}:
-                assert outerdeprel=="advmod"
-        except AssertionError:
-            print(f"WARN: fixed expr '{w1} {w2}' should attach as advmod not {outerdeprel}" + inname)
-
-
+                if not any([c.lower()=="do" or c.lower()=="did" for c in t.children]):
+                    if not (t.tok == "Remember" and wh == "when") and not (t.tok=="know" and wh=="what") and\
+                            not (t.tok =="Know" and wh=="when"):  # Listed exceptions in GUM_reddit_bobby, GUM_conversation_christmas, GUM_vlog_covid
+                        warn("WARN: q root may not have wh child " + wh + t.inname)
+
+@dep_rule(ngram=True)
+def suspicious_ngram(t):
+    # n-grams (see NGRAM_PATTERNS) ending at this token
+    for ngram in t.ngrams:
+        if ngram == "suspicious n-gram":
+            warn("WARN: suspicious n-gram " + t.prev_tok + "/" + t.prev_pos+" " + t.tok + "/" + t.pos + t.inname)
+
+def check_bigram_fixed(w1, w2, parent_lemma, w2func, pos1, upos1, pos2, upos2, inname, outerdeprel=None):
+    """Verify a 2-word fixed expression has the correct structure and tags"""
+
+    try:
+        assert w2func=="fixed"
+        assert w1==parent_lemma
+        match (w1,w2, pos1,upos1, pos2,upos2):
+            case ("one", "another", "CD","PRON", "DT","DET"): pass
+            case ("each", "other", "DT","DET", "JJ","ADJ"): pass
+            case ("kind"|"sort", "of", "NN","NOUN", "IN","ADP"): pass
+            case ("at", "least", "IN","ADP", "JJS","ADJ"): pass
+            case ("rather", "than", "RB","ADV", "IN","ADP"|"SCONJ"): pass
+            case ("instead", "of", "RB","ADV", "IN","ADP"|"SCONJ"): pass
+            case _:
+                assert False,(w1,w2)
+    except AssertionError:
+        warn(f"WARN: structure of '{w1} {w2}' should not be fixed({w1}/{pos1}/{upos2}, {w2}/{pos2}/{upos2})" + inname)
+
+    try:
+        if (w1,w2) in {("kind", "of"), ("sort", "of"), ("at", "least")}:
+            assert outerdeprel=="advmod"
+    except AssertionError:
+        warn(f"WARN: fixed expr '{w1} {w2}' should attach as advmod not {outerdeprel}" + inname)
+
+@dep_rule(ngram=True)
+def bigram_structure(t):
     # UPOS bigrams
-    if prev_tok.lower()=="no" and lemma=="one" and upos!="PRON":
-        print("WARN: UPOS should be one/PRON in 'no one': " + upos + inname)
-    elif prev_tok.lower()=="one" and lemma=="another":
-        check_bigram_fixed("one", "another", parent_lemma, func, prev_pos, prev_upos, pos, upos, inname)
-    elif prev_tok.lower()=="each" and lemma=="other":
-        check_bigram_fixed("each", "other", parent_lemma, func, prev_pos, prev_upos, pos, upos, inname)
-    elif func=="fixed" and (prev_tok.lower(),lemma) in {("kind","of"),("sort","of"),("instead","of"),("rather","than"),("at","least")}:
-        check_bigram_fixed(prev_tok.lower(), lemma, parent_lemma, func, prev_pos, prev_upos, pos, upos, inname, prev_func)
-    elif prev_tok.lower()=="a" and lemma=="couple":
+    if not t.ngrams:
+        pass
+    elif "no one" in t.ngrams:
+        if t.upos!="PRON":
+            warn("WARN: UPOS should be one/PRON in 'no one': " + t.upos + t.inname)
+    elif "one another" in t.ngrams:
+        check_bigram_fixed("one", "another", t.parent_lemma, t.func, t.prev_pos, t.prev_upos, t.pos, t.upos, t.inname)
+    elif "each other" in t.ngrams:
+        check_bigram_fixed("each", "other", t.parent_lemma, t.func, t.prev_pos, t.prev_upos, t.pos, t.upos, t.inname)
+    elif "fixed bigram" in t.ngrams:
+        if t.func=="fixed":
+            check_bigram_fixed(t.prev_tok.lower(), t.lemma, t.parent_lemma, t.func, t.prev_pos, t.prev_upos, t.pos, t.upos, t.inname, t.prev_func)
+    elif "a couple" in t.ngrams:
         try:
-            assert prev_func=="det"
-            assert prev_parent_lemma=="couple"
-            assert func not in ('nummod', 'compound', 'fixed')
-            if func=="nmod":
-                assert "case" in child_funcs
+            assert t.prev_func=="det"
+            assert t.prev_parent_lemma=="couple"
+            assert t.func not in ('nummod', 'compound', 'fixed')
+            if t.func=="nmod":
+                assert "case" in t.child_funcs
         except AssertionError:
-            print("WARN: structure of 'a couple NOUN' should be det(couple, a), nmod:unmarked(NOUN, couple)" + inname)
-    elif prev_tok.lower()=="and" and lemma=="/":
+            warn("WARN: structure of 'a couple NOUN' should be det(couple, a), nmod:unmarked(NOUN, couple)" + t.inname)
+    elif "and/" in t.ngrams:
         try:
-            assert prev_pos=="CC"
-            assert prev_upos=="CCONJ"
-            assert func=="cc"
-            assert parent_lemma=="or"
-            assert pos=="SYM"
-            assert upos=="SYM"
-            assert ("cc", parent_id) in edeps,(parent_id,edeps)
+            assert t.prev_pos=="CC"
+            assert t.prev_upos=="CCONJ"
+            assert t.func=="cc"
+            assert t.parent_lemma=="or"
+            assert t.pos=="SYM"
+            assert t.upos=="SYM"
+            assert ("cc", t.parent_id) in t.edeps,(t.parent_id,t.edeps)
         except AssertionError as ex:
-            print("WARN: structure of 'and/or' should be conj(and/CC/CCONJ, cc(or/CC/CCONJ, '/'/SYM/SYM)) and E:cc(or, '/')" + inname)
-            traceback.print_tb(ex.__traceback__, limit=1, file=sys.stdout)
-    elif prev_tok.lower()=="/" and lemma=="or":
+            warn("WARN: structure of 'and/or' should be conj(and/CC/CCONJ, cc(or/CC/CCONJ, '/'/SYM/SYM)) and E:cc(or, '/')" + t.inname
+                 + "\n" + "".join(traceback.format_tb(ex.__traceback__, limit=1)).rstrip("\n"))
+    elif "/or" in t.ngrams:
         try:
-            assert prev_pos=="SYM"
-            assert prev_upos=="SYM"
-            assert func=="conj"
-            assert parent_lemma=="and"
-            assert pos=="CC"
-            assert upos=="CCONJ"
-            assert ("conj:slash", parent_id) in edeps,(parent_id,edeps)
-            assert any(rel=="cc" for (rel,h) in edeps),(parent_id,edeps)
+            assert t.prev_pos=="SYM"
+            assert t.prev_upos=="SYM"
+            assert t.func=="conj"
+            assert t.parent_lemma=="and"
+            assert t.pos=="CC"
+            assert t.upos=="CCONJ"
+            assert ("conj:slash", t.parent_id) in t.edeps,(t.parent_id,t.edeps)
+            assert any(rel=="cc" for (rel,h) in t.edeps),(t.parent_id,t.edeps)
         except AssertionError as ex:
-            print("WARN: structure of 'and/or' should be conj(and/CC/CCONJ, cc(or/CC/CCONJ, '/'/SYM/SYM)) and E:conj(and, or) and E:cc(*, or)" + inname)
-            traceback.print_tb(ex.__traceback__, limit=1, file=sys.stdout)
+            warn("WARN: structure of 'and/or' should be conj(and/CC/CCONJ, cc(or/CC/CCONJ, '/'/SYM/SYM)) and E:conj(and, or) and E:cc(*, or)" + t.inname
+                 + "\n" + "".join(traceback.format_tb(ex.__traceback__, limit=1)).rstrip("\n"))
+
+AGREEMENT_FEATURES = FEATURE_BITS.features("Number", "Person", "Tense")
+FINITE_FEATURES = FEATURE_BITS.features("Number", "Person", "Tense", "Mood")
+VOICE_FEATURE = FEATURE_BITS.feature("Voice")
 
 def flag_feats_warnings(id, tok, pos, upos, lemma, feats, misc, docname):
     """
@@ -1137,171 +2205,180 @@ def flag_feats_warnings(id, tok, pos, upos, lemma, feats, misc, docname):
     if upos == "ADJ" and ((pos == "JJ") != (degree == "Pos")):
         # ADJ+NNP occurs in proper noun phrases per PTB guidelines
         if pos != "NNP" and pos != "AFX":   # TODO: map all AFX to X instead (#152)? if so remove the 2nd condition
-            print("WARN: ADJ+JJ should correspond with Degree=Pos in " + docname + " @ token " + str(id))
+            warn("WARN: ADJ+JJ should correspond with Degree=Pos in " + docname + " @ token " + str(id))
 
     # (ADJ+JJR | ADV+RBR) <=> [Degree=Cmp]
     if (upos == "ADJ" and pos == "JJR" or upos == "ADV" and pos == "RBR") != (degree == "Cmp"):
         # ADJ+NNP occurs in proper noun phrases per PTB guidelines
         if pos != "NNP":
-            print("WARN: ADJ+JJR or ADV+RBR should correspond with Degree=Cmp in " + docname + " @ token " + str(id))
+            warn("WARN: ADJ+JJR or ADV+RBR should correspond with Degree=Cmp in " + docname + " @ token " + str(id))
 
     # (ADJ+JJS | ADV+RBS) <=> [Degree=Sup]
     if (upos == "ADJ" and pos == "JJS" or upos == "ADV" and pos == "RBS") != (degree == "Sup"):
         # ADJ+NNP occurs in proper noun phrases per PTB guidelines
         if pos != "NNP":
-            print("WARN: ADJ+JJS or ADV+RBS should correspond with Degree=Sup in " + docname + " @ token " + str(id))
+            warn("WARN: ADJ+JJS or ADV+RBS should correspond with Degree=Sup in " + docname + " @ token " + str(id))
 
     if degree and upos not in ("ADJ", "ADV"):
-        print("WARN: Degree should only apply to ADJ or ADV in " + docname + " @ token " + str(id))
+        warn("WARN: Degree should only apply to ADJ or ADV in " + docname + " @ token " + str(id))
 
     if upos == "ADJ" and not degree:
-        print("WARN: ADJ should have Degree in " + docname + " @ token " + str(id))
+        warn("WARN: ADJ should have Degree in " + docname + " @ token " + str(id))
 
     if number and upos not in ("NOUN", "PRON", "PROPN", "SYM", "AUX", "DET", "VERB"):
-        print("WARN: Number should not apply to " + upos + " in " + docname + " @ token " + str(id))
+        warn("WARN: Number should not apply to " + upos + " in " + docname + " @ token " + str(id))
 
     # NUM+CD => NUM[NumType=Card]
     if upos == "NUM" and pos == "CD" and not (numType in ["Card","Frac"]):
         # NumType=Frac applied to decimals modeled after GUM (discussed at https://github.com/UniversalDependencies/UD_English-PUD/issues/22)
-        print("WARN: NUM+CD should correspond with NumType=Card or NumType=Frac in " + docname + " @ token " + str(id))
+        warn("WARN: NUM+CD should correspond with NumType=Card or NumType=Frac in " + docname + " @ token " + str(id))
 
     if pos == "LS" and upos != "NUM" and re.search(r'\w', lemma):
-        print("WARN: alphanumeric LS should be NUM in " + docname + " @ token " + str(id))
+        warn("WARN: alphanumeric LS should be NUM in " + docname + " @ token " + str(id))
 
     # NOUN+NN <=> NOUN[Number=Sing]
     if upos == "NOUN" and ((pos == "NN") != (number == "Sing")):
         # NOUN+GW can also have an optional Number=Sing feature
         if pos != "GW":
-            print("WARN: NOUN+NN should correspond with Number=Sing in " + docname + " @ token " + str(id))
+            warn("WARN: NOUN+NN should correspond with Number=Sing in " + docname + " @ token " + str(id))
+            if pos == "NN":
+                propose_fix("Number=Sing on NOUN+NN", docname, id, "Number", "Sing")
 
     # etc. <=> NOUN+FW <=> Number=Plur; otherwise NOUN+NNS <=> NOUN[Number=Plur]
     if lemma == "etc.":
         if pos != "FW" or upos != "NOUN" or number != "Plur" or not feats.get("Abbr") == "Yes":
-            print("WARN: 'etc.' should correspond with NOUN+FW, Abbr=Yes|Number=Plur in " + docname + " @ token " + str(id))
+            warn("WARN: 'etc.' should correspond with NOUN+FW, Abbr=Yes|Number=Plur in " + docname + " @ token " + str(id))
     elif upos == "NOUN" and ((pos == "NNS") + (lemma in NNS_PTAN_LEMMAS or re.search(r"[0-9]+'?s$",lemma) is not None) + (number == "Ptan")) == 2:
-        print("WARN: pluralia tantum should have NNS, Number=Ptan: " + lemma + " in " + docname + " @ token " + str(id))
+        warn("WARN: pluralia tantum should have NNS, Number=Ptan: " + lemma + " in " + docname + " @ token " + str(id))
     elif upos == "NOUN" and ((pos == "NNS") != (number == "Plur")) and lemma not in NNS_PTAN_LEMMAS and re.search(r"[0-9]+'?s$",lemma) is None:
-        print("WARN: NOUN+NNS should correspond with Number=Plur in " + docname + " @ token " + str(id))
+        warn("WARN: NOUN+NNS should correspond with Number=Plur in " + docname + " @ token " + str(id))
+        if pos == "NNS":
+            propose_fix("Number=Plur on NOUN+NNS", docname, id, "Number", "Plur")
 
     # pluralized years
     if number == "Ptan" and re.search(r"[0-9]+'?s$",lemma) is not None:
         if numType != "Card" or feats["NumForm"] != "Combi":
-            print("WARN: pluralized decimal year expecting NumForm=Combi|NumType=Card in " + docname + " @ token " + str(id))
+            warn("WARN: pluralized decimal year expecting NumForm=Combi|NumType=Card in " + docname + " @ token " + str(id))
         if not lemma.endswith("s") or ("'" in lemma and not lemma.startswith("'")):
-            print("WARN: pluralized year expecting simplified lemma instead of: " + lemma + " in " + docname + " @ token " + str(id))
+            warn("WARN: pluralized year expecting simplified lemma instead of: " + lemma + " in " + docname + " @ token " + str(id))
     elif number == "Ptan" and lemma.rsplit("-",1)[-1] in ["twenties", "thirties", "forties", "fifties", "sixties", "seventies", "eighties", "nineties"]:
         if numType != "Card" or feats["NumForm"] != "Word":
-            print("WARN: pluralized spelled-out year expecting NumForm=Word|NumType=Card in " + docname + " @ token " + str(id))
+            warn("WARN: pluralized spelled-out year expecting NumForm=Word|NumType=Card in " + docname + " @ token " + str(id))
 
     if (upos == "PART" and lemma == "not" or upos == "INTJ" and lemma == "no" or upos == "CCONJ" and lemma in ("nor", "neither")) != (feats.get("Polarity")=="Neg"):
-        print("WARN: not/PART and no/INTJ should correspond with Polarity=Neg in " + docname + " @ token " + str(id))
+        warn("WARN: not/PART and no/INTJ should correspond with Polarity=Neg in " + docname + " @ token " + str(id))
 
     if (upos == "INTJ" and lemma == "yes") != (feats.get("Polarity")=="Pos"):
-        print("WARN: yes/INTJ should correspond with Polarity=Pos in " + docname + " @ token " + str(id))
+        warn("WARN: yes/INTJ should correspond with Polarity=Pos in " + docname + " @ token " + str(id))
 
     # PRON+WP$ <=> PRON[Poss=Yes,PronType=Int,Rel]
     if upos == "PRON" and ((pos == "WP$") != (poss == "Yes" and pronType in ["Int","Rel"])):
-        print("WARN: PRON+WP$ should correspond with Poss=Yes|PronType=Int,Rel in " + docname + " @ token " + str(id))
+        warn("WARN: PRON+WP$ should correspond with Poss=Yes|PronType=Int,Rel in " + docname + " @ token " + str(id))
 
     # [PronType=Int,Rel] => WDT|WP|WRB
     # (upos=="X" for goeswith)
     if upos!="X" and pos not in ["WDT","WP","WRB"] and (poss is None and pronType in ["Int","Rel"]):
-        print("WARN: PronType=Int,Rel and not poss implies WP|WDT|WRB in " + docname + " @ token " + str(id))
+        warn("WARN: PronType=Int,Rel and not poss implies WP|WDT|WRB in " + docname + " @ token " + str(id))
     # WDT|WP|WRB => [PronType=Dem,Int,Rel]
     # (upos=="X" for goeswith)
     elif upos!="X" and (pos in ["WDT","WP","WRB"]) and not (poss is None and pronType in ["Dem","Int","Rel"]):
-        print("WARN: WP|WDT|WRB implies not poss and PronType=Dem,Int,Rel in " + docname + " @ token " + str(id))
+        warn("WARN: WP|WDT|WRB implies not poss and PronType=Dem,Int,Rel in " + docname + " @ token " + str(id))
 
     # PROPN+NNP <=> PROPN[Number=Sing]
     if upos == "PROPN" and ((pos == "NNP") != (number == "Sing")):
-        print("WARN: PROPN+NNP should correspond with Number=Sing in " + docname + " @ token " + str(id))
+        warn("WARN: PROPN+NNP should correspond with Number=Sing in " + docname + " @ token " + str(id))
+        if pos == "NNP":
+            propose_fix("Number=Sing on PROPN+NNP", docname, id, "Number", "Sing")
 
     # PROPN+NNPS <=> PROPN[Number=Plur]
     if upos == "PROPN" and ((pos == "NNPS") != (number == "Plur")) and lemma not in NNPS_PTAN_LEMMAS:
-        print("WARN: PROPN+NNPS should correspond with Number=Plur in " + docname + " @ token " + str(id))
+        warn("WARN: PROPN+NNPS should correspond with Number=Plur in " + docname + " @ token " + str(id))
+        if pos == "NNPS":
+            propose_fix("Number=Plur on PROPN+NNPS", docname, id, "Number", "Plur")
 
     # VB feats (subjunctive, imperative, or infinitive)
+    bits = feats.bits
     if pos == "VB" and "VerbForm" not in feats:
-        print("WARN: VB should have VerbForm in " + docname + " @ token " + str(id))
+        warn("WARN: VB should have VerbForm in " + docname + " @ token " + str(id))
     elif pos == "VB" and verbForm == "Fin" and feats["Mood"] == "Sub":
-        if not all(f in feats for f in ["Number","Person","Tense"]) or tense != "Pres":
-            print("WARN: VB/Mood=Sub should have Number, Person, and Tense=Pres in " + docname + " @ token " + str(id))
-    elif pos == "VB" and any(f in feats for f in ["Number","Person","Tense"]):
-        print("WARN: non-subjunctive VB should not have Number, Person, or Tense in " + docname + " @ token " + str(id))
+        if bits & AGREEMENT_FEATURES != AGREEMENT_FEATURES or tense != "Pres":
+            warn("WARN: VB/Mood=Sub should have Number, Person, and Tense=Pres in " + docname + " @ token " + str(id))
+    elif pos == "VB" and bits & AGREEMENT_FEATURES:
+        warn("WARN: non-subjunctive VB should not have Number, Person, or Tense in " + docname + " @ token " + str(id))
     elif pos == "VB" and verbForm == "Inf":
         if "Mood" in feats:
-            print("WARN: VB/VerbForm=Inf should not have Mood in " + docname + " @ token " + str(id))
+            warn("WARN: VB/VerbForm=Inf should not have Mood in " + docname + " @ token " + str(id))
     elif pos == "VB" and not (verbForm == "Fin" and feats["Mood"] == "Imp"):
-        print("WARN: non-inf VB should correspond with Mood=Imp, VerbForm=Fin in " + docname + " @ token " + str(id))
-    elif pos == "VB" and any(f in feats for f in ["Voice"]):
-        print("WARN: VB should not have Voice in " + docname + " @ token " + str(id))
+        warn("WARN: non-inf VB should correspond with Mood=Imp, VerbForm=Fin in " + docname + " @ token " + str(id))
+    elif pos == "VB" and bits & VOICE_FEATURE:
+        warn("WARN: VB should not have Voice in " + docname + " @ token " + str(id))
 
     # VBD => Tense=Past, VerbForm=Fin, Mood=Ind, ...
     if pos == "VBD" and verbForm != "Fin":
-        print("WARN: VBD should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
-    if pos == "VBD" and not all(f in feats for f in ["Number","Person","Tense","Mood"]):
-        print("WARN: VBD should have Number, Person, Tense, and Mood in " + docname + " @ token " + str(id))
+        warn("WARN: VBD should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
+    if pos == "VBD" and bits & FINITE_FEATURES != FINITE_FEATURES:
+        warn("WARN: VBD should have Number, Person, Tense, and Mood in " + docname + " @ token " + str(id))
     elif pos == "VBD" and (tense != "Past" or feats["Mood"] != "Ind"):
         if not (lemma=="be" and tense=="Past" and feats["Mood"]=="Sub"):
-            print("WARN: VBD should correspond with Tense=Past and Mood=Ind (or Mood=Sub for 'were') in " + docname + " @ token " + str(id))
-    if pos == "VBD" and any(f in feats for f in ["Voice"]):
-        print("WARN: VBD should not have Voice in " + docname + " @ token " + str(id))
+            warn("WARN: VBD should correspond with Tense=Past and Mood=Ind (or Mood=Sub for 'were') in " + docname + " @ token " + str(id))
+    if pos == "VBD" and bits & VOICE_FEATURE:
+        warn("WARN: VBD should not have Voice in " + docname + " @ token " + str(id))
 
     # {VBP,VBZ} => Tense=Pres, VerbForm=Fin, Mood=Ind, ...
     # VBZ => Person=3, Number=Sing
     if pos in ("VBP","VBZ") and verbForm != "Fin":
-        print("WARN: " + pos + " should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
-    if pos in ("VBP","VBZ") and not all(f in feats for f in ["Number","Person","Tense","Mood"]):
-        print("WARN: " + pos + " should have Number, Person, Tense, and Mood in " + docname + " @ token " + str(id))
+        warn("WARN: " + pos + " should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
+    if pos in ("VBP","VBZ") and bits & FINITE_FEATURES != FINITE_FEATURES:
+        warn("WARN: " + pos + " should have Number, Person, Tense, and Mood in " + docname + " @ token " + str(id))
     elif pos in ("VBP","VBZ") and (tense != "Pres" or feats["Mood"] != "Ind"):
-        print("WARN: " + pos + " should correspond with Mood=Ind, Tense=Pres in " + docname + " @ token " + str(id))
+        warn("WARN: " + pos + " should correspond with Mood=Ind, Tense=Pres in " + docname + " @ token " + str(id))
     elif pos == "VBZ" and (number != "Sing" or person != "3"):
-        print("WARN: VBZ should have Number=Sing, Person=3 in " + docname + " @ token " + str(id))
-    if pos in ("VBP","VBZ") and any(f in feats for f in ["Voice"]):
-        print("WARN: " + pos + " should not have Voice in " + docname + " @ token " + str(id))
+        warn("WARN: VBZ should have Number=Sing, Person=3 in " + docname + " @ token " + str(id))
+    if pos in ("VBP","VBZ") and bits & VOICE_FEATURE:
+        warn("WARN: " + pos + " should not have Voice in " + docname + " @ token " + str(id))
 
 
     # VBG => VerbForm=Ger,Part
     if pos == "VBG" and verbForm == "Part":
         # VBG => Tense=Pres | VerbForm=Part
         if pos == "VBG" and not (tense == "Pres"):
-            print("WARN: VBG should correspond with Tense=Pres in " + docname + " @ token " + str(id))
+            warn("WARN: VBG should correspond with Tense=Pres in " + docname + " @ token " + str(id))
     elif pos == "VBG" and not (verbForm == "Ger"):
         # AUX+VBG | VERB+VBG => VerbForm=Ger
         if upos in ["AUX","VERB"]:
-            print("WARN: " + upos + "+VBG should correspond with VerbForm=Ger,Part in " + docname + " @ token " + str(id))
+            warn("WARN: " + upos + "+VBG should correspond with VerbForm=Ger,Part in " + docname + " @ token " + str(id))
         # ADJ+VBG => Degree=Poss
         elif upos == "ADJ" and not (degree == "Pos"):
-            print("WARN: ADJ+VBG should correspond with Degree=Pos in " + docname + " @ token " + str(id))
+            warn("WARN: ADJ+VBG should correspond with Degree=Pos in " + docname + " @ token " + str(id))
 
     # VBN => Tense=Past | VerbForm=Part
     if pos == "VBN" and not (verbForm == "Part"):
-        print("WARN: VBN should correspond with VerbForm=Part in " + docname + " @ token " + str(id))
+        warn("WARN: VBN should correspond with VerbForm=Part in " + docname + " @ token " + str(id))
     if pos == "VBN" and not (tense == "Past"):
-        print("WARN: VBN should correspond with Tense=Past in " + docname + " @ token " + str(id))
+        warn("WARN: VBN should correspond with Tense=Past in " + docname + " @ token " + str(id))
 
     # VBZ => Number=Sing | Person=3 | Tense=Pres | VerbForm=Fin
     if pos == "VBZ" and not (number == "Sing"):
-        print("WARN: VBZ should correspond with Number=Sing in " + docname + " @ token " + str(id))
+        warn("WARN: VBZ should correspond with Number=Sing in " + docname + " @ token " + str(id))
     if pos == "VBZ" and not (person == "3"):
-        print("WARN: VBZ should correspond with Person=3 in " + docname + " @ token " + str(id))
+        warn("WARN: VBZ should correspond with Person=3 in " + docname + " @ token " + str(id))
     if pos == "VBZ" and not (tense == "Pres"):
-        print("WARN: VBZ should correspond with Tense=Pres in " + docname + " @ token " + str(id))
+        warn("WARN: VBZ should correspond with Tense=Pres in " + docname + " @ token " + str(id))
     if pos == "VBZ" and not (verbForm == "Fin"):
-        print("WARN: VBZ should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
+        warn("WARN: VBZ should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
 
     # VBP => Number=Sing | Person!=3 | Tense=Pres | VerbForm=Fin
     if pos == "VBP":
         if not (number == "Sing" or number == "Plur"):
-            print("WARN: VBP should correspond with Number=Sing|Plur in " + docname + " @ token " + str(id))
+            warn("WARN: VBP should correspond with Number=Sing|Plur in " + docname + " @ token " + str(id))
         elif number == "Sing" and not (person == "1" or person == "2") and not misc.get("CorrectNumber")=="Sing":
-            print("WARN: singular VBP should correspond with Person=1|2 in " + docname + " @ token " + str(id))
+            warn("WARN: singular VBP should correspond with Person=1|2 in " + docname + " @ token " + str(id))
         elif person not in {"1", "2", "3"}:
-            print("WARN: plural VBP should correspond with Person=1|2|3 in " + docname + " @ token " + str(id))
+            warn("WARN: plural VBP should correspond with Person=1|2|3 in " + docname + " @ token " + str(id))
     if pos == "VBP" and not (tense == "Pres"):
-        print("WARN: VBP should correspond with Tense=Pres in " + docname + " @ token " + str(id))
+        warn("WARN: VBP should correspond with Tense=Pres in " + docname + " @ token " + str(id))
     if pos == "VBP" and not (verbForm == "Fin"):
-        print("WARN: VBP should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
+        warn("WARN: VBP should correspond with VerbForm=Fin in " + docname + " @ token " + str(id))
 
     if lemma == "be":
         t = tok.lower()
@@ -1309,45 +2386,45 @@ def flag_feats_warnings(id, tok, pos, upos, lemma, feats, misc, docname):
             if upos=="NOUN" and docname=="newsgroup-groups.google.com_INTPunderground_b2c62e87877e4a22_ENG_20050906_165900-0025":
                 pass    # "the be all end all"
             elif pos!="VB" or not (verbForm=="Inf" or (verbForm=="Fin" and tense=="Pres" and feats["Mood"]=="Sub") or (verbForm=="Fin" and feats["Mood"]=="Imp")):
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "am" or t == "'m" or t == "’m":
             if pos!="VBP" or verbForm!="Fin" or tense!="Pres" or feats["Mood"]!="Ind" or person!="1" or number!="Sing":
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "are":    # can be 1st person in negation: "aren't I"
             if pos!="VBP" or verbForm!="Fin" or tense!="Pres" or feats["Mood"]!="Ind" or not ((number=="Plur" and person in {"1","2","3"}) or (number=="Sing" and person in {"1","2"})):
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "is" or t == "'s" or t == "’s":
             if (pos!="VBZ" and "CorrectNumber" not in misc) or verbForm!="Fin" or tense!="Pres" or feats["Mood"]!="Ind" or person!="3" or misc.get("CorrectNumber",number)!="Sing":
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "art":    # thou art
             if pos!="VBP" or verbForm!="Fin" or tense!="Pres" or feats["Mood"]!="Ind" or not (number=="Sing" and person=="2") or feats["Style"]!="Arch":
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "ai": # ain't = am/are/is + not (mainly)
             if pos not in {"VBP","VBZ"} or verbForm!="Fin" or tense!="Pres" or feats["Mood"]!="Ind" or feats["Style"]!="Vrnc":
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "was":
             if pos!="VBD" or verbForm!="Fin" or tense!="Past" or feats["Mood"]!="Ind" or number!="Sing":
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "were":
             if pos!="VBD" or verbForm!="Fin" or tense!="Past" or not ((feats["Mood"]=="Ind" and (number=="Plur" or person=="2")) or (feats["Mood"]=="Sub" and number=="Sing")):
-                print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "'re" or t == "’re":  # indicative were or are
             if pos!="VBD" and pos!="VBP":
-                print("WARN: unexpected XPOS for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                warn("WARN: unexpected XPOS for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
             elif pos=="VBD":
                 if verbForm!="Fin" or tense!="Past" or not (feats["Mood"]=="Ind" and (number=="Plur" or person=="2")):
-                    print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                    warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
             elif pos=="VBP":
                 if verbForm!="Fin" or tense!="Pres" or feats["Mood"]!="Ind" or not ((number=="Plur" and person in {"1","2","3"}) or (number=="Sing" and person in {"1","2"})):
-                    print("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
+                    warn("WARN: unexpected morphology for 'be' verb: '" + t + "' in " + docname + " @ token " + str(id))
         elif t == "been":
             if pos != "VBN":
-                print("WARN: 'been' should be VBN in " + docname + " @ token " + str(id))
+                warn("WARN: 'been' should be VBN in " + docname + " @ token " + str(id))
         elif t == "being":
             if pos != "VBG":
-                print("WARN: 'being' should be VBG in " + docname + " @ token " + str(id))
+                warn("WARN: 'being' should be VBG in " + docname + " @ token " + str(id))
         else:
-            print("WARN: unknown 'be' form: " + t + " in " + docname + " @ token " + str(id))
+            warn("WARN: unknown 'be' form: " + t + " in " + docname + " @ token " + str(id))
 
 # See https://universaldependencies.org/en/pos/PRON.html
 PRONOUNS: dict[tuple[str,str],dict] = {
@@ -1502,14 +2579,59 @@ ADVS = {
 }
 ADV_ENTRIES = {f for (f,p),v in ADVS.items()}
 
+# FEATS checked against the lexicon entries by flag_pronoun_warnings
+PRONOUN_FEATURES = ("Abbr", "Case", "Definite", "Gender", "Number", "Person", "Poss", "PronType", "Style", "ExtPos",
+                    "NumForm", "NumType")
+
+class LexiconMasks(NamedTuple):
+    """
+    A lexicon entry's expectations for some FEATS, as masks over FeatureBits:
+    `required` values, `forbidden` features, and `choices` (allowed values, whether the feature may be absent).
+    """
+    required: int
+    forbidden: int
+    choices: Tuple[Tuple[int,int],...]  # (allowed values, presence bit if the feature may be absent else 0)
+
+    @classmethod
+    def compile(cls, entry, names):
+        required = forbidden = 0
+        choices = []
+        for name in names:
+            if name not in entry:
+                forbidden |= FEATURE_BITS.feature(name)
+            elif isinstance(entry[name], str):
+                required |= FEATURE_BITS.value(name, entry[name])
+            else:
+                presence = FEATURE_BITS.feature(name)
+                allowed = 0
+                for value in entry[name]:
+                    if value is not None:
+                        allowed |= FEATURE_BITS.value(name, value) & ~presence
+                choices.append((allowed, presence if None in entry[name] else 0))
+        return cls(required, forbidden, tuple(choices))
+
+    def match(self, bits):
+        """Whether features `bits` meet all expectations, i.e. check_has_feature would not warn."""
+        if bits & self.required != self.required or bits & self.forbidden:
+            return False
+        return all(bits & allowed or (optional and not bits & optional) for allowed, optional in self.choices)
+
+# (form or lemma, XPOS) -> masks of the lexicon entry for all PRONOUN_FEATURES, and for all but Abbr;
+# same precedence as the lookup in flag_pronoun_warnings (PRONOUNS, then DETS, then ADVS)
+LEXICON_MASKS = {key: (LexiconMasks.compile(entry, PRONOUN_FEATURES), LexiconMasks.compile(entry, PRONOUN_FEATURES[1:]))
+                 for table in (ADVS, DETS, PRONOUNS) for key, entry in table.items()}
+
 
 # See https://universaldependencies.org/en/pos/PRON.html
+PRONOUN_BIGRAMS = {("no","one"), ("one","another"), ("each","other")}
+
 def flag_pronoun_warnings(id, form, pos, upos, lemma, feats, misc, prev_tok, docname):
     form = form.replace("’", "'") # Normalize apostrophe characters.
 
     # Shorthand for printing errors
     tokname = "FORM '" + form + "'"
     inname = " in " + docname + " @ token " + str(id)
+    target = (docname, id)
 
     # Look up the correct features/lemma for the pronoun from the PRONOUNS lexicon
     if upos=='PRON' or form.lower() in ('these','those'):
@@ -1519,40 +2641,49 @@ def flag_pronoun_warnings(id, form, pos, upos, lemma, feats, misc, prev_tok, doc
     else:
         data_key = (lemma, pos)
     
-    if (prev_tok.lower(),form.lower()) in {("no","one"), ("one","another"), ("each","other")}:  # special case for bigrams
+    if (prev_tok.lower(),form.lower()) in PRONOUN_BIGRAMS:  # special case for bigrams
         data_key = (prev_tok.lower() + " " + form.lower(), pos)
 
     data = PRONOUNS.get(data_key, DETS.get(data_key, ADVS.get(data_key)))
 
     if data == None:
         if pos in ["PRP","PRP$"]:
-            print("WARN: FORM '" + form + "' with XPOS=" + pos + " does not have a corresponding feature mapping " + inname)
+            warn("WARN: FORM '" + form + "' with XPOS=" + pos + " does not have a corresponding feature mapping " + inname)
         return
 
     if not lemma == data["LEMMA"]:
-        print("WARN: FORM '" + form + "' should correspond with LEMMA=" + data["LEMMA"] + inname)
+        warn("WARN: FORM '" + form + "' should correspond with LEMMA=" + data["LEMMA"] + inname)
+
+    abbreviated = upos != "PRON" and feats.get("Abbr")=="Yes"
+    all_masks, masks_but_abbr = LEXICON_MASKS[data_key]
+    if (masks_but_abbr if abbreviated else all_masks).match(feats.bits):
+        # FEATS agree with the lexicon entry: only the MISC checks below can fail
+        if not abbreviated and not ("Typo" in feats and feats["Typo"] == "Yes"):
+            check_has_feature("CorrectForm", misc, data, tokname, inname)
+        check_has_feature("ModernForm", misc, data, tokname, inname)
+        return
 
     # Check whether the correct features for the lexical item (data) match
     # the observed features on the token (feats)
-    if upos != "PRON" and feats.get("Abbr")=="Yes":
+    if abbreviated:
         pass    # OK to abbreviate determiners, and to have a CorrectForm on these
     else:
-        check_has_feature("Abbr", feats, data, tokname, inname)
+        check_has_feature("Abbr", feats, data, tokname, inname, target)
         # CorrectForm for Typo=Yes has already been handled.
         if not ("Typo" in feats and feats["Typo"] == "Yes"):
             check_has_feature("CorrectForm", misc, data, tokname, inname)
-    check_has_feature("Case", feats, data, tokname, inname)
-    check_has_feature("Definite", feats, data, tokname, inname)
-    check_has_feature("Gender", feats, data, tokname, inname)
-    check_has_feature("Number", feats, data, tokname, inname)
-    check_has_feature("Person", feats, data, tokname, inname)
-    check_has_feature("Poss", feats, data, tokname, inname)
-    check_has_feature("PronType", feats, data, tokname, inname)
-    check_has_feature("Style", feats, data, tokname, inname)
-    check_has_feature("ExtPos", feats, data, tokname, inname)
+    check_has_feature("Case", feats, data, tokname, inname, target)
+    check_has_feature("Definite", feats, data, tokname, inname, target)
+    check_has_feature("Gender", feats, data, tokname, inname, target)
+    check_has_feature("Number", feats, data, tokname, inname, target)
+    check_has_feature("Person", feats, data, tokname, inname, target)
+    check_has_feature("Poss", feats, data, tokname, inname, target)
+    check_has_feature("PronType", feats, data, tokname, inname, target)
+    check_has_feature("Style", feats, data, tokname, inname, target)
+    check_has_feature("ExtPos", feats, data, tokname, inname, target)
     # ensure pronominal uses of 'one' do NOT have these features
-    check_has_feature("NumForm", feats, data, tokname, inname)
-    check_has_feature("NumType", feats, data, tokname, inname)
+    check_has_feature("NumForm", feats, data, tokname, inname, target)
+    check_has_feature("NumType", feats, data, tokname, inname, target)
 
     check_has_feature("ModernForm", misc, data, tokname, inname)
     
@@ -1571,27 +2702,415 @@ def check_and_fix_form_typos(id, form, feats, misc, merged, docname):
             return form
         else:
             inname = " in " + docname + " @ token " + str(id)
-            print("WARN: FORM '" + form + "' with Typo=Yes should have feature CorrectForm or a following goeswith dependency" + inname)
+            warn("WARN: FORM '" + form + "' with Typo=Yes should have feature CorrectForm or a following goeswith dependency" + inname)
     return form
 
 
-def check_has_feature(name, feats, data, tokname, inname):
+def check_has_feature(name, feats, data, tokname, inname, target=None):
+    """`target`: (sent_id, word id) whose FEATS are `feats`, to propose unambiguous repairs for."""
+    if isinstance(feats, MaskedFeats) and name in feats.masked:
+        target = None   # the check does not see the actual value
     if not name in data:
         if name in feats:
-            print("WARN: " + tokname + " should not have feature " + name + inname)
+            warn("WARN: " + tokname + " should not have feature " + name + inname)
+            if target:
+                propose_fix("pronoun lexicon feature", *target, name, None)
         return
 
     if isinstance(data[name], str):
         if not (name in feats and feats[name] == data[name]):
             feature = name + "=" + data[name]
-            print("WARN: " + tokname + " should correspond with " + feature + inname)
+            warn("WARN: " + tokname + " should correspond with " + feature + inname)
+            if target:
+                propose_fix("pronoun lexicon feature", *target, name, data[name])
     else:
         if not name in feats and None in data[name]:
             pass # optional feature
         elif not (name in feats and feats[name] in data[name]):
-            feature = name + "=" + ','.join([value for value in data[name] if value != None])
-            print("WARN: " + tokname + " should correspond with " + feature + inname)
+            values = [value for value in data[name] if value != None]
+            feature = name + "=" + ','.join(values)
+            warn("WARN: " + tokname + " should correspond with " + feature + inname)
+            if target and len(values) == 1 and None not in data[name]:
+                propose_fix("pronoun lexicon feature", *target, name, values[0])
+
+
+class SignatureCache:
+    """
+    Bounded LRU cache in front of a per-token check `fn(id, ..., docname)` whose warnings depend
+    only on a signature of the token (`key(...)`, called with the same arguments minus the id;
+    None means: do not cache this call). On a miss the check runs with placeholders for the
+    sentence id and token number and its warnings (and proposed fixes) are stored as templates;
+    on a hit the templates are re-instantiated for the token at hand.
+    With fixes=False, fixes proposed by the check are dropped. Instances may be shared between threads;
+    `name` labels the cache in stats() (several caches may wrap the same check).
+    """
+    SENT = "\x00sent_id\x00"
+    TOK = "\x00token\x00"
+
+    def __init__(self, name, fn, key, maxsize=SIGNATURE_CACHE_SIZE, fixes=True):
+        self.name = name
+        self.fn = fn
+        self.key = key
+        self.maxsize = maxsize
+        self.fixes = fixes
+        self.templates: Dict[tuple,Tuple[Tuple[str,...],tuple]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.calls = self.hits = 0
+        self.miss_time = self.hit_time = 0.0
+
+    def __call__(self, id, *args):
+        self.calls += 1
+        key = self.key(*args) if self.maxsize else None
+        if key is None:
+            if self.fixes:
+                return self.fn(id, *args)
+            sinks = current_sinks()
+            token = SINKS.set(sinks._replace(fix=None))
+            try:
+                return self.fn(id, *args)
+            finally:
+                SINKS.reset(token)
+        start = time.perf_counter()
+        with self.lock:
+            templates = self.templates.get(key)
+            if templates is not None:
+                self.templates.move_to_end(key)
+        if templates is None:
+            messages, fixes = [], []
+            token = SINKS.set(current_sinks()._replace(report=messages.append, fix=lambda *proposal: fixes.append(proposal)))
+            try:
+                self.fn(self.TOK, *args[:-1], self.SENT)
+            finally:
+                SINKS.reset(token)
+            templates = (tuple(messages), tuple(fixes))
+            with self.lock:
+                self.templates[key] = templates
+                if len(self.templates) > self.maxsize:
+                    self.templates.popitem(last=False)
+            hit = False
+        else:
+            self.hits += 1
+            hit = True
+        docname, tok_id = args[-1], str(id)
+        messages, fixes = templates
+        for template in messages:
+            warn(template.replace(self.SENT, docname).replace(self.TOK, tok_id))
+        if self.fixes:
+            for rule, sent_id, word, feature, value in fixes:
+                propose_fix(rule, docname if sent_id == self.SENT else sent_id, id if word == self.TOK else word, feature, value)
+        if hit:
+            self.hit_time += time.perf_counter() - start
+        else:
+            self.miss_time += time.perf_counter() - start
+
+    def stats(self):
+        """One-line summary: hit rate and the time saved, estimating a hit's uncached cost by the mean miss."""
+        misses = self.calls - self.hits
+        saved = self.hits * self.miss_time / max(misses, 1) - self.hit_time
+        return (f"{self.name}: {self.calls} calls, {self.hits} hits ({self.hits / max(self.calls, 1):.1%}), "
+                f"{len(self.templates)} signatures cached, ~{saved:.2f}s saved")
+
+def feats_signature(tok, pos, upos, lemma, feats, misc, docname):
+    if lemma == "be" and upos == "NOUN":
+        return None     # exception by sent_id in flag_feats_warnings
+    return (tok, pos, upos, lemma, feats.bits, misc.get("CorrectNumber", "\x00"), "CorrectNumber" in misc)
+
+def pronoun_signature(form, pos, upos, lemma, feats, misc, prev_tok, docname):
+    bigram = prev_tok.lower() if (prev_tok.lower(),form.lower()) in PRONOUN_BIGRAMS else ""
+    return (form, pos, upos, lemma, feats.bits, bigram,
+            misc.get("CorrectForm", "\x00"), "CorrectForm" in misc, misc.get("ModernForm", "\x00"), "ModernForm" in misc)
+
+cached_feats_warnings = SignatureCache("feats", flag_feats_warnings, feats_signature)
+cached_pronoun_warnings = SignatureCache("pronouns", flag_pronoun_warnings, pronoun_signature)
+# the bigram check for reciprocals reports at the second word, but inspects the features of the first
+cached_reciprocal_warnings = SignatureCache("reciprocals", flag_pronoun_warnings, pronoun_signature, fixes=False)
+
+
+# Location of the sentence in a message: " in SENT_ID" optionally followed by " @ token N" or " @ line N"
+WARNING_LOCATION_RE = re.compile(r" in (?P<sent_id>[^\s,]+)(?: @ (?:token|line) (?P<token>\d+))?")
+WARNING_FILENAME_RE = re.compile(r"(\)) [^\s()]+?\.conllu(?:\.gz|\.zst)?")
+
+def parse_warning(msg):
+    """
+    Split a validator message into (rule, sent_id, token, normalized message).
+    The normalized message omits the input file name and any continuation lines
+    (e.g. tracebacks), so that keys are stable across runs on splits vs. sources.
+    """
+    msg = WARNING_FILENAME_RE.sub(r"\1", msg.strip().split("\n", 1)[0])
+    locations = list(WARNING_LOCATION_RE.finditer(msg))
+    if not locations:
+        return msg, "", "", msg
+    loc = locations[-1]
+    rule = re.sub(r"'[^']*'", "'*'", msg[:loc.start()])
+    return rule, loc.group("sent_id"), loc.group("token") or "", msg
+
+def warning_key(msg):
+    return hashlib.sha1("\t".join(parse_warning(msg)).encode("utf-8")).hexdigest()[:16]
+
+class WarningBaseline:
+    """
+    Known warnings, stored as hashed keys of (rule, sent_id, token, normalized message)
+    in a TSV file. With a baseline loaded, only new warnings are passed on to `out`,
+    and baseline warnings that no longer occur are reported as fixed.
+    """
+    def __init__(self, path=None, out=print):
+        self.known: Dict[str,str] = {}  # key -> message
+        self.seen = set()
+        self.new = 0
+        self.out = out
+        if path:
+            with open(path, encoding='utf-8') as inF:
+                for ln in inF:
+                    key, _, msg = ln.rstrip('\n').partition('\t')
+                    self.known[key] = msg
+        self.messages: Dict[str,str] = {}   # everything reported in this run
+
+    def __call__(self, msg):
+        key = warning_key(msg)
+        self.messages.setdefault(key, msg.strip().split("\n", 1)[0])
+        if key in self.known:
+            self.seen.add(key)
+        else:
+            self.new += 1
+            self.out(msg)
+
+    def restrict(self, keep):
+        """Only compare with the known warnings for which keep(message) is true (e.g. those in the validated documents)."""
+        self.known = {key: msg for key, msg in self.known.items() if keep(msg)}
+
+    def fixed(self):
+        return [msg for key, msg in self.known.items() if key not in self.seen]
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8', newline='\n') as outF:
+            for key, msg in sorted(self.messages.items(), key=lambda kv: kv[1]):
+                outF.write(key + '\t' + msg + '\n')
+
+class Fixes:
+    """
+    Collects the repairs offered via propose_fix and applies them with --fix: once an input
+    file has been validated, the FEATS column of the affected word lines is rewritten (all
+    other lines are kept byte for byte), and the file is replaced atomically if anything
+    changed. Goeswith parts and features with conflicting proposals are left alone.
+    """
+    def __init__(self):
+        self.pending = defaultdict(lambda: defaultdict(dict))   # sent_id -> word id -> feature -> {value: rule}
+        self.counts = Counter()     # rule -> number of features changed
+        self.files = []
+
+    def __call__(self, rule, sent_id, id, feature, value):
+        self.pending[sent_id][id].setdefault(feature, {}).setdefault(value, rule)
+
+    def patch_line(self, sent_id, cols, changes):
+        feats = dict(f.split('=', 1) for f in cols[5].split('|')) if cols[5] != '_' else {}
+        changed = False
+        for feature, proposals in changes.items():
+            if len(proposals) > 1:
+                sys.stderr.write(f"! conflicting fixes for {feature} in {sent_id} @ token {cols[0]}: "
+                                 + ', '.join(f"{v} ({rule})" for v, rule in proposals.items()) + " - not fixed\n")
+                continue
+            (value, rule), = proposals.items()
+            if feats.get(feature) == value:
+                continue
+            if value is None:
+                del feats[feature]
+            else:
+                feats[feature] = value
+            self.counts[rule] += 1
+            changed = True
+        if changed:
+            cols[5] = '|'.join(f"{k}={v}" for k, v in sorted(feats.items(), key=lambda kv: kv[0].lower())) or '_'
+        return changed
+
+    def apply(self, path, text):
+        """Apply the pending repairs to the sentences of `text`, the content of `path`."""
+        if not self.pending:
+            return
+        lines = text.split('\n')
+        changed = False
+        sent_id = None
+        for k, ln in enumerate(lines):
+            if ln.startswith('# sent_id = '):
+                sent_id = ln[len('# sent_id = '):].strip()
+            elif ln and not ln.startswith('#') and sent_id in self.pending:
+                cols = ln.split('\t')
+                changes = self.pending[sent_id].get(int(cols[0])) if cols[0].isdigit() else None
+                if changes and cols[7] != 'goeswith' and self.patch_line(sent_id, cols, changes):
+                    lines[k] = '\t'.join(cols)
+                    changed = True
+        self.pending.clear()
+        if changed:
+            write_text(path, '\n'.join(lines))
+            self.files.append(path)
+
+    def summary(self):
+        for rule, n in self.counts.most_common():
+            sys.stderr.write(f"! fixed {n}: {rule}\n")
+        sys.stderr.write(f"! {sum(self.counts.values())} features fixed in {len(self.files)} files\n")
+
+
+class Message(NamedTuple):
+    """A validator message, split up as by parse_warning."""
+    text: str
+    rule: str
+    sent_id: str
+    token: str  # token number as given in the message, or ''
+
+class ValidationResult(NamedTuple):
+    messages: Tuple[Message,...]
+    sentences: int
+    fixes: Tuple[tuple,...]     # (rule, sent_id, word id, feature, value) as offered via propose_fix
+    nns_lemmas: Counter         # lemmas of NNS tokens with lemma = form
+    suspicious_lemma_types: int # (form, XPOS) types with rare lemmas (see validate_lemmas)
+
+class Validator:
+    """
+    neaten.py as a library: validates CoNLL-U given as a string, a text file object, a parsed
+    conllu.TokenList or an iterable of them, and returns the messages as a ValidationResult
+    instead of printing them.
+
+        validator = Validator()
+        result = validator.validate(text)
+        for msg in result.messages:
+            print(msg.sent_id, msg.token, msg.rule)
+
+    A Validator holds no state between calls; the output of each call is collected in a context
+    variable (see Sinks), so one instance can be used from several threads at once. The trees
+    passed in are not modified. With lemmas=False, the corpus-wide lemma consistency check
+    (which compares the sentences of one call with each other) is skipped.
+    """
+    def __init__(self, lemmas=True):
+        self.lemmas = lemmas
+
+    def validate(self, source, filename=None):
+        """`filename` names the input in messages; by default the name of a file object, if any."""
+        if filename is None:
+            filename = os.path.basename(strip_suffix(getattr(source, 'name', '') or ''))
+        if isinstance(source, str):
+            trees = conllu.parse_incr(io.StringIO(source))
+        elif hasattr(source, 'read'):
+            trees = conllu.parse_incr(source)
+        elif isinstance(source, conllu.TokenList):
+            trees = [source]
+        else:
+            trees = source
+        return self._run([(filename, trees)])
+
+    def validate_files(self, paths):
+        """Validate (possibly compressed) .conllu files together, as the script does."""
+        return self._run((os.path.basename(strip_suffix(path)), parse_text(data))
+                         for path, data in read_ahead(paths))
+
+    def _run(self, documents):
+        messages, fixes = [], []
+        sinks = Sinks(messages.append, lambda *proposal: fixes.append(proposal), Counter())
+        lemma_dict = defaultdict(lambda : defaultdict(int))
+        lemma_docs = defaultdict(set)
+        sentences = suspicious_types = 0
+        token = SINKS.set(sinks)
+        try:
+            for filename, trees in documents:
+                sequence = DocumentSequence()
+                for tree in trees:
+                    tree = conllu.TokenList(tree, metadata={**tree.metadata, 'filename': filename})
+                    sequence.check(tree)
+                    validate_tree(tree, lemma_dict, lemma_docs)
+                    sentences += 1
+            if self.lemmas:
+                suspicious_types = validate_lemmas(lemma_dict, lemma_docs)
+        finally:
+            SINKS.reset(token)
+        return ValidationResult(tuple(Message(msg.strip(), *parse_warning(msg)[:3]) for msg in messages),
+                                sentences, tuple(fixes), sinks.nns_lemmas, suspicious_types)
+
+
+def default_files():
+    """The split files, each either plain or compressed (.conllu.gz, .conllu.zst)."""
+    plain = glob.glob('../../en_ewt-ud-*.conllu')
+    return plain + sorted(p for p in glob.glob('../../en_ewt-ud-*.conllu.*')
+                          if compression(p) and strip_suffix(p) not in plain)
+
+def default_source_files():
+    """The source documents (the splits are built from them), each either plain or compressed."""
+    plain = sorted(glob.glob('../sources/*/*.conllu'))
+    return plain + sorted(p for p in glob.glob('../sources/*/*.conllu.*')
+                          if compression(p) and strip_suffix(p) not in plain)
 
 
 if __name__=='__main__':
-    validate_src(sys.argv[1:] or glob.glob('../../en_ewt-ud-*.conllu'))
+    ap = argparse.ArgumentParser(description="English-specific validation rules for UD corpora.")
+    ap.add_argument('files', nargs='*', help='.conllu(.gz|.zst) files to validate (default: ../../en_ewt-ud-*.conllu; with --fix: ../sources/*/*.conllu)')
+    ap.add_argument('--baseline', metavar='FILE', help='only report warnings not in the baseline FILE, plus baseline warnings that were fixed')
+    ap.add_argument('--write-baseline', metavar='FILE', help='save the warnings of this run as a baseline FILE')
+    ap.add_argument('--signature-cache-size', type=int, default=SIGNATURE_CACHE_SIZE, metavar='N',
+                    help='token signatures memoized by the feature and pronoun checks; 0 disables (default: %(default)s)')
+    ap.add_argument('--stats', action='store_true', help='print signature cache statistics to stderr (not collected with -j)')
+    ap.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                    help='validate in N processes, splitting large files at document boundaries; 0: one per CPU (default: %(default)s)')
+    ap.add_argument('--progress', choices=('text', 'json'),
+                    help='show progress and throughput on stderr, as a status line or as JSON lines (for CI logs)')
+    ap.add_argument('--no-parse-cache', action='store_true', help='parse all input files instead of loading unchanged ones from the parse cache')
+    ap.add_argument('--sample', type=float, metavar='FRACTION',
+                    help='validate a seeded random FRACTION of the source documents of each split and genre, plus all changed'
+                         ' source files, and estimate the warning rate of each rule in the corpus (see sampling.py)')
+    ap.add_argument('--seed', type=int, default=0, help='random seed for --sample (default: %(default)s)')
+    ap.add_argument('--changed-since', metavar='REV', default='HEAD',
+                    help='with --sample: always validate the source files changed since git revision REV (default: %(default)s)')
+    ap.add_argument('--export-lemmas', metavar='FILE',
+                    help='write the majority lemma of each (form, XPOS) in the files to FILE, a table for lemmatizers (see lemmatable.py)')
+    ap.add_argument('--fix', action='store_true',
+                    help='apply the repairs of warnings that have exactly one correct fix to the input files (in place);'
+                         ' only source documents should be fixed, as build.py regenerates the splits from them'
+                         ' (default input with --fix: ../sources/*/*.conllu)')
+    args = ap.parse_args()
+    if args.sample is not None and (args.files or not 0 < args.sample <= 1):
+        ap.error('--sample takes a fraction in (0, 1] and no input files')
+
+    caches = (cached_feats_warnings, cached_pronoun_warnings, cached_reciprocal_warnings)
+    for cache in caches:
+        cache.maxsize = args.signature_cache_size
+
+    baseline = None
+    if args.baseline or args.write_baseline:
+        report = baseline = WarningBaseline(args.baseline)
+    if args.fix:
+        fix = Fixes()
+    if args.no_parse_cache:
+        parse_cache = None
+    infiles = args.files or (default_source_files() if args.fix else default_files())
+    if args.sample is not None:
+        sample = Sample(population(), args.sample, args.seed, changed_files(args.changed_since))
+        infiles = sample.paths()
+        if baseline is not None:    # warnings in documents not sampled are not "fixed"
+            baseline.restrict(lambda msg: not msg.startswith(RARE_LEMMA) and sample.document(parse_warning(msg)[1]) is not None)
+        report_sampled = report
+        def report(msg):
+            if msg.startswith(RARE_LEMMA):  # the lemmas of the sample only: neither extrapolated nor compared with a baseline
+                sample.add_unscaled("rare lemma")
+                print(msg)
+                return
+            rule, sent_id, _, _ = parse_warning(msg)
+            sample.add(rule, sent_id)
+            report_sampled(msg)
+    jobs = args.jobs or os.cpu_count() or 1
+    lemma_dict = validate_src(infiles, Progress(args.progress) if args.progress else None, jobs)
+    if args.export_lemmas:
+        table = majority_lemmas(lemma_dict)
+        write_table(args.export_lemmas, table)
+        sys.stderr.write(f"! {len(table)} (form, XPOS) types written to {args.export_lemmas}\n")
+    if args.fix:
+        fix.summary()
+    if args.sample is not None:
+        sample.report()
+    if args.stats and jobs == 1:
+        for cache in caches:
+            sys.stderr.write("! " + cache.stats() + "\n")
+    if args.write_baseline:
+        baseline.save(args.write_baseline)
+    if args.baseline:
+        fixed = baseline.fixed()
+        for msg in fixed:
+            print("FIXED: " + msg)
+        sys.stderr.write(f"! {baseline.new} new, {len(fixed)} fixed, {len(baseline.seen)} known warnings (baseline: {args.baseline})\n")
+        sys.exit(1 if baseline.new else 0)
+
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Long-lived neaten.py validation server for annotation editors, speaking
+JSON-RPC 2.0 over stdio with Language Server Protocol framing
+(Content-Length headers).
+
+The rule tables and the corpus-wide lemma aggregates (by default over
+not-to-release/sources) are loaded once at startup. Submitted documents are
+validated sentence by sentence; results are cached per sentence, so after an
+edit only the changed sentences are re-checked. The document's contribution
+to the lemma aggregates replaces that of its saved version, so the rare-lemma
+check (validate_lemmas) sees the whole corpus.
+
+LSP: textDocument/didOpen, didChange (full sync), didSave and didClose are
+answered with textDocument/publishDiagnostics. Other clients can send a
+`neaten/validate` request with params {"text": ..., "uri": ...} (uri optional)
+and get the diagnostics back as the result.
+
+Diagnostics are LSP-style: {"range": {"start": {"line", "character"},
+"end": ...}, "severity": 2, "source": "neaten", "code": <rule>, "message": ...},
+with 0-based line numbers pointing at the token line (or the first line of
+the sentence for sentence-level messages).
+
+$ python neatserve.py [--corpus GLOB ...]
+
+Requires python3.6+
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import sys
+import traceback
+from collections import Counter, defaultdict
+from functools import lru_cache
+from urllib.parse import unquote, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conllu
+import neaten
+from compressed import read_text, strip_suffix
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources', '*', '*.conllu')
+SENTENCE_CACHE_SIZE = 50000    # validated sentences kept in memory
+POSITION_RE = re.compile(r" @ (token|line) (\d+)")
+WARNING, INFORMATION = 2, 3     # LSP DiagnosticSeverity
+
+
+def collect_messages(fn, *args):
+    """Run a neaten.py check and return the messages it reports instead of printing them."""
+    messages = []
+    # fixes are not offered to editors; NNS lemmas go to a throwaway counter, not the process-global one
+    token = neaten.SINKS.set(neaten.Sinks(messages.append, None, Counter()))
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            fn(*args)
+    finally:
+        neaten.SINKS.reset(token)
+    return messages
+
+
+def sentences(text):
+    """Yield (0-based number of the first line, lines) for each sentence block of a CoNLL-U document."""
+    block, start = [], 0
+    for i, ln in enumerate(text.split('\n')):
+        if ln.strip():
+            if not block:
+                start = i
+            block.append(ln)
+        elif block:
+            yield start, block
+            block = []
+    if block:
+        yield start, block
+
+
+@lru_cache(maxsize=SENTENCE_CACHE_SIZE)
+def check_sentence(block, docname, filename):
+    """
+    Validate one sentence (its CoNLL-U lines joined by newlines).
+    Returns (messages, lemma entries) where messages are (line offset in the block, rule, message)
+    and lemma entries are (form, XPOS, lemma, line offset) as counted by validate_lemmas.
+    """
+    lines = block.split('\n')
+    word_lines = [k for k, ln in enumerate(lines) if not ln.startswith('#')]
+    tree = conllu.parse(block + '\n\n')[0]
+    tree.metadata['docname'] = docname
+    tree.metadata['filename'] = filename
+    sent_id = tree.metadata.get('sent_id')
+    if sent_id is None:
+        return ((0, 'missing sent_id', 'WARN: sentence without # sent_id'),), ()
+    regular_lines = [word_lines[k] for k, line in enumerate(tree) if neaten.isRegularNode(line)]
+
+    def validate():
+        sound = neaten.validate_structure(tree)
+        neaten.validate_surface(tree)
+        if sound:
+            neaten.validate_annos(tree, tokens)
+    tokens = neaten.normalize_tree(tree)
+    try:
+        raw = collect_messages(validate)
+    except (Exception, SystemExit) as ex:
+        raw = ["WARN: validator failed on this sentence: " + "".join(traceback.format_exception_only(type(ex), ex)).strip()]
+
+    messages = []
+    for msg in raw:
+        offset = 0
+        positions = POSITION_RE.findall(msg.split('\n', 1)[0])
+        if positions:
+            kind, n = positions[-1]
+            n = int(n)
+            if kind == 'token' and 1 <= n <= len(regular_lines):
+                offset = regular_lines[n-1]
+            elif kind == 'line' and 0 <= n < len(word_lines):
+                offset = word_lines[n]
+        messages.append((offset, neaten.parse_warning(msg)[0], msg.strip()))
+    entries = tuple((tok, xpos, lemma, word_lines[i]) for i, tok, xpos, lemma in neaten.lemma_keys(tokens))
+    return tuple(messages), entries
+
+
+class Corpus:
+    """Corpus-wide (form, XPOS) -> lemma counts as in neaten.validate_src, by document."""
+
+    def __init__(self):
+        self.lemma_dict = defaultdict(lambda: defaultdict(int))
+        self.lemma_docs = defaultdict(set)
+        self.entries = {}   # document key -> [(form, XPOS, lemma, sent_id)]
+
+    def replace(self, key, entries):
+        for tok, xpos, lemma, sent_id in self.entries.pop(key, ()):
+            counts = self.lemma_dict[(tok,xpos)]
+            counts[lemma] -= 1
+            if not counts[lemma]:
+                del counts[lemma]
+                if not counts:
+                    del self.lemma_dict[(tok,xpos)]
+            self.lemma_docs[(tok,xpos,lemma)].discard(sent_id)
+        for tok, xpos, lemma, sent_id in entries:
+            self.lemma_dict[(tok,xpos)][lemma] += 1
+            self.lemma_docs[(tok,xpos,lemma)].add(sent_id)
+        if entries:
+            self.entries[key] = list(entries)
+
+    def load(self, path):
+        text = read_text(path)
+        entries = []
+        for tree in neaten.parse_text(text):
+            sent_id = tree.metadata['sent_id']
+            entries.extend((tok, xpos, lemma, sent_id)
+                           for _, tok, xpos, lemma in neaten.lemma_keys(neaten.normalize_tree(tree)))
+        self.replace(os.path.abspath(path), entries)
+
+
+class Server:
+    def __init__(self, corpus_globs):
+        self.corpus = Corpus()
+        self.saved = set()      # documents whose saved version is part of the corpus
+        for pattern in corpus_globs:
+            for path in sorted(glob.glob(pattern)):
+                self.corpus.load(path)
+                self.saved.add(os.path.abspath(path))
+        self.documents = {}     # uri -> text
+        self.running = True
+
+    @staticmethod
+    def doc_key(uri):
+        parsed = urlparse(uri)
+        return os.path.abspath(unquote(parsed.path)) if parsed.scheme == 'file' else uri
+
+    def diagnostics(self, text, uri=''):
+        key = self.doc_key(uri) if uri else None
+        filename = os.path.basename(strip_suffix(key)) if key else 'unsaved.conllu'
+        lines = text.split('\n')
+        diags = []
+        doc_entries, lemma_lines = [], defaultdict(list)
+        docname = None
+        for start, block in sentences(text):
+            for ln in block:
+                if ln.startswith('# newdoc id = '):
+                    docname = ln[len('# newdoc id = '):].strip()
+            sent_id = next((ln.split('=', 1)[1].strip() for ln in block if ln.startswith('# sent_id')), None)
+            try:
+                messages, entries = check_sentence('\n'.join(block), docname, filename)
+            except Exception as ex:     # e.g. unparseable lines
+                messages, entries = ((0, 'parse error', f"ERROR: {type(ex).__name__}: {ex}"),), ()
+            for offset, rule, msg in messages:
+                diags.append(self.diagnostic(start + offset, lines, rule, msg, WARNING))
+            for tok, xpos, lemma, offset in entries:
+                doc_entries.append((tok, xpos, lemma, sent_id))
+                lemma_lines[(tok, xpos, lemma)].append(start + offset)
+
+        self.corpus.replace(key, doc_entries)   # a document without uri is counted only for this check
+        try:
+            keys = {(tok, xpos) for tok, xpos, lemma, sent_id in doc_entries}
+            for msg in collect_messages(neaten.validate_lemmas, self.corpus.lemma_dict, self.corpus.lemma_docs, keys):
+                for (tok, xpos, lemma), linenos in lemma_lines.items():
+                    if msg.startswith(f"! rare lemma {lemma} for {tok}/{xpos} in "):
+                        for lineno in linenos:  # only occurrences in this document
+                            diags.append(self.diagnostic(lineno, lines, 'rare lemma', msg, INFORMATION))
+        finally:
+            if not key:
+                self.corpus.replace(None, ())
+        return diags
+
+    @staticmethod
+    def diagnostic(lineno, lines, rule, msg, severity):
+        return {'range': {'start': {'line': lineno, 'character': 0},
+                          'end': {'line': lineno, 'character': len(lines[lineno]) if lineno < len(lines) else 0}},
+                'severity': severity, 'source': 'neaten', 'code': rule, 'message': msg.strip()}
+
+    def publish(self, uri):
+        return {'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                'params': {'uri': uri, 'diagnostics': self.diagnostics(self.documents[uri], uri)}}
+
+    def handle(self, request):
+        """Return the response or notification messages for one incoming message."""
+        method, params = request.get('method'), request.get('params') or {}
+        out = []
+        result = None
+        if method == 'initialize':
+            result = {'capabilities': {'textDocumentSync': {'openClose': True, 'change': 1, 'save': True}},
+                      'serverInfo': {'name': 'neaten'}}
+        elif method == 'shutdown':
+            result = None
+        elif method == 'exit':
+            self.running = False
+        elif method in ('textDocument/didOpen', 'textDocument/didChange', 'textDocument/didSave'):
+            doc = params['textDocument']
+            uri = doc['uri']
+            if method == 'textDocument/didOpen':
+                self.documents[uri] = doc['text']
+            elif method == 'textDocument/didChange':
+                self.documents[uri] = params['contentChanges'][-1]['text']
+            elif 'text' in params:
+                self.documents[uri] = params['text']
+            if uri in self.documents:
+                out.append(self.publish(uri))
+        elif method == 'textDocument/didClose':
+            uri = params['textDocument']['uri']
+            self.documents.pop(uri, None)
+            key = self.doc_key(uri)
+            if key in self.saved and os.path.exists(key):
+                self.corpus.load(key)   # back to the version on disk
+            else:
+                self.corpus.replace(key, ())
+            out.append({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                        'params': {'uri': uri, 'diagnostics': []}})
+        elif method == 'neaten/validate':
+            result = self.diagnostics(params['text'], params.get('uri', ''))
+        elif 'id' in request and method is not None:
+            return [{'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32601, 'message': f'method not found: {method}'}}]
+        if 'id' in request:
+            out.insert(0, {'jsonrpc': '2.0', 'id': request['id'], 'result': result})
+        return out
+
+
+def read_message(inF):
+    """Read one Content-Length framed JSON-RPC message; None at end of input."""
+    length = None
+    while True:
+        header = inF.readline()
+        if not header:
+            return None
+        header = header.strip()
+        if not header:
+            break
+        name, _, value = header.decode('ascii').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    if length is None:
+        raise ValueError('message without Content-Length header')
+    return json.loads(inF.read(length).decode('utf-8'))
+
+def write_message(outF, message):
+    body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    outF.write(f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii') + body)
+    outF.flush()
+
+
+def main():
+    ap = argparse.ArgumentParser(description='neaten.py validation server (JSON-RPC/LSP over stdio).')
+    ap.add_argument('--corpus', action='append', metavar='GLOB',
+                    help='.conllu files for the corpus-wide lemma aggregates (default: not-to-release/sources/*/*.conllu)')
+    args = ap.parse_args()
+
+    server = Server(args.corpus if args.corpus is not None else [DEFAULT_CORPUS])
+    inF, outF = sys.stdin.buffer, sys.stdout.buffer
+    while server.running:
+        request = read_message(inF)
+        if request is None:
+            break
+        try:
+            responses = server.handle(request)
+        except Exception as ex:
+            traceback.print_exc()
+            responses = [{'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32603, 'message': str(ex)}}] if 'id' in request else []
+        for response in responses:
+            write_message(outF, response)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
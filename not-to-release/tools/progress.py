@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Progress and throughput meter for long runs (neaten.py, build.py --validate),
+written to stderr at most once per INTERVAL seconds.
+
+The text format is one status line, rewritten in place:
+
+    en_ewt-ud-train.conllu  412 docs  6120 sents  38210 tok/s  49%  ETA 0:07
+
+The json format writes one JSON object per line, for CI logs:
+    {"event": "progress", "elapsed": 3.0, "file": ..., "docs": ..., "sentences": ...,
+     "tokens": ..., "tokens_per_s": ..., "fraction": ..., "eta": ...}
+    {"event": "file", "file": ..., "seconds": ..., "sentences": ..., "tokens": ...}   (each finished file)
+    {"event": "done", "elapsed": ..., "docs": ..., "sentences": ..., "tokens": ..., "tokens_per_s": ...}
+"fraction" and "eta" (seconds) are null if the total input size is unknown.
+
+    progress = Progress('text', total=sum of the input file sizes)
+    progress.start_file(path, size, sentences)
+    progress.sentence(tokens, newdoc)   # cheap: only compares the clock
+    progress.advance(sentences, tokens, docs)   # several sentences at once (e.g. from a worker process)
+    progress.end_file()
+    progress.close()
+
+Requires python3.6+
+"""
+import json
+import sys
+import time
+
+INTERVAL = 1.0  # seconds between updates
+
+
+class Progress:
+    def __init__(self, fmt='text', total=None, stream=sys.stderr, interval=INTERVAL):
+        if fmt not in ('text', 'json'):
+            raise ValueError(f"unknown progress format: {fmt!r}")
+        self.fmt = fmt
+        self.total = total      # bytes of input, if known
+        self.stream = stream
+        self.interval = interval
+        self.start = time.monotonic()
+        self.next_update = self.start + interval
+        self.docs = self.sentences = self.tokens = 0
+        self.done_bytes = 0     # size of the finished files
+        self.file = None
+        self.file_size = 0
+        self.file_sentences = None  # expected number of sentences in the current file
+        self.file_start = self.start
+        self.file_counts = (0, 0)   # sentences, tokens at the start of the current file
+        self.width = 0          # of the last text line
+
+    def start_file(self, path, size=0, sentences=None):
+        """`size`: on-disk size of the file (for the ETA); `sentences`: expected number of sentences."""
+        self.file = path
+        self.file_size = size
+        self.file_sentences = sentences
+        self.file_start = time.monotonic()
+        self.file_counts = (self.sentences, self.tokens)
+
+    def sentence(self, tokens=0, newdoc=False):
+        self.advance(1, tokens, newdoc)
+
+    def advance(self, sentences, tokens=0, docs=0):
+        self.sentences += sentences
+        self.tokens += tokens
+        self.docs += docs
+        now = time.monotonic()
+        if now >= self.next_update:
+            self.next_update = now + self.interval
+            self.update(now)
+
+    def end_file(self):
+        now = time.monotonic()
+        self.done_bytes += self.file_size
+        if self.fmt == 'json':
+            self.emit({'event': 'file', 'file': self.file, 'seconds': round(now - self.file_start, 3),
+                       'sentences': self.sentences - self.file_counts[0], 'tokens': self.tokens - self.file_counts[1]})
+        self.file = None
+
+    def fraction(self):
+        if not self.total:
+            return None
+        current = 0
+        if self.file is not None and self.file_sentences:
+            current = self.file_size * min(1.0, (self.sentences - self.file_counts[0]) / self.file_sentences)
+        return min(1.0, (self.done_bytes + current) / self.total)
+
+    def update(self, now=None):
+        now = now or time.monotonic()
+        elapsed = now - self.start
+        rate = self.tokens / elapsed if elapsed > 0 else 0.0
+        fraction = self.fraction()
+        eta = elapsed * (1 - fraction) / fraction if fraction else None
+        if self.fmt == 'json':
+            self.emit({'event': 'progress', 'elapsed': round(elapsed, 3), 'file': self.file, 'docs': self.docs,
+                       'sentences': self.sentences, 'tokens': self.tokens, 'tokens_per_s': round(rate),
+                       'fraction': None if fraction is None else round(fraction, 4),
+                       'eta': None if eta is None else round(eta, 1)})
+            return
+        line = f"{self.file or ''}  {self.docs} docs  {self.sentences} sents  {rate:.0f} tok/s"
+        if fraction is not None:
+            line += f"  {fraction:.0%}"
+            if eta is not None:
+                line += f"  ETA {int(eta) // 60}:{int(eta) % 60:02}"
+        self.stream.write("\r" + line.ljust(self.width))
+        self.stream.flush()
+        self.width = len(line)
+
+    def close(self):
+        now = time.monotonic()
+        elapsed = now - self.start
+        if self.fmt == 'json':
+            self.emit({'event': 'done', 'elapsed': round(elapsed, 3), 'docs': self.docs, 'sentences': self.sentences,
+                       'tokens': self.tokens, 'tokens_per_s': round(self.tokens / elapsed) if elapsed > 0 else 0})
+        elif self.width:
+            self.stream.write("\r" + " " * self.width + "\r")     # leave the terminal clean for the summary
+            self.stream.flush()
+
+    def emit(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
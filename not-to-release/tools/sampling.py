@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Stratified document sample of the source files for quick validation runs
+(neaten.py --sample), with estimates of each rule's warning rate in the whole
+corpus.
+
+The strata are split x genre (train/dev/test from not-to-release/file-lists,
+the genre from the directory under not-to-release/sources); each source file
+is one document. In every stratum, a seeded random FRACTION of the documents
+(at least 2) is drawn. Changed files (relative to a git revision, plus
+uncommitted and untracked ones) are always validated; they are counted with
+certainty and do not take part in the draw.
+
+The rate of a rule is warnings per 1000 tokens in the corpus, estimated per
+stratum with the ratio of warnings to tokens in the sampled documents
+(separate ratio estimator; the token counts of all documents are known), with
+a 95% normal-approximation confidence interval:
+
+    Y_h = X_h * y_h / x_h
+    var(Y_h) = N_h^2 * (1 - n_h/N_h) / n_h * sum((y_i - y_h/x_h * x_i)^2) / (n_h - 1)
+
+for the N_h documents of stratum h with X_h tokens, n_h of which are sampled
+with x_h tokens and y_h warnings in total. Rules that do not fire in the sample
+are not listed, and the rare-lemma check, which compares the sampled documents
+with each other, is only counted; an interval is only as good as the sample is large, so the
+nightly runs still validate the full corpus (neaten.py without --sample).
+
+$ python neaten.py --sample 0.1 --seed 7
+$ python neaten.py --sample 0.1 --changed-since origin/master
+
+Requires python3.6+
+"""
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+from collections import Counter, OrderedDict, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compressed import read_text
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCES_DIR = os.path.join(TOOLS_DIR, '..', 'sources')
+FILE_LISTS_DIR = os.path.join(TOOLS_DIR, '..', 'file-lists')
+SPLITS = ('train', 'dev', 'test')
+MIN_PER_STRATUM = 2     # for a variance estimate
+Z95 = 1.959964
+WORD_LINE_RE = re.compile(r'^\d+\t', re.MULTILINE)
+
+
+class Document:
+    def __init__(self, path, stratum):
+        self.path = path        # as given to the validator
+        self.stratum = stratum  # (split, genre)
+        text = read_text(path)
+        self.tokens = len(WORD_LINE_RE.findall(text))
+        self.ids = [ln.split('=', 1)[1].strip() for ln in text.splitlines() if ln.startswith('# newdoc id')]
+
+
+def population(lists_dir=FILE_LISTS_DIR, sources_dir=SOURCES_DIR):
+    """The documents of all splits, in the order of the file lists."""
+    docs = []
+    for split in SPLITS:
+        with open(os.path.join(lists_dir, 'files.' + split), encoding='utf-8') as inF:
+            for ln in inF:
+                name = ln.strip()
+                if name:
+                    docs.append(Document(os.path.relpath(os.path.join(sources_dir, name)), (split, name.split('/', 1)[0])))
+    return docs
+
+
+def changed_files(since='HEAD', sources_dir=SOURCES_DIR):
+    """Real paths of the source files that differ from revision `since`, or are untracked."""
+    changed = set()
+    for cmd in (['git', 'diff', '--name-only', '--relative', since, '--', '.'],
+                ['git', 'ls-files', '--others', '--exclude-standard', '--', '.']):
+        try:
+            out = subprocess.run(cmd, cwd=sources_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            err = getattr(e, 'stderr', b'') or str(e).encode('utf-8')
+            sys.stderr.write(f"! cannot list changed files ({' '.join(cmd[:2])}): {err.decode('utf-8', 'replace').strip()}\n")
+            continue
+        changed.update(os.path.realpath(os.path.join(sources_dir, name))
+                       for name in out.stdout.decode('utf-8').splitlines())
+    return changed
+
+
+class Sample:
+    def __init__(self, docs, fraction, seed=0, always=()):
+        """Draw `fraction` of the documents of each stratum; documents whose real path is in `always` are included."""
+        if not 0 < fraction <= 1:
+            raise ValueError(f"sample fraction must be in (0, 1]: {fraction}")
+        self.docs = docs
+        self.fraction = fraction
+        self.seed = seed
+        self.certain = [d for d in docs if os.path.realpath(d.path) in always]
+        self.strata = OrderedDict()     # (split, genre) -> ([documents not certain], [sampled documents])
+        for d in docs:
+            if d not in self.certain:
+                self.strata.setdefault(d.stratum, ([], []))[0].append(d)
+        rng = random.Random(seed)
+        for stratum, (pool, sampled) in self.strata.items():
+            k = min(len(pool), max(MIN_PER_STRATUM, round(fraction * len(pool))))
+            sampled.extend(rng.sample(pool, k))
+        chosen = set(self.certain).union(*(set(sampled) for _, sampled in self.strata.values()))
+        self.selected = [d for d in docs if d in chosen]
+        self.by_id = {doc_id: d for d in self.selected for doc_id in d.ids}
+        self.counts = defaultdict(Counter)   # rule -> document -> number of warnings
+        self.unattributed = Counter()   # rule -> warnings not located in a selected document
+        self.not_estimated = Counter()  # checks that compare the selected documents with each other -> warnings
+
+    def paths(self):
+        return [d.path for d in self.selected]
+
+    def document(self, sent_id):
+        """The selected document with the sentence (or document id) `sent_id`, or None."""
+        return self.by_id.get(sent_id) or self.by_id.get(sent_id.rsplit('-', 1)[0])
+
+    def add(self, rule, sent_id):
+        """Count a warning of `rule` at `sent_id` (or at a document id)."""
+        doc = self.document(sent_id)
+        if doc is None:
+            self.unattributed[rule] += 1
+        else:
+            self.counts[rule][doc] += 1
+
+    def add_unscaled(self, check):
+        """Count a warning of a check whose counts do not scale to the corpus (such as the rare-lemma check)."""
+        self.not_estimated[check] += 1
+
+    def estimate(self, rule):
+        """Estimated number of warnings of `rule` in the corpus and its variance."""
+        counts = self.counts[rule]
+        total = sum(counts[d] for d in self.certain)
+        variance = 0.0
+        for pool, sampled in self.strata.values():
+            n, x = len(sampled), sum(d.tokens for d in sampled)
+            if not x:
+                continue
+            ratio = sum(counts[d] for d in sampled) / x
+            total += ratio * sum(d.tokens for d in pool)
+            if n < len(pool):
+                residuals = sum((counts[d] - ratio * d.tokens) ** 2 for d in sampled)
+                variance += len(pool) ** 2 * (1 - n / len(pool)) / n * residuals / max(n - 1, 1)
+        return total, variance
+
+    def report(self, out=sys.stderr):
+        tokens = sum(d.tokens for d in self.docs) or 1
+        sampled_tokens = sum(d.tokens for d in self.selected)
+        out.write(f"! sample of {len(self.selected)}/{len(self.docs)} documents ({len(self.certain)} changed),"
+                  f" {sampled_tokens}/{tokens} tokens, {len(self.strata)} strata, fraction {self.fraction}, seed {self.seed}\n")
+        out.write("! estimated warnings per 1000 tokens in the corpus (95% CI), ~warnings, rule\n")
+        rows = []
+        for rule in self.counts:
+            total, variance = self.estimate(rule)
+            half = Z95 * math.sqrt(variance)
+            rows.append((-total, rule, total, max(total - half, 0.0), total + half))
+        for _, rule, total, low, high in sorted(rows):
+            scale = 1000 / tokens
+            out.write(f"! {total * scale:8.3f} ({low * scale:.3f}-{high * scale:.3f})  ~{total:.0f}  {rule}\n")
+        for rule, n in self.unattributed.most_common():
+            out.write(f"! {n} not in a sampled document: {rule}\n")
+        for check, n in self.not_estimated.most_common():
+            out.write(f"! {n} not estimated (among the sampled documents only): {check}\n")
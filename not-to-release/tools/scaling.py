@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Complexity-scaling checks for neaten.py, build.py/unbuild.py and compressed.py.
+
+Generates synthetic well-formed CoNLL-U of growing size (long coordinations,
+deep nmod chains, many passive clauses, goeswith-split words; corpora of growing
+numbers of documents), times each tool on it, and fits the runtime curve
+t ~ c * n^b by least squares on log-log scale. A case fails when the per-unit
+cost grows faster than n^MAX_EXPONENT, i.e. when b - 1 > MAX_EXPONENT, which
+catches e.g. a per-token scan over the whole sentence creeping back in.
+
+$ python scaling.py                     # all cases
+$ python scaling.py coordination passives --sizes 100,200,400,800,1600
+$ python scaling.py --list
+
+Exits with status 1 if any case fails.
+
+Requires python3.6+
+"""
+import argparse
+import contextlib
+import gc
+import io
+import math
+import os
+import runpy
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import neaten
+from compressed import open_text, read_text
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+SENTS_PER_FILE = 5      # sentences of length n per file in the sentence-length cases
+DOC_SENTS = 20          # sentences per document in the corpus cases
+DOC_SENT_LEN = 25       # words per sentence (approximately) in the corpus cases
+MAX_EXPONENT = 0.2      # default bound on the growth of the per-unit cost
+
+
+def conllu_sentence(sent_id, words, newdoc=None):
+    """
+    CoNLL-U block for `words`, a list of (form, lemma, upos, xpos, feats, head, deprel);
+    the enhanced graph is a copy of the basic tree.
+    """
+    lines = []
+    if newdoc:
+        lines.append(f'# newdoc id = {newdoc}')
+    lines.append(f'# sent_id = {sent_id}')
+    lines.append('# text = ' + ' '.join(w[0] for w in words))
+    for i, (form, lemma, upos, xpos, feats, head, deprel) in enumerate(words, 1):
+        lines.append('\t'.join((str(i), form, lemma, upos, xpos, feats or '_', str(head), deprel,
+                                f'{head}:{deprel}', '_')))
+    return '\n'.join(lines) + '\n\n'
+
+
+PLUR_NOUN = 'Number=Plur'
+PAST_FIN = 'Mood=Ind|Number=Plur|Person=3|Tense=Past|VerbForm=Fin'
+
+def coordination(n):
+    """'They saw apples , apples , ... and apples .' with about n words in one conj bundle."""
+    words = [('They', 'they', 'PRON', 'PRP', 'Case=Nom|Number=Plur|Person=3|PronType=Prs', 2, 'nsubj'),
+             ('saw', 'see', 'VERB', 'VBD', PAST_FIN, 0, 'root')]
+    first = None
+    conjuncts = max(2, (n - 3) // 2)
+    for k in range(conjuncts):
+        if k:
+            sep = ('and', 'and', 'CCONJ', 'CC', None) if k == conjuncts - 1 else (',', ',', 'PUNCT', ',', None)
+            words.append(sep + (len(words) + 2, 'cc' if sep[0] == 'and' else 'punct'))
+        words.append(('apples', 'apple', 'NOUN', 'NNS', PLUR_NOUN, first or 2, 'conj' if first else 'obj'))
+        first = first or len(words)
+    words.append(('.', '.', 'PUNCT', '.', None, 2, 'punct'))
+    return words
+
+def chain(n):
+    """'Cats of the cats of the cats ... sleep .': an nmod chain of depth about n/3."""
+    words = [('Cats', 'cat', 'NOUN', 'NNS', PLUR_NOUN, None, 'nsubj')]
+    for k in range(max(1, (n - 2) // 3)):
+        parent = len(words) if k else 1     # the preceding 'cats'
+        words.append(('of', 'of', 'ADP', 'IN', None, len(words) + 3, 'case'))
+        words.append(('the', 'the', 'DET', 'DT', 'Definite=Def|PronType=Art', len(words) + 2, 'det'))
+        words.append(('cats', 'cat', 'NOUN', 'NNS', PLUR_NOUN, parent, 'nmod'))
+    verb = len(words) + 1
+    words[0] = words[0][:5] + (verb, 'nsubj')
+    words.append(('sleep', 'sleep', 'VERB', 'VBP', 'Mood=Ind|Number=Plur|Person=3|Tense=Pres|VerbForm=Fin', 0, 'root'))
+    words.append(('.', '.', 'PUNCT', '.', None, verb, 'punct'))
+    return words
+
+def passives(n):
+    """'they were seen , they were seen , ... and they were seen .': about n/4 passive clauses."""
+    words = []
+    first = None
+    clauses = max(2, (n - 1) // 4)
+    for k in range(clauses):
+        verb = len(words) + 3 + (1 if k else 0)
+        if k:
+            sep = ('and', 'and', 'CCONJ', 'CC', None) if k == clauses - 1 else (',', ',', 'PUNCT', ',', None)
+            words.append(sep + (verb, 'cc' if sep[0] == 'and' else 'punct'))
+        words.append(('they', 'they', 'PRON', 'PRP', 'Case=Nom|Number=Plur|Person=3|PronType=Prs', verb, 'nsubj:pass'))
+        words.append(('were', 'be', 'AUX', 'VBD', PAST_FIN, verb, 'aux:pass'))
+        words.append(('seen', 'see', 'VERB', 'VBN', 'Tense=Past|VerbForm=Part|Voice=Pass', first or 0, 'conj' if first else 'root'))
+        first = first or verb
+    words.append(('.', '.', 'PUNCT', '.', None, first, 'punct'))
+    return words
+
+def goeswith(n):
+    """'They read news paper , news paper , ... and news paper .': words split in two, coordinated."""
+    words = [('They', 'they', 'PRON', 'PRP', 'Case=Nom|Number=Plur|Person=3|PronType=Prs', 2, 'nsubj'),
+             ('read', 'read', 'VERB', 'VBD', PAST_FIN, 0, 'root')]
+    first = None
+    conjuncts = max(2, (n - 3) // 3)
+    for k in range(conjuncts):
+        if k:
+            sep = ('and', 'and', 'CCONJ', 'CC', None) if k == conjuncts - 1 else (',', ',', 'PUNCT', ',', None)
+            words.append(sep + (len(words) + 2, 'cc' if sep[0] == 'and' else 'punct'))
+        words.append(('news', 'newspaper', 'NOUN', 'NN', 'Number=Sing|Typo=Yes', first or 2, 'conj' if first else 'obj'))
+        head = len(words)
+        words.append(('paper', '_', 'X', 'GW', None, head, 'goeswith'))
+        first = first or head
+    words.append(('.', '.', 'PUNCT', '.', None, 2, 'punct'))
+    return words
+
+SENTENCE_CASES = {'coordination': coordination, 'chain': chain, 'passives': passives, 'goeswith': goeswith}
+
+
+def sentence_file(dirname, make, n):
+    path = os.path.join(dirname, f'{make.__name__}-{n}.conllu')
+    with open(path, 'w', encoding='utf-8', newline='\n') as outF:
+        for k in range(SENTS_PER_FILE):
+            outF.write(conllu_sentence(f'synth-{n}-{k:04}', make(n), newdoc=None if k else f'synth-{n}'))
+    return path
+
+def corpus(root, n_sents):
+    """A repository skeleton (file lists and sources) with n_sents sentences, split 8:1:1."""
+    n_docs = max(3, n_sents // DOC_SENTS)
+    flists = {'train': [], 'dev': [], 'test': []}
+    os.makedirs(os.path.join(root, 'not-to-release', 'sources', 'synth'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'not-to-release', 'file-lists'), exist_ok=True)
+    for d in range(n_docs):
+        docid = f'{d:06}'
+        with open(os.path.join(root, 'not-to-release', 'sources', 'synth', docid + '.xml.conllu'), 'w',
+                  encoding='utf-8', newline='\n') as outF:
+            for k in range(DOC_SENTS):
+                outF.write(conllu_sentence(f'synth-{docid}-{k:04}', coordination(DOC_SENT_LEN),
+                                           newdoc=None if k else f'synth-{docid}'))
+        split = 'dev' if d % 10 == 8 else 'test' if d % 10 == 9 else 'train'
+        flists[split].append(f'synth/{docid}.xml.conllu')
+    for split, fpaths in flists.items():
+        with open(os.path.join(root, 'not-to-release', 'file-lists', 'files.' + split), 'w', encoding='utf-8') as outF:
+            outF.write(''.join(fpath + '\n' for fpath in fpaths))
+
+
+def run_neaten(path):
+    report, parse_cache = neaten.report, neaten.parse_cache
+    neaten.report = lambda msg: None
+    neaten.parse_cache = None   # time the parser too, and keep synthetic inputs out of the cache
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            neaten.validate_src([path])
+    finally:
+        neaten.report, neaten.parse_cache = report, parse_cache
+
+def run_script(name, root, *argv):
+    cwd, sys_argv = os.getcwd(), sys.argv
+    os.chdir(root)
+    sys.argv = [name] + list(argv)
+    try:
+        runpy.run_path(os.path.join(TOOLS_DIR, name), run_name='__main__')
+    finally:
+        os.chdir(cwd)
+        sys.argv = sys_argv
+
+def timed(fn, repeat):
+    """Best-of-`repeat` wall time, with the garbage collector off as in timeit."""
+    best = math.inf
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def measure(case, sizes, repeat, tmp):
+    """[(size, seconds)] for one case."""
+    points = []
+    for n in sizes:
+        if case in SENTENCE_CASES:
+            path = sentence_file(tmp, SENTENCE_CASES[case], n)
+            points.append((n, timed(lambda: run_neaten(path), repeat)))
+            continue
+        root = os.path.join(tmp, f'{case}-{n}')
+        corpus(root, n)
+        run_script('build.py', root)
+        if case == 'build':
+            t = timed(lambda: run_script('build.py', root), repeat)
+        elif case == 'unbuild':
+            t = timed(lambda: run_script('unbuild.py', root), repeat)
+        elif case == 'compressed':
+            data = read_text(os.path.join(root, 'en_ewt-ud-train.conllu'))
+            gzpath = os.path.join(root, 'en_ewt-ud-train.conllu.gz')
+            def roundtrip():
+                with open_text(gzpath, 'w') as outF:
+                    outF.write(data)
+                assert read_text(gzpath) == data
+            t = timed(roundtrip, repeat)
+        points.append((n, t))
+    return points
+
+CASES = {'coordination': 'neaten.py on sentences with one n-word coordination',
+         'chain': 'neaten.py on sentences with an nmod chain of depth n/3',
+         'passives': 'neaten.py on sentences with n/4 coordinated passive clauses',
+         'goeswith': 'neaten.py on sentences with n/3 words split by goeswith',
+         'build': 'build.py on a corpus of n sentences',
+         'unbuild': 'unbuild.py on a corpus of n sentences',
+         'compressed': 'gzip write+read round trip of a corpus of n sentences'}
+DEFAULT_SIZES = {'build': (500, 1000, 2000, 4000, 8000), 'unbuild': (500, 1000, 2000, 4000, 8000),
+                 'compressed': (500, 1000, 2000, 4000, 8000)}
+SENTENCE_SIZES = (100, 200, 400, 800, 1600)
+
+
+def exponent(points):
+    """Least-squares slope b of log t = a + b log n."""
+    xs = [math.log(n) for n, t in points]
+    ys = [math.log(max(t, 1e-9)) for n, t in points]
+    mx, my = sum(xs)/len(xs), sum(ys)/len(ys)
+    return sum((x-mx)*(y-my) for x, y in zip(xs, ys)) / sum((x-mx)**2 for x in xs)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Complexity-scaling checks for the EWT tools.')
+    ap.add_argument('cases', nargs='*', metavar='CASE', help='cases to run (default: all)')
+    ap.add_argument('--sizes', help='comma-separated sizes n (default: per case)')
+    ap.add_argument('--repeat', type=int, default=3, help='timing repetitions per size; the minimum is used')
+    ap.add_argument('--max-exponent', type=float, default=MAX_EXPONENT,
+                    help='fail if the per-unit cost grows faster than n^MAX_EXPONENT (default: %(default)s)')
+    ap.add_argument('--list', action='store_true', help='list the cases')
+    args = ap.parse_args()
+
+    if args.list:
+        for case, desc in CASES.items():
+            print(f'{case}\t{desc}')
+        return 0
+    unknown = [case for case in args.cases if case not in CASES]
+    if unknown:
+        ap.error('unknown case(s): ' + ', '.join(unknown))
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in args.cases or CASES:
+            sizes = [int(n) for n in args.sizes.split(',')] if args.sizes else DEFAULT_SIZES.get(case, SENTENCE_SIZES)
+            points = measure(case, sizes, args.repeat, tmp)
+            b = exponent(points)
+            ok = b - 1 <= args.max_exponent
+            failures += not ok
+            costs = ' '.join(f'{n}:{t/n*1e6:.1f}' for n, t in points)
+            print(f'{"ok  " if ok else "FAIL"} {case:<13} t ~ n^{b:.2f}  (µs per unit at n: {costs})')
+    if failures:
+        sys.stderr.write(f'! {failures} case(s) scale worse than n^{1+args.max_exponent:g}\n')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
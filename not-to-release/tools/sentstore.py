@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+sent_id-indexed sentence store for the EWT splits and source documents.
+
+Keeps a persistent index sent_id -> (file, byte offset, length) for
+en_ewt-ud-*.conllu and not-to-release/sources/*/*.conllu, refreshed
+incrementally for files whose size or mtime changed. Sentences are read
+and parsed lazily on demand, behind a bounded LRU cache of parsed trees.
+
+Python API:
+
+    from sentstore import SentenceStore
+    store = SentenceStore()
+    tree = store['reviews-122564-0003']     # conllu.TokenList
+    text = store.text('reviews-122564-0003')  # raw CoNLL-U block
+
+Command line (prints the raw CoNLL-U of each sentence):
+
+$ python sentstore.py reviews-122564-0003 answers-20111106035951AADq0Qg_ans-0012
+$ python sentstore.py --locate reviews-122564-0003
+
+Requires python3.6+
+"""
+import argparse
+import glob
+import os
+import sys
+from functools import lru_cache
+
+import conllu
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sentstore.idx')
+PATTERNS = ('not-to-release/sources/*/*.conllu', 'en_ewt-ud-*.conllu')   # sources are preferred by lookups
+CACHE_SIZE = 1024   # parsed trees kept in memory
+
+
+def scan(path):
+    """Yield (sent_id, offset, length) for each sentence block in a CoNLL-U file."""
+    with open(path, 'rb') as inF:
+        offset = start = 0
+        sent_id = None
+        for ln in inF:
+            if ln.strip():
+                if start is None:
+                    start = offset
+                if ln.startswith(b'# sent_id = '):
+                    sent_id = ln[len(b'# sent_id = '):].strip().decode('utf-8')
+            elif start is not None:
+                if sent_id is not None:
+                    yield sent_id, start, offset - start
+                start = sent_id = None
+            offset += len(ln)
+        if start is not None and sent_id is not None:
+            yield sent_id, start, offset - start
+
+
+class SentenceStore:
+    def __init__(self, root=ROOT, index_path=INDEX_PATH, cache_size=CACHE_SIZE, patterns=PATTERNS):
+        self.root = root
+        self.index_path = index_path
+        self.patterns = patterns
+        self.files = {}     # relative path -> (size, mtime_ns)
+        self.locations = {}  # sent_id -> [(relative path, offset, length)]
+        self._tree = lru_cache(maxsize=cache_size)(self._parse)
+        self.refresh()
+
+    def _load_index(self):
+        entries = {}
+        try:
+            with open(self.index_path, encoding='utf-8') as inF:
+                for ln in inF:
+                    fields = ln.rstrip('\n').split('\t')
+                    if fields[0] == '#file':
+                        self.files[fields[1]] = (int(fields[2]), int(fields[3]))
+                        entries[fields[1]] = []
+                    else:
+                        entries[fields[1]].append((fields[0], int(fields[2]), int(fields[3])))
+        except (FileNotFoundError, KeyError, IndexError, ValueError):
+            self.files = {}
+            entries = {}
+        return entries
+
+    def refresh(self):
+        """Bring the index up to date, rescanning only files that are new or changed."""
+        entries = self._load_index()
+        current = {}
+        for pattern in self.patterns:
+            for path in sorted(glob.glob(os.path.join(self.root, pattern))):
+                st = os.stat(path)
+                current[os.path.relpath(path, self.root)] = (st.st_size, st.st_mtime_ns)
+        changed = current != self.files
+        for relpath, stamp in current.items():
+            if self.files.get(relpath) != stamp or relpath not in entries:
+                entries[relpath] = list(scan(os.path.join(self.root, relpath)))
+        self.files = current
+        self.locations = {}
+        for relpath in current:
+            for sent_id, offset, length in entries[relpath]:
+                self.locations.setdefault(sent_id, []).append((relpath, offset, length))
+        self._tree.cache_clear()
+        if changed:
+            self._save_index(entries)
+
+    def _save_index(self, entries):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8', newline='\n') as outF:
+            for relpath, (size, mtime) in self.files.items():
+                outF.write(f'#file\t{relpath}\t{size}\t{mtime}\n')
+                for sent_id, offset, length in entries[relpath]:
+                    outF.write(f'{sent_id}\t{relpath}\t{offset}\t{length}\n')
+        os.replace(tmp, self.index_path)
+
+    def locate(self, sent_id):
+        """All (file, byte offset, length) locations of a sentence, sources first."""
+        return self.locations.get(sent_id, [])
+
+    def text(self, sent_id):
+        """The raw CoNLL-U block of a sentence (comment lines and token lines)."""
+        locs = self.locate(sent_id)
+        if not locs:
+            raise KeyError(sent_id)
+        relpath, offset, length = locs[0]
+        with open(os.path.join(self.root, relpath), 'rb') as inF:
+            inF.seek(offset)
+            return inF.read(length).decode('utf-8')
+
+    def _parse(self, sent_id):
+        return conllu.parse(self.text(sent_id))[0]
+
+    def __getitem__(self, sent_id):
+        """The parsed sentence (cached; treat it as read-only)."""
+        return self._tree(sent_id)
+
+    def __contains__(self, sent_id):
+        return sent_id in self.locations
+
+    def __len__(self):
+        return len(self.locations)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Fetch EWT sentences by sent_id.')
+    ap.add_argument('sent_ids', nargs='+', metavar='SENT_ID')
+    ap.add_argument('--locate', action='store_true', help='print file:offset:length instead of the sentence')
+    args = ap.parse_args()
+
+    store = SentenceStore()
+    status = 0
+    for sent_id in args.sent_ids:
+        if sent_id not in store:
+            print(f'unknown sent_id: {sent_id}', file=sys.stderr)
+            status = 1
+        elif args.locate:
+            for relpath, offset, length in store.locate(sent_id):
+                print(f'{sent_id}\t{relpath}:{offset}:{length}')
+        else:
+            print(store.text(sent_id))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Run one of the udapy shell scripts (be-ccomp.sh, outer-subj.sh, rc-types.sh)
+on a CoNLL-U file in parallel shards.
+
+The input is split at `# newdoc id` boundaries into N contiguous shards of
+similar size, the script runs on each shard in its own process (reading the
+shard on stdin, as in `cat ... | bash rc-types.sh`), and the outputs are
+concatenated in the original order. Each shard's output must contain the same
+sentences (by count and sent_id, in order) as its input, else nothing is
+written and the exit status is 1. The scripts' stderr is passed through shard
+by shard.
+
+The scripts transform one sentence at a time, so the result is the same as
+from a single run over the whole file.
+
+$ python shard.py rc-types.sh ../../en_ewt-ud-train.conllu -j 8 > train.conllu
+$ python shard.py be-ccomp.sh ../../en_ewt-ud-dev.conllu -o dev.conllu
+
+Requires python3.6+
+"""
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compressed import open_text, read_text
+
+
+def documents(text):
+    """Split a CoNLL-U text into documents, each starting at a `# newdoc id` line (or the beginning)."""
+    docs, start, offset = [], 0, 0
+    block_start = True     # the line follows a blank line (or the start of the text)
+    for ln in text.splitlines(keepends=True):
+        if block_start and ln.startswith('# newdoc id') and offset > start:
+            docs.append(text[start:offset])
+            start = offset
+        if ln.strip():
+            block_start = block_start and ln.startswith('#')
+        else:
+            block_start = True
+        offset += len(ln)
+    if offset > start:
+        docs.append(text[start:offset])
+    return docs
+
+
+def shards(docs, n):
+    """Group consecutive documents into at most n shards of about the same size."""
+    total = sum(len(d) for d in docs)
+    groups, size = [[]], 0
+    for doc in docs:
+        if groups[-1] and size >= total * len(groups) / n:
+            groups.append([])
+        groups[-1].append(doc)
+        size += len(doc)
+    return [''.join(g) for g in groups]
+
+
+def sent_ids(text):
+    return [ln[len('# sent_id = '):].strip() for ln in text.splitlines() if ln.startswith('# sent_id = ')]
+
+
+def run(script, shard):
+    """Run the script with the shard on stdin; return (exit status, stdout, stderr)."""
+    proc = subprocess.run(['bash', script], input=shard.encode('utf-8'),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return proc.returncode, proc.stdout.decode('utf-8'), proc.stderr.decode('utf-8', errors='replace')
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Run a udapy shell script on a .conllu file in parallel shards.')
+    ap.add_argument('script', help='shell script reading CoNLL-U on stdin and writing it to stdout')
+    ap.add_argument('input', help='.conllu(.gz|.zst) file')
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                    help='number of shards run in parallel (default: number of CPUs, %(default)s)')
+    ap.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = ap.parse_args()
+
+    parts = shards(documents(read_text(args.input)), max(args.jobs, 1))
+    # Each shard is processed by a separate bash/udapy process; threads only wait for them.
+    with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+        results = list(pool.map(lambda part: run(args.script, part), parts))
+
+    failed = False
+    for k, (part, (status, out, err)) in enumerate(zip(parts, results), start=1):
+        sys.stderr.write(err)
+        expected, found = sent_ids(part), sent_ids(out)
+        if status:
+            sys.stderr.write(f'! shard {k}/{len(parts)}: {args.script} exited with status {status}\n')
+            failed = True
+        elif expected != found:
+            lost = len(set(expected) - set(found))
+            sys.stderr.write(f'! shard {k}/{len(parts)}: {len(found)} sentences out for {len(expected)} in'
+                             + (f' ({lost} sent_ids lost)' if lost else ' (sent_ids differ or out of order)') + '\n')
+            failed = True
+    if failed:
+        return 1
+
+    if args.output:
+        with open_text(args.output, 'w') as outF:
+            outF.writelines(out for _, out, _ in results)
+    else:
+        sys.stdout.writelines(out for _, out, _ in results)
+    sys.stderr.write(f'! {sum(len(sent_ids(p)) for p in parts)} sentences in {len(parts)} shards\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
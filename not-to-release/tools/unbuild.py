@@ -4,27 +4,34 @@ Given a .conllu file with parses from multiple documents,
 update individual document files under not-to-release/sources/
 (e.g. reviews/001325.xml.conllu).
 
+The split files may be gzip- or zstd-compressed (en_ewt-ud-train.conllu.gz
+or .zst). A source document that is stored compressed is rewritten in the
+same format.
+
 @author: Nathan Schneider (@nschneid)
 @since: 2020-03-01
 
 Requires python3.6+
 """
-import sys, fileinput
+import os, sys, fileinput
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compressed import open_text, resolve
 
 SOURCES_PATH = 'not-to-release/sources'
 outF = None
 
 for split in ('train', 'dev', 'test'):
-    with open(f'en_ewt-ud-{split}.conllu', encoding='utf-8') as inF:
+    with open_text(resolve(f'en_ewt-ud-{split}.conllu')) as inF:
         for ln in inF:
             if ln.startswith('# newdoc id = '):
                 if outF:
                     outF.close()
                 fulldocid = ln[len('# newdoc id = '):].strip()
                 subcorp, docid = fulldocid.split('-')
-                filename = f'{SOURCES_PATH}/{subcorp}/{docid}.xml.conllu'
+                filename = resolve(f'{SOURCES_PATH}/{subcorp}/{docid}.xml.conllu')
                 #print(filename, file=sys.stderr)
-                outF = open(filename, 'w', encoding='utf-8', newline='\n')
+                outF = open_text(filename, 'w')
             elif ln.startswith('# streusle_sent_id') or ln.startswith('# mwe ='):
                 continue    # STREUSLE-specific metadata lines
             outF.write(ln)